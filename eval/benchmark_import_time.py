@@ -0,0 +1,60 @@
+"""
+Misst die Importzeit der Streamlit App und der Pipelines in einem frischen Interpreter
+(python -X importtime) und listet die teuersten Pakete.
+
+Aufruf aus dem Repo-Root:
+    python eval/benchmark_import_time.py
+    python eval/benchmark_import_time.py --modules web_app.app_v2 pipelines.student_exam_extractor
+"""
+import os
+import sys
+import argparse
+import subprocess
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+def measure(module: str) -> tuple[float, dict[str, float]]:
+    """
+    Returns total import time in seconds and cumulative time per package (including its dependencies)
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([SRC_DIR, os.path.dirname(SRC_DIR)])
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC_DIR, env=env, capture_output=True, text=True, check=True
+    )
+
+    total = 0.0
+    packages: dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+
+        _, cumulative, name = line[len("import time:"):].split("|")
+        seconds = int(cumulative) / 1e6
+
+        # Not indented: imported directly by the interpreter
+        if not name[1:].startswith(" "):
+            total += seconds
+
+        # Every package is imported once, its root module holds the time including its dependencies
+        if "." not in name.strip():
+            packages[name.strip()] = seconds
+
+    return total, packages
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", default=["web_app.app_v2", "pipelines.student_exam_extractor"])
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    for module in args.modules:
+        total, packages = measure(module)
+        print(f"{module}: {total:.2f}s")
+        for name, seconds in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+            print(f"    {name:<30}{seconds:>8.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Vergleicht die Latenz der StrikeThroughCleaner Backends auf der CPU.
+
+Aufruf aus dem Repo-Root:
+    python eval/benchmark_strikethrough.py --image src/tests/fixtures/horizontal_cut_section.png
+"""
+import os
+import sys
+import time
+import argparse
+import cv2
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from modules.strikethrough_cleaner import StrikeThroughCleaner # pylint: disable=wrong-import-position
+
+def benchmark(backend: str, model_path: str, sections: list, mode: str, runs: int) -> tuple[float, int]:
+    cleaner = StrikeThroughCleaner(model_path=model_path, backend=backend, mode=mode)
+    cleaner.warmup()
+
+    # Warmup: first call initializes sessions and allocators
+    boxes = cleaner._detect(sections) # pylint: disable=protected-access
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        cleaner._detect(sections) # pylint: disable=protected-access
+    elapsed = (time.perf_counter() - start) / runs
+
+    return elapsed, sum(len(b) for b in boxes)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image", default="src/tests/fixtures/horizontal_cut_section.png")
+    parser.add_argument("--model", default="models/strikethrough/best.pt")
+    parser.add_argument("--sections", type=int, default=20, help="Anzahl Zeilenausschnitte pro Seite")
+    parser.add_argument("--mode", default="batch", choices=StrikeThroughCleaner.MODES)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--backends", nargs="+", default=list(StrikeThroughCleaner.BACKENDS))
+    args = parser.parse_args()
+
+    image = cv2.imread(args.image)
+    if image is None:
+        raise ValueError(f"Bild konnte nicht geladen werden: {args.image}")
+
+    sections = [image.copy() for _ in range(args.sections)]
+
+    print(f"{'Backend':<12}{'ms/Seite':>12}{'ms/Ausschnitt':>16}{'Boxen':>8}")
+    for backend in args.backends:
+        elapsed, box_count = benchmark(backend, args.model, sections, args.mode, args.runs)
+        print(f"{backend:<12}{elapsed * 1000:>12.1f}{elapsed * 1000 / len(sections):>16.2f}{box_count:>8}")
+
+if __name__ == "__main__":
+    main()
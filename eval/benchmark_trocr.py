@@ -0,0 +1,75 @@
+"""
+Vergleicht die TextRecognizer Backends auf der CPU: Zeilen pro Sekunde und CER
+gegenüber der fp32 Ausgabe (oder einer Ground Truth mit einer Zeile pro Bild).
+
+Aufruf aus dem Repo-Root:
+    python eval/benchmark_trocr.py --images src/tests/fixtures/line_crop_handwriting.png
+"""
+import os
+import sys
+import time
+import argparse
+import cv2
+from Levenshtein import distance
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from modules.text_recognizer import TextRecognizer # pylint: disable=wrong-import-position
+
+def cer(reference: list[str], prediction: list[str]) -> float:
+    errors = sum(distance(ref, pred) for ref, pred in zip(reference, prediction))
+
+    return errors / max(1, sum(len(ref) for ref in reference))
+
+def benchmark(backend: str, images: list, batch_size: int, runs: int) -> tuple[float, list[str]]:
+    recognizer = TextRecognizer(backend=backend, batch_size=batch_size, debug=False)
+    recognizer.warmup()
+
+    # Warmup run, also used for the CER
+    texts = recognizer.process({"line-prepared": images})
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        recognizer.process({"line-prepared": images})
+    elapsed = time.perf_counter() - start
+
+    return runs * len(images) / elapsed, texts
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", nargs="+", default=["src/tests/fixtures/line_crop_handwriting.png"])
+    parser.add_argument("--ground-truth", help="Textdatei mit einer Zeile pro Bild")
+    parser.add_argument("--repeat", type=int, default=8, help="Wiederholt die Bilder, um volle Batches zu erhalten")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--backends", nargs="+", default=list(TextRecognizer.BACKENDS))
+    args = parser.parse_args()
+
+    images = []
+    for path in args.images:
+        image = cv2.imread(path)
+        if image is None:
+            raise ValueError(f"Bild konnte nicht geladen werden: {path}")
+        images.append(image)
+
+    reference = None
+    if args.ground_truth:
+        with open(args.ground_truth, "r", encoding="utf-8") as f:
+            reference = [line.rstrip("\n") for line in f] * args.repeat
+
+    images = images * args.repeat
+
+    results = {}
+    for backend in args.backends:
+        results[backend] = benchmark(backend, images, args.batch_size, args.runs)
+
+    # Without ground truth the fp32 output is the reference
+    if reference is None:
+        reference = results["torch"][1] if "torch" in results else next(iter(results.values()))[1]
+
+    print(f"{'Backend':<10}{'Zeilen/s':>10}{'CER':>8}")
+    for backend, (lines_per_second, texts) in results.items():
+        print(f"{backend:<10}{lines_per_second:>10.2f}{cer(reference, texts) * 100:>7.2f}%")
+
+if __name__ == "__main__":
+    main()
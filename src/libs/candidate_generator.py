@@ -0,0 +1,184 @@
+import json
+import time
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+
+from symspellpy import Verbosity
+
+from .sqlite_cache import SqliteCache
+
+# Increase when the generation changes, persisted candidates of older versions are then ignored
+GENERATOR_VERSION = 1
+
+DEFAULT_LIMITS = {"spellchecker": 3, "hunspell": 3, "symspell": 3}
+# Seconds. spylls suggest is pure Python and may take seconds for long words.
+# Checked between suggestions, the time until the first suggestion is not bounded
+DEFAULT_DEADLINES = {"hunspell": 0.5}
+
+@dataclass
+class WordCandidates:
+    """
+    known: spellchecker knows the word as it is (min. 4 characters)
+    candidates: dictionary candidates in source order
+    segmented: word split into two or more words, if that is just one edit away
+    complete: False if a source was cut off by its deadline
+    """
+    known: bool
+    candidates: list[str]
+    segmented: str | None = None
+    complete: bool = True
+
+def normalize_key(word: str) -> str:
+    """
+    Cache key of a word. Casing is kept, SymSpell transfers it to its candidates
+    """
+    return unicodedata.normalize("NFC", word.strip())
+
+class CandidateGenerator:
+    """
+    Generates correction candidates of a word from pyspellchecker, Hunspell (spylls) and SymSpell.
+    Every source contributes at most limits[source] new candidates. Iterative sources are not
+    asked for further suggestions once deadlines[source] seconds have passed, a source which is
+    slow before its first suggestion is not interrupted. Results are memoized in an LRU (lru_size) and optionally in a
+    persistent SqliteCache, so recurring misspellings are only looked up once across pages and students.
+    namespace identifies the dictionaries in the persistent keys
+    """
+    def __init__(
+        self,
+        checker,
+        hunspell,
+        symspell,
+        limits: dict[str, int] | None = None,
+        deadlines: dict[str, float] | None = None,
+        max_edit_distance: int = 4,
+        lru_size: int = 50_000,
+        cache: SqliteCache | None = None,
+        namespace: str = "",
+    ):
+        self.checker = checker
+        self.hunspell = hunspell
+        self.symspell = symspell
+        self.limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self.deadlines = {**DEFAULT_DEADLINES, **(deadlines or {})}
+        self.max_edit_distance = max_edit_distance
+        self.lru_size = lru_size
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+
+        self._lru: OrderedDict[str, WordCandidates] = OrderedDict()
+        self._lock = threading.Lock()
+        # Persisted results are only valid for the same configuration
+        self._fingerprint = hashlib.sha256(json.dumps(
+            [GENERATOR_VERSION, namespace, self.limits, self.max_edit_distance], sort_keys=True
+        ).encode("utf-8")).hexdigest()[:16]
+
+    def generate(self, word: str) -> WordCandidates:
+        """
+        Candidates of word from the LRU, the persistent cache or the dictionaries
+        """
+        key = normalize_key(word)
+
+        with self._lock:
+            result = self._lru.get(key)
+            if result is not None:
+                self._lru.move_to_end(key)
+                self.hits += 1
+
+                return result
+
+        result = self._from_cache(key)
+        if result is None:
+            with self._lock:
+                self.misses += 1
+
+            result = self._generate(key)
+            if self.cache is not None and result.complete:
+                self.cache.set(self._cache_key(key), json.dumps(asdict(result), ensure_ascii=False))
+        else:
+            with self._lock:
+                self.hits += 1
+
+        with self._lock:
+            self._lru[key] = result
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+        return result
+
+    def _cache_key(self, key: str) -> str:
+        return f"{self._fingerprint}:{key}"
+
+    def _from_cache(self, key: str) -> WordCandidates | None:
+        if self.cache is None:
+            return None
+
+        cached = self.cache.get(self._cache_key(key))
+        if cached is None:
+            return None
+
+        return WordCandidates(**json.loads(cached))
+
+    def _generate(self, word: str) -> WordCandidates:
+        complete = True
+        candidates: list[str] = []
+
+        corrected_candidates = self.checker.candidates(word)
+        known = False
+        if corrected_candidates and len(corrected_candidates) == 1:
+            corrected = list(corrected_candidates)[0]
+            known = corrected == word and len(corrected) >= 4
+
+        if known:
+            return WordCandidates(known=True, candidates=[word])
+
+        if corrected_candidates is not None:
+            candidates.extend(list(corrected_candidates)[:self.limits["spellchecker"]])
+
+        complete &= self._extend(candidates, self.hunspell.suggest(word), "hunspell")
+        complete &= self._extend(
+            candidates,
+            (s.term for s in self.symspell.lookup(word, Verbosity.CLOSEST, max_edit_distance=self.max_edit_distance, transfer_casing=True)),
+            "symspell"
+        )
+
+        return WordCandidates(known=False, candidates=candidates, segmented=self._segment(word), complete=complete)
+
+    def _extend(self, candidates: list[str], suggestions, source: str) -> bool:
+        """
+        Adds up to limits[source] new suggestions. The deadline is checked after each suggestion,
+        returns False if it cut the source off
+        """
+        deadline = self.deadlines.get(source)
+        start = time.perf_counter()
+        amount = 0
+        for suggestion in suggestions:
+            if suggestion not in candidates:
+                candidates.append(suggestion)
+                amount += 1
+
+            if amount >= self.limits[source]:
+                return True
+
+            if deadline is not None and time.perf_counter() - start > deadline:
+                print(f"[CandidateGenerator] {source} nach {deadline}s abgebrochen")
+                return False
+
+        return True
+
+    def _segment(self, word: str) -> str | None:
+        result = self.symspell.word_segmentation(word)
+        if result.distance_sum == 1 and len(result.corrected_string.split(" ")) >= 2:
+            return result.corrected_string
+
+        return None
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters and current LRU size
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._lru)}
@@ -1,7 +1,13 @@
 import tempfile
 import os
+from typing import Iterator
+import cv2
 import fleep
-from pdf2image import convert_from_path
+import numpy as np
+from pdf2image import convert_from_path, pdfinfo_from_path
+
+# Default resolution of pdf2image
+DEFAULT_DPI = 200
 
 def is_pdf(file_path) -> bool:
     """
@@ -27,17 +33,54 @@ def normalize_paths(paths):
     path_inputs = []
     for p_i, _input in enumerate(paths):
         if is_pdf(_input):
-            images = convert_from_path(_input)
-        
-            for i, img in enumerate(images):
+            # Only one page is held in memory at a time
+            for i, img in enumerate(iter_pdf_pages(_input)):
                 path = os.path.join(_prependum, "data", "local", f"image_{p_i}_{i}.png")
                 img.save(path)
+                img.close()
                 path_inputs.append(path)
         else:
             path_inputs.append(_input)
 
     return path_inputs
 
+def iter_pdf_pages(path: str, dpi: int = DEFAULT_DPI, thread_count: int = 1, window: int = 1) -> Iterator:
+    """
+    Renders pdf lazily, window pages at a time, and yields them as PIL images
+    """
+    page_count = pdfinfo_from_path(path)["Pages"]
+
+    for first_page in range(1, page_count + 1, window):
+        last_page = min(first_page + window - 1, page_count)
+
+        yield from convert_from_path(
+            path,
+            dpi=dpi,
+            first_page=first_page,
+            last_page=last_page,
+            thread_count=thread_count
+        )
+
+def iter_pages(paths: list[str], dpi: int = DEFAULT_DPI, thread_count: int = 1, window: int = 1) -> Iterator[np.ndarray]:
+    """
+    Yields every page of the given pdfs and images as BGR image (like cv2.imread) in order.
+    Pdfs are rendered in memory window pages at a time, so peak memory does not grow with the page count
+    """
+    for path in paths:
+        if not is_pdf(path):
+            image = cv2.imread(path)
+            if image is None:
+                raise ValueError(f"Bild konnte nicht geladen werden: {path}")
+
+            yield image
+            continue
+
+        for page in iter_pdf_pages(path, dpi=dpi, thread_count=thread_count, window=window):
+            image = cv2.cvtColor(np.asarray(page.convert("RGB")), cv2.COLOR_RGB2BGR)
+            page.close()
+
+            yield image
+
 def save_temp_file(uploaded_file, prefix: str ="student") -> str | None:
     """
     Saves file as a temporary file
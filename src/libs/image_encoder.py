@@ -0,0 +1,91 @@
+import os
+import base64
+import mimetypes
+import time
+import cv2
+import numpy as np
+
+FORMATS = {
+    "jpeg": (".jpg", "image/jpeg", cv2.IMWRITE_JPEG_QUALITY),
+    "webp": (".webp", "image/webp", cv2.IMWRITE_WEBP_QUALITY),
+    "png": (".png", "image/png", None),
+}
+
+class ImageEncoder:
+    """
+    Prepares page images for vision-LLM requests.
+    Downscales to max_long_edge and/or max_megapixels, optionally converts to grayscale
+    and re-encodes as jpeg/webp/png. With format="original" the file is sent unchanged.
+    """
+    def __init__(
+        self,
+        max_long_edge: int | None = 2048,
+        max_megapixels: float | None = None,
+        grayscale: bool = False,
+        format: str = "jpeg", # pylint: disable=redefined-builtin
+        quality: int = 85
+    ):
+        if format not in FORMATS and format != "original":
+            raise ValueError(f"Unsupported image format: {format}")
+
+        self.max_long_edge = max_long_edge
+        self.max_megapixels = max_megapixels
+        self.grayscale = grayscale
+        self.format = format
+        self.quality = quality
+
+    def _scale(self, image: np.ndarray) -> float:
+        """
+        Returns factor (<= 1) which fits the image into the configured budgets
+        """
+        height, width = image.shape[:2]
+        scale = 1.0
+
+        if self.max_long_edge is not None:
+            scale = min(scale, self.max_long_edge / max(height, width))
+
+        if self.max_megapixels is not None:
+            scale = min(scale, (self.max_megapixels * 1_000_000 / (height * width)) ** 0.5)
+
+        return scale
+
+    def encode_bytes(self, path: str) -> tuple[bytes, str]:
+        """
+        Returns encoded image and its mime type
+        """
+        if self.format == "original":
+            with open(path, "rb") as img_file:
+                return img_file.read(), mimetypes.guess_type(path)[0] or "image/png"
+
+        image = cv2.imread(path, cv2.IMREAD_GRAYSCALE if self.grayscale else cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError(f"Bild konnte nicht geladen werden: {path}")
+
+        scale = self._scale(image)
+        if scale < 1.0:
+            height, width = image.shape[:2]
+            image = cv2.resize(image, (max(1, round(width * scale)), max(1, round(height * scale))), interpolation=cv2.INTER_AREA)
+
+        extension, mime_type, quality_flag = FORMATS[self.format]
+        params = [quality_flag, self.quality] if quality_flag is not None else []
+
+        ok, buffer = cv2.imencode(extension, image, params)
+        if not ok:
+            raise ValueError(f"Bild konnte nicht als {self.format} kodiert werden: {path}")
+
+        return buffer.tobytes(), mime_type
+
+    def encode(self, path: str) -> str:
+        """
+        Returns image as base64 data url
+        """
+        start = time.perf_counter()
+        payload, mime_type = self.encode_bytes(path)
+        data_url = f"data:{mime_type};base64,{base64.b64encode(payload).decode('utf-8')}"
+
+        print(
+            f"[ImageEncoder] {mime_type}, {len(data_url) / 1024:.0f} KB "
+            f"(Original {os.path.getsize(path) / 1024:.0f} KB) in {(time.perf_counter() - start) * 1000:.0f} ms"
+        )
+
+        return data_url
@@ -0,0 +1,40 @@
+import unicodedata
+from typing import Iterable
+
+def normalize_word(word: str) -> str:
+    """
+    Composed umlauts (OCR and pdf text may contain a + combining diaeresis) and lower case
+    """
+    return unicodedata.normalize("NFC", word).lower()
+
+class KnownWords:
+    """
+    Frozen set of correctly spelled word forms for a fast membership test.
+    Words are compared normalized, so capitalized nouns and words at the start
+    of a sentence are found in the lower case Schulbuch vocabulary as well
+    """
+    def __init__(self, words: Iterable[str], min_length: int = 4):
+        self.min_length = min_length
+        self.words = frozenset(normalize_word(word) for word in words if len(word) >= min_length)
+
+    @classmethod
+    def from_files(cls, symspell_path: str, word_forms: Iterable[str] = (), min_frequency: int = 5, min_length: int = 4) -> "KnownWords":
+        """
+        Vocabulary of the SymSpell dictionary (term count per line) plus word_forms,
+        e.g. the expanded Hunspell forms. Rare terms are mostly noise and skipped
+        """
+        words = list(word_forms)
+        with open(symspell_path, "r", encoding="utf-8") as dic:
+            for line in dic:
+                parts = line.split()
+                if len(parts) >= 2 and parts[1].isdigit() and int(parts[1]) >= min_frequency:
+                    words.append(parts[0])
+
+        return cls(words, min_length)
+
+    def __contains__(self, word: str) -> bool:
+        # Short words are too often valid OCR confusions (bin/hin), they are left to the language model
+        return len(word) >= self.min_length and normalize_word(word) in self.words
+
+    def __len__(self) -> int:
+        return len(self.words)
@@ -1,31 +1,287 @@
 import os
+import json
+import time
+import random
+import asyncio
+import hashlib
+import threading
+import weakref
+import httpx
 import instructor
-from groq import Groq
-from pydantic import BaseModel
+import groq
+from groq import Groq, AsyncGroq
+from pydantic import BaseModel, ValidationError
+from tenacity import Retrying, AsyncRetrying, stop_after_attempt, retry_if_exception_type
+
+from .sqlite_cache import SqliteCache
+from .rate_limiter import RateLimiter, get_rate_limiter
+
+DEFAULT_MODEL = "meta-llama/llama-4-scout-17b-16e-instruct"
+
+# Rough token estimates for the rate limiter
+CHARS_PER_TOKEN = 4
+IMAGE_TOKENS = 1_500
+COMPLETION_TOKENS = 1_000
 
 class LanguageClient:
     """
     Verwaltet die Kommunikation mit dem Groq-Modell via Instructor für strukturierte Antworten.
+    Mit einem response_cache werden Antworten persistent gespeichert und bei gleicher
+    Anfrage (Modell, Nachrichten, Schema, Temperatur, Seed) ohne Netzwerkaufruf zurückgegeben.
+
+    Alle Anfragen laufen über einen gemeinsamen HTTP-Verbindungspool und den prozessweiten
+    RateLimiter. Bei 429 und Netzwerkfehlern wird mit exponentiellem Backoff (mit Jitter)
+    erneut versucht, ein Retry-After Header wird voll abgewartet. Ist er länger als
+    backoff_max, wird der Fehler direkt weitergereicht.
     """
-    def __init__(self):
+    def __init__(
+        self,
+        model: str = DEFAULT_MODEL,
+        response_cache: SqliteCache | None = None,
+        rate_limiter: RateLimiter | None = None,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        max_connections: int = 10,
+        timeout: float = 120.0,
+    ):
         api_key = os.environ.get("GROQ_API_KEY")
         if not api_key:
             raise EnvironmentError("GROQ_API_KEY not found in environment variables")
 
+        self.model = model
+        self.response_cache = response_cache
+        self.rate_limiter = rate_limiter if rate_limiter is not None else get_rate_limiter()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._api_key = api_key
+        self._limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self._timeout = timeout
+
         # Initialisiere Groq + Instructor Client mit JSON-Modus
+        # Retries are handled here, the Groq SDK must not retry on its own
         self.client = instructor.from_groq(
-            Groq(api_key=api_key),
+            Groq(
+                api_key=api_key,
+                max_retries=0,
+                http_client=httpx.Client(limits=self._limits, timeout=timeout)
+            ),
             mode=instructor.Mode.JSON
         )
 
+        # httpx.AsyncClient is bound to the event loop it was first used in
+        self._async_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._async_lock = threading.Lock()
+
+    def _async_client(self):
+        """
+        Returns async Instructor client of the running event loop
+        """
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            if loop not in self._async_clients:
+                self._async_clients[loop] = instructor.from_groq(
+                    AsyncGroq(
+                        api_key=self._api_key,
+                        max_retries=0,
+                        http_client=httpx.AsyncClient(limits=self._limits, timeout=self._timeout)
+                    ),
+                    mode=instructor.Mode.JSON
+                )
+
+            return self._async_clients[loop]
+
+    def _cache_key(self, messages: list[dict], schema: type[BaseModel], temperature: float, seed: int) -> str:
+        """
+        Key of a request for the response cache
+        """
+        payload = json.dumps({
+            "model": self.model,
+            "messages": messages,
+            "schema": [schema.__name__, schema.model_json_schema()],
+            "temperature": temperature,
+            "seed": seed,
+        }, sort_keys=True, ensure_ascii=False, default=str)
+
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _estimate_tokens(messages: list[dict]) -> int:
+        """
+        Estimates prompt and completion tokens of a request
+        """
+        tokens = COMPLETION_TOKENS
+        for message in messages:
+            content = message.get("content", "")
+            if isinstance(content, str):
+                tokens += len(content) // CHARS_PER_TOKEN
+                continue
+
+            for part in content:
+                if part.get("type") == "image_url":
+                    tokens += IMAGE_TOKENS
+                else:
+                    tokens += len(part.get("text", "")) // CHARS_PER_TOKEN
+
+        return tokens
+
+    @staticmethod
+    def _find_api_error(error: BaseException) -> BaseException | None:
+        """
+        Instructor and tenacity wrap errors of the Groq SDK, search the chain for them
+        """
+        seen = set()
+        while error is not None and id(error) not in seen:
+            seen.add(id(error))
+            if isinstance(error, (groq.APIStatusError, groq.APIConnectionError)):
+                return error
+
+            last_attempt = getattr(error, "last_attempt", None)
+            if last_attempt is not None and last_attempt.failed:
+                error = last_attempt.exception()
+                continue
+
+            error = error.__cause__ or error.__context__
+
+        return None
+
+    def _retry_delay(self, error: BaseException, attempt: int) -> float | None:
+        """
+        Returns seconds to wait before the next attempt, None if error is not retryable
+        """
+        api_error = self._find_api_error(error)
+        if api_error is None or attempt >= self.max_retries:
+            return None
+
+        if isinstance(api_error, groq.APIStatusError):
+            if api_error.status_code != 429 and api_error.status_code < 500:
+                return None
+
+            retry_after = api_error.response.headers.get("retry-after")
+            if retry_after is not None:
+                try:
+                    retry_after = float(retry_after)
+                except ValueError:
+                    retry_after = None
+
+            if retry_after is not None:
+                # Requests before the window ends fail again, give up if it is longer than backoff_max
+                return retry_after if retry_after <= self.backoff_max else None
+
+        delay = min(self.backoff_base * (2 ** attempt), self.backoff_max)
+
+        return delay + random.uniform(0, delay)
+
+    def _request_kwargs(self, messages: list[dict], schema: type[BaseModel], temperature: float, seed: int) -> dict:
+        return {
+            "model": self.model,
+            "messages": messages,
+            "response_model": schema,
+            "temperature": temperature,
+            "seed": seed,
+        }
+
+    def cache_stats(self) -> dict:
+        """
+        Returns hit/miss counters of the response cache
+        """
+        if self.response_cache is None:
+            return {"hits": 0, "misses": 0, "entries": 0}
+
+        return self.response_cache.stats()
+
+    def _cached(self, key: str | None, schema: type[BaseModel]) -> BaseModel | None:
+        if key is None:
+            return None
+
+        cached = self.response_cache.get(key)
+        if cached is None:
+            return None
+
+        return schema.model_validate_json(cached)
+
+    def _store(self, key: str | None, response: BaseModel):
+        if key is not None:
+            self.response_cache.set(key, response.model_dump_json())
+
     def get_response(self, messages: list[dict], schema: type[BaseModel], temperature : float, seed : int = 42) -> BaseModel:
         """
         Führt die Modellabfrage mit Instructor und strukturierter Antwortvalidierung durch.
         """
-        return self.client.chat.completions.create(
-            model="meta-llama/llama-4-scout-17b-16e-instruct",
-            messages=messages,
-            response_model=schema,
-            temperature=temperature,
-            seed=seed
-        )
+        key = self._cache_key(messages, schema, temperature, seed) if self.response_cache is not None else None
+        cached = self._cached(key, schema)
+        if cached is not None:
+            return cached
+
+        tokens = self._estimate_tokens(messages)
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire(tokens)
+            try:
+                response = self.client.chat.completions.create(
+                    **self._request_kwargs(messages, schema, temperature, seed),
+                    # Instructor only reasks on invalid responses, API errors are retried here
+                    max_retries=Retrying(stop=stop_after_attempt(3), retry=retry_if_exception_type(ValidationError), reraise=True)
+                )
+                break
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+
+                print(f"[LanguageClient] Anfrage fehlgeschlagen ({e.__class__.__name__}), neuer Versuch in {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+
+        self._store(key, response)
+
+        return response
+
+    async def aget_response(self, messages: list[dict], schema: type[BaseModel], temperature : float, seed : int = 42) -> BaseModel:
+        """
+        Async Variante von get_response()
+        """
+        key = self._cache_key(messages, schema, temperature, seed) if self.response_cache is not None else None
+        cached = self._cached(key, schema)
+        if cached is not None:
+            return cached
+
+        tokens = self._estimate_tokens(messages)
+        attempt = 0
+        while True:
+            await self.rate_limiter.acquire_async(tokens)
+            try:
+                response = await self._async_client().chat.completions.create(
+                    **self._request_kwargs(messages, schema, temperature, seed),
+                    max_retries=AsyncRetrying(stop=stop_after_attempt(3), retry=retry_if_exception_type(ValidationError), reraise=True)
+                )
+                break
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+
+                print(f"[LanguageClient] Anfrage fehlgeschlagen ({e.__class__.__name__}), neuer Versuch in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+
+        self._store(key, response)
+
+        return response
+
+_client: LanguageClient | None = None
+_client_lock = threading.Lock()
+
+def get_language_client() -> LanguageClient:
+    """
+    Returns the LanguageClient shared by all LLM modules and sessions of this process
+    """
+    global _client # pylint: disable=global-statement
+
+    with _client_lock:
+        if _client is None:
+            _client = LanguageClient(response_cache=SqliteCache(table="llm_responses", ttl_seconds=7 * 24 * 3600))
+
+        return _client
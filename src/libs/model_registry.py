@@ -0,0 +1,206 @@
+import os
+import gc
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable
+import psutil
+
+DEFAULT_BUDGET_MB = 6144
+
+def empty_cuda_cache():
+    """
+    Frees cached cuda memory. Does not import torch, without torch no model is loaded anyway
+    """
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+class _Entry:
+    def __init__(self, model: Any, size_bytes: int):
+        self.model = model
+        self.size_bytes = size_bytes
+        # Modules holding a reference, they are released when the model is evicted
+        self.owners: weakref.WeakSet = weakref.WeakSet()
+
+def estimate_size(model: Any, _depth: int = 0) -> int:
+    """
+    Estimates memory of a loaded model in bytes from its parameters and buffers.
+    Returns 0 if the size can not be derived from the object
+    """
+    if _depth > 3:
+        return 0
+
+    if isinstance(model, (tuple, list)):
+        return sum(estimate_size(m, _depth + 1) for m in model)
+
+    torch = sys.modules.get("torch")
+    if torch is not None and isinstance(model, torch.nn.Module):
+        tensors = list(model.parameters()) + list(model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+
+    # Keras
+    count_params = getattr(model, "count_params", None)
+    if callable(count_params):
+        count = count_params()
+        if isinstance(count, int):
+            return count * 4
+
+    # transformers pipelines and ultralytics YOLO wrap the torch model
+    inner = getattr(model, "model", None)
+    if inner is not None and inner is not model:
+        return estimate_size(inner, _depth + 1)
+
+    return 0
+
+class ModelRegistry:
+    """
+    Process-wide registry of loaded models, shared by all pipelines and Streamlit sessions.
+    Models are loaded lazily on first get(). The estimated memory of all models is kept
+    below budget_mb, least recently used models are evicted first. Owners of an evicted
+    model are closed and load it again on their next warmup.
+    """
+    def __init__(self, budget_mb: float | None = DEFAULT_BUDGET_MB):
+        self.budget_bytes = int(budget_mb * 1024 * 1024) if budget_mb else None
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._in_use: dict[int, int] = {}
+        self._lock = threading.RLock()
+        self.loads = 0
+        self.evictions = 0
+
+    def get(self, key: str, loader: Callable[[], Any], owner: Any = None) -> Any:
+        """
+        Returns model for key, loads it with loader() if it is not registered yet.
+        owner.close() is called when the model gets evicted
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._load(key, loader)
+                self._entries[key] = entry
+                self.loads += 1
+            else:
+                self._entries.move_to_end(key)
+
+            if owner is not None:
+                entry.owners.add(owner)
+
+            self._evict_over_budget(keep=key, requester=owner)
+
+            return entry.model
+
+    def _load(self, key: str, loader: Callable[[], Any]) -> _Entry:
+        rss_before = psutil.Process().memory_info().rss
+        model = loader()
+        rss_delta = psutil.Process().memory_info().rss - rss_before
+
+        # Parameter size when available, resources like dictionaries are measured by the RSS delta
+        size_bytes = estimate_size(model) or max(0, rss_delta)
+        print(f"[ModelRegistry] {key} geladen ({size_bytes / 1024 / 1024:.0f} MB)")
+
+        return _Entry(model, size_bytes)
+
+    @contextmanager
+    def in_use(self, owner: Any):
+        """
+        Models of owner are not evicted while the context is active
+        """
+        with self._lock:
+            self._in_use[id(owner)] = self._in_use.get(id(owner), 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_use[id(owner)] -= 1
+                if self._in_use[id(owner)] == 0:
+                    del self._in_use[id(owner)]
+
+    def _evictable(self, entry: _Entry, requester: Any) -> bool:
+        for owner in entry.owners:
+            if owner is requester or id(owner) in self._in_use:
+                return False
+
+        return True
+
+    def _evict_over_budget(self, keep: str, requester: Any):
+        if self.budget_bytes is None:
+            return
+
+        for key in list(self._entries):
+            if self.size_bytes() <= self.budget_bytes:
+                break
+
+            entry = self._entries[key]
+            if key != keep and self._evictable(entry, requester):
+                self.evict(key)
+
+        if self.size_bytes() > self.budget_bytes:
+            print(f"[ModelRegistry] WARNUNG: Speicherbudget überschritten ({self.size_bytes() / 1024 / 1024:.0f} MB)")
+
+    def evict(self, key: str):
+        """
+        Removes model and closes its owners so the memory can be freed
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return
+
+            self.evictions += 1
+            print(f"[ModelRegistry] {key} entladen ({entry.size_bytes / 1024 / 1024:.0f} MB)")
+
+            for owner in list(entry.owners):
+                owner.close()
+
+        del entry
+        gc.collect()
+        empty_cuda_cache()
+
+    def clear(self):
+        """
+        Evicts all models
+        """
+        for key in list(self._entries):
+            self.evict(key)
+
+    def size_bytes(self) -> int:
+        """
+        Estimated memory of all loaded models
+        """
+        with self._lock:
+            return sum(entry.size_bytes for entry in self._entries.values())
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def stats(self) -> dict:
+        """
+        Returns loaded models with their estimated size in MB (least recently used first)
+        """
+        with self._lock:
+            return {
+                "models": {key: round(entry.size_bytes / 1024 / 1024, 1) for key, entry in self._entries.items()},
+                "size_mb": round(self.size_bytes() / 1024 / 1024, 1),
+                "budget_mb": round(self.budget_bytes / 1024 / 1024, 1) if self.budget_bytes else None,
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
+
+_registry: ModelRegistry | None = None
+_registry_lock = threading.Lock()
+
+def get_model_registry() -> ModelRegistry:
+    """
+    Returns the process-wide model registry.
+    The budget can be configured with MODEL_MEMORY_BUDGET_MB (0 disables eviction)
+    """
+    global _registry # pylint: disable=global-statement
+
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry(budget_mb=float(os.environ.get("MODEL_MEMORY_BUDGET_MB", DEFAULT_BUDGET_MB)))
+
+        return _registry
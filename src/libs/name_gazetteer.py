@@ -0,0 +1,66 @@
+from typing import Iterable
+from jarowinkler import jarowinkler_similarity
+from symspellpy import SymSpell, Verbosity
+
+# Genitive endings, kept when the name before them matches (Tims, Hans')
+INFLECTION_SUFFIXES = ("'s", "’s", "s", "'", "’")
+
+class NameGazetteer:
+    """
+    Fuzzy lookup of the person names of an assignment (e.g. the characters of a story).
+    The names are indexed with SymSpell, so a lookup costs about as much as a dictionary lookup.
+    A match needs at most one edit per 4 characters and a Jaro-Winkler similarity of min_similarity
+    """
+    def __init__(self, names: Iterable[str], max_edit_distance: int = 2, min_similarity: float = 0.8, min_length: int = 3):
+        self.names = {name.lower(): name for name in names}
+        self.max_edit_distance = max_edit_distance
+        self.min_similarity = min_similarity
+        self.min_length = min_length
+
+        self._index = SymSpell(max_dictionary_edit_distance=max_edit_distance)
+        for name in self.names:
+            self._index.create_dictionary_entry(name, 1)
+
+    def match(self, word: str, fuzzy: bool = True) -> str | None:
+        """
+        Returns the name word is a spelling of, None if it is no name of the gazetteer.
+        An inflection suffix is kept (Tims -> Tims). With fuzzy=False only exact names match,
+        e.g. for dictionary words which are no misspelled name (Maria)
+        """
+        if len(word) < self.min_length or not self.names:
+            return None
+
+        splits = [(word, "")] + [
+            (word[:-len(suffix)], suffix) for suffix in INFLECTION_SUFFIXES
+            if word.endswith(suffix) and len(word) - len(suffix) >= self.min_length
+        ]
+
+        for base, suffix in splits:
+            name = self.names.get(base.lower())
+            if name is not None:
+                return name + suffix
+
+        if not fuzzy:
+            return None
+
+        for base, suffix in splits:
+            name = self._fuzzy_match(base)
+            if name is not None:
+                return name + suffix
+
+        return None
+
+    def _fuzzy_match(self, word: str) -> str | None:
+        max_edit_distance = min(self.max_edit_distance, len(word) // 4)
+        if max_edit_distance == 0:
+            return None
+
+        lowered = word.lower()
+        for suggestion in self._index.lookup(lowered, Verbosity.CLOSEST, max_edit_distance=max_edit_distance):
+            if jarowinkler_similarity(lowered, suggestion.term) >= self.min_similarity:
+                return self.names[suggestion.term]
+
+        return None
+
+    def __len__(self) -> int:
+        return len(self.names)
@@ -0,0 +1,206 @@
+import os
+import sys
+import json
+import time
+import cProfile
+import threading
+import itertools
+from contextlib import contextmanager, ExitStack
+from typing import Any, Callable, ContextManager
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+# A hook gets the stage key and run id and returns a context manager wrapped around the stage
+StageHook = Callable[[str, int], ContextManager]
+
+def peak_rss_bytes() -> int:
+    """
+    Peak resident memory of the process so far, 0 if not available
+    """
+    if resource is None:
+        return 0
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def output_size(value: Any) -> int:
+    """
+    Rough size of a stage output in bytes
+    """
+    if value is None:
+        return 0
+
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+
+    if isinstance(value, (str, bytes)):
+        return len(value)
+
+    if isinstance(value, (list, tuple)):
+        return sum(output_size(v) for v in value)
+
+    if isinstance(value, dict):
+        return sum(output_size(v) for v in value.values())
+
+    if hasattr(value, "model_dump_json"):
+        return len(value.model_dump_json())
+
+    return sys.getsizeof(value)
+
+class PipelineProfiler:
+    """
+    Collects wall time, CPU time, peak RSS delta and output size per stage and run.
+    The records can be saved as JSON report or in Chrome trace-event format (chrome://tracing, Perfetto).
+    Hooks are context managers wrapped around a stage, e.g. to attach cProfile to a single stage key.
+    """
+    def __init__(self):
+        self.records: list[dict] = []
+        self.runs: list[dict] = []
+        self.hooks: dict[str, list[StageHook]] = {}
+        self._run_ids = itertools.count()
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def add_hook(self, stage_key: str, hook: StageHook):
+        """
+        Attaches hook to the stage with stage_key, "*" attaches it to all stages
+        """
+        self.hooks.setdefault(stage_key, []).append(hook)
+
+    @contextmanager
+    def run(self, name: str = "run"):
+        """
+        Groups the stages of one pipeline run, yields the run id
+        """
+        run_id = next(self._run_ids)
+        start = time.perf_counter()
+        try:
+            yield run_id
+        finally:
+            with self._lock:
+                self.runs.append({
+                    "run_id": run_id,
+                    "name": name,
+                    "start_s": start - self._origin,
+                    "wall_s": time.perf_counter() - start,
+                    "thread": threading.get_ident(),
+                })
+
+    @contextmanager
+    def stage(self, stage_key: str, run_id: int):
+        """
+        Measures one stage. Yields the record, pass the output to set_output()
+        """
+        record = {"run_id": run_id, "stage": stage_key, "thread": threading.get_ident()}
+
+        with ExitStack() as hooks:
+            for hook in self.hooks.get(stage_key, []) + self.hooks.get("*", []):
+                hooks.enter_context(hook(stage_key, run_id))
+
+            peak_before = peak_rss_bytes()
+            cpu_start = time.process_time()
+            start = time.perf_counter()
+            try:
+                yield record
+            finally:
+                record["start_s"] = start - self._origin
+                record["wall_s"] = time.perf_counter() - start
+                # Process-wide, includes other threads running at the same time
+                record["cpu_s"] = time.process_time() - cpu_start
+                record["peak_rss_delta_bytes"] = peak_rss_bytes() - peak_before
+
+                with self._lock:
+                    self.records.append(record)
+
+    def set_output(self, record: dict, value: Any):
+        """
+        Adds the approximate size of a stage output to its record
+        """
+        record["output_bytes"] = output_size(value)
+
+    def summary(self) -> dict[str, dict]:
+        """
+        Aggregates records per stage
+        """
+        summary: dict[str, dict] = {}
+        with self._lock:
+            for record in self.records:
+                stage = summary.setdefault(record["stage"], {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "max_peak_rss_delta_bytes": 0})
+                stage["calls"] += 1
+                stage["wall_s"] += record["wall_s"]
+                stage["cpu_s"] += record["cpu_s"]
+                stage["max_peak_rss_delta_bytes"] = max(stage["max_peak_rss_delta_bytes"], record["peak_rss_delta_bytes"])
+
+        return summary
+
+    def report(self) -> dict:
+        """
+        Structured run report
+        """
+        with self._lock:
+            runs = list(self.runs)
+            records = list(self.records)
+
+        return {"runs": runs, "stages": records, "summary": self.summary()}
+
+    def save_report(self, path: str):
+        """
+        Writes report() as JSON to path
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+
+        print(f"[Profiler] Report gespeichert in: {path}")
+
+    def chrome_trace(self) -> dict:
+        """
+        Runs and stages as complete events ("ph": "X") of the Chrome trace-event format
+        """
+        pid = os.getpid()
+        events = []
+        with self._lock:
+            for run in self.runs:
+                events.append({
+                    "name": run["name"], "cat": "run", "ph": "X", "pid": pid, "tid": run["thread"],
+                    "ts": run["start_s"] * 1e6, "dur": run["wall_s"] * 1e6, "args": {"run_id": run["run_id"]},
+                })
+
+            for record in self.records:
+                events.append({
+                    "name": record["stage"], "cat": "stage", "ph": "X", "pid": pid, "tid": record["thread"],
+                    "ts": record["start_s"] * 1e6, "dur": record["wall_s"] * 1e6,
+                    "args": {k: v for k, v in record.items() if k not in ("stage", "thread", "start_s", "wall_s")},
+                })
+
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save_chrome_trace(self, path: str):
+        """
+        Writes chrome_trace() to path, open it in chrome://tracing or Perfetto
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f)
+
+        print(f"[Profiler] Chrome Trace gespeichert in: {path}")
+
+def cprofile_hook(output_dir: str) -> StageHook:
+    """
+    Hook which runs cProfile around a stage and dumps the stats to <output_dir>/<stage>_<run>.prof
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    @contextmanager
+    def hook(stage_key: str, run_id: int):
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(os.path.join(output_dir, f"{stage_key}_{run_id}.prof"))
+
+    return hook
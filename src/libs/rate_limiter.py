@@ -0,0 +1,82 @@
+import os
+import time
+import asyncio
+import threading
+
+class TokenBucket:
+    """
+    Thread-safe token bucket which refills rate_per_minute tokens per minute up to capacity.
+    reserve() takes the tokens immediately, the bucket may go negative.
+    The returned delay tells the caller how long to wait until the reservation is covered.
+    """
+    def __init__(self, rate_per_minute: float, capacity: float | None = None):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """
+        Takes amount tokens and returns the seconds to wait before using them
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second)
+            self.updated_at = now
+
+            # Requests larger than the bucket would never fit, cap them at the capacity
+            self.tokens -= min(amount, self.capacity)
+            if self.tokens >= 0:
+                return 0.0
+
+            return -self.tokens / self.rate_per_second
+
+class RateLimiter:
+    """
+    Limits requests and tokens per minute
+    """
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    def reserve(self, tokens: float) -> float:
+        """
+        Reserves one request with the estimated amount of tokens, returns seconds to wait
+        """
+        return max(self.requests.reserve(1), self.tokens.reserve(tokens))
+
+    def acquire(self, tokens: float):
+        """
+        Blocks until the request may be sent
+        """
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, tokens: float):
+        """
+        Waits without blocking the event loop until the request may be sent
+        """
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+_limiter: RateLimiter | None = None
+_limiter_lock = threading.Lock()
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Returns the process-wide rate limiter.
+    Limits can be configured with GROQ_REQUESTS_PER_MINUTE and GROQ_TOKENS_PER_MINUTE
+    """
+    global _limiter # pylint: disable=global-statement
+
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter(
+                requests_per_minute=float(os.environ.get("GROQ_REQUESTS_PER_MINUTE", 30)),
+                tokens_per_minute=float(os.environ.get("GROQ_TOKENS_PER_MINUTE", 30_000)),
+            )
+
+        return _limiter
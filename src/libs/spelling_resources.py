@@ -0,0 +1,353 @@
+"""
+Kompiliert die Wörterbücher des TextCorrectors in binäre Artefakte, die beim Warmup
+ohne erneutes Parsen geladen werden.
+
+Aufruf aus dem Repo-Root (einmalig bzw. nach jeder Änderung der Wörterbücher):
+    python src/libs/spelling_resources.py
+"""
+import os
+import gc
+import sys
+import json
+import time
+import pickle
+import hashlib
+import argparse
+from contextlib import contextmanager
+from typing import Any, Callable
+
+SYMSPELL_PATH = os.path.join("models", "symspell", "de-100k_schulbuch.txt")
+HUNSPELL_PATH = os.path.join("models", "hunspell", "de_DE_frami")
+COMPILED_DIR = os.path.join("models", "compiled")
+MAX_EDIT_DISTANCE = 4
+
+# Increase when the layout of an artifact changes, older artifacts are then ignored
+FORMAT_VERSION = 2
+
+MANIFEST = "manifest.json"
+SYMSPELL_ARTIFACT = "symspell.pkl"
+HUNSPELL_ARTIFACT = "hunspell.pkl"
+WORD_FORMS_ARTIFACT = "word_forms.pkl"
+FREQUENCY_ARTIFACT = "frequency.json.gz"
+
+def _sha256(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+
+    return sha.hexdigest()
+
+def _sources(symspell_path: str, hunspell_path: str) -> dict[str, str]:
+    return {
+        "symspell": symspell_path,
+        "hunspell_aff": hunspell_path + ".aff",
+        "hunspell_dic": hunspell_path + ".dic",
+    }
+
+def source_hashes(symspell_path: str = SYMSPELL_PATH, hunspell_path: str = HUNSPELL_PATH) -> dict[str, str | None]:
+    """
+    sha256 per dictionary source, None for a missing file
+    """
+    return {
+        name: _sha256(path) if os.path.exists(path) else None
+        for name, path in _sources(symspell_path, hunspell_path).items()
+    }
+
+def build_symspell(symspell_path: str = SYMSPELL_PATH, max_edit_distance: int = MAX_EDIT_DISTANCE):
+    """
+    Parses the Schulbuch frequency list into a SymSpell index
+    """
+    # pylint: disable=import-outside-toplevel
+    from symspellpy import SymSpell
+
+    symspell = SymSpell(max_dictionary_edit_distance=max_edit_distance)
+    symspell.load_dictionary(symspell_path, 0, 1)
+
+    return symspell
+
+def build_hunspell(hunspell_path: str = HUNSPELL_PATH):
+    """
+    Parses the .aff and .dic files of hunspell_path into a spylls Dictionary
+    """
+    # pylint: disable=import-outside-toplevel
+    from spylls.hunspell import Dictionary
+
+    return Dictionary.from_files(hunspell_path)
+
+def build_checker(symspell_path: str = SYMSPELL_PATH):
+    """
+    German frequency list of pyspellchecker extended by all words of the Schulbuch dictionary
+    """
+    # pylint: disable=import-outside-toplevel
+    from spellchecker import SpellChecker
+
+    spellchecker_words = []
+    with open(symspell_path, "r", encoding="utf-8") as dic:
+        for line in dic:
+            parts = line.strip().split()
+            if len(parts) >= 2:
+                spellchecker_words.append(parts[0])
+
+    checker = SpellChecker(language="de")
+    # Here load dictionary of all words from Schulbuch
+    checker.word_frequency.load_words(spellchecker_words)
+
+    return checker
+
+def expand_word_forms(dictionary) -> frozenset[str]:
+    """
+    Expands the stems of a spylls Dictionary with their prefix and suffix rules
+    into a flat set of word forms. Compound words and affixes that are only valid
+    inside compounds are not generated
+    """
+    aff = dictionary.aff
+    skip_flags = {flag for flag in (aff.FORBIDDENWORD, aff.ONLYINCOMPOUND) if flag}
+    # Affixes carrying these flags only form compound parts or need a second affix (e.g. SFX g innen/xyoc)
+    skip_affix_flags = {
+        flag for flag in (
+            aff.FORBIDDENWORD, aff.ONLYINCOMPOUND, aff.NEEDAFFIX, aff.CIRCUMFIX,
+            aff.COMPOUNDBEGIN, aff.COMPOUNDMIDDLE, aff.COMPOUNDEND,
+        ) if flag
+    }
+
+    def with_suffixes(stem: str, flags: set[str], crossproduct_only: bool) -> list[str]:
+        forms = []
+        for flag in flags:
+            for suffix in aff.SFX.get(flag, []):
+                if (crossproduct_only and not suffix.crossproduct) or suffix.flags & skip_affix_flags:
+                    continue
+
+                if stem.endswith(suffix.strip) and suffix.cond_regexp.search(stem):
+                    forms.append(stem[:len(stem) - len(suffix.strip)] + suffix.add)
+
+        return forms
+
+    forms = set()
+    for word in dictionary.dic.words:
+        if word.flags & skip_flags:
+            continue
+
+        if not aff.NEEDAFFIX or aff.NEEDAFFIX not in word.flags:
+            forms.add(word.stem)
+
+        forms.update(with_suffixes(word.stem, word.flags, crossproduct_only=False))
+
+        for flag in word.flags:
+            for prefix in aff.PFX.get(flag, []):
+                if prefix.flags & skip_affix_flags:
+                    continue
+
+                if not (word.stem.startswith(prefix.strip) and prefix.cond_regexp.search(word.stem)):
+                    continue
+
+                prefixed = prefix.add + word.stem[len(prefix.strip):]
+                forms.add(prefixed)
+                if prefix.crossproduct:
+                    forms.update(with_suffixes(prefixed, word.flags, crossproduct_only=True))
+
+    return frozenset(form for form in forms if form)
+
+def compile_resources(
+    output_dir: str = COMPILED_DIR,
+    symspell_path: str = SYMSPELL_PATH,
+    hunspell_path: str = HUNSPELL_PATH,
+    max_edit_distance: int = MAX_EDIT_DISTANCE,
+) -> dict:
+    """
+    Builds all artifacts and writes the manifest with the hashes of the sources
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    symspell = build_symspell(symspell_path, max_edit_distance)
+    # Uncompressed, loading must be fast
+    symspell.save_pickle(os.path.join(output_dir, SYMSPELL_ARTIFACT), compressed=False)
+    print(f"[SpellingResources] SymSpell kompiliert ({time.perf_counter() - start:.1f}s)")
+
+    start = time.perf_counter()
+    dictionary = build_hunspell(hunspell_path)
+    with open(os.path.join(output_dir, HUNSPELL_ARTIFACT), "wb") as f:
+        pickle.dump(dictionary, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    word_forms = expand_word_forms(dictionary)
+    with open(os.path.join(output_dir, WORD_FORMS_ARTIFACT), "wb") as f:
+        pickle.dump(word_forms, f, protocol=pickle.HIGHEST_PROTOCOL)
+    print(f"[SpellingResources] Hunspell kompiliert, {len(word_forms)} Wortformen ({time.perf_counter() - start:.1f}s)")
+
+    start = time.perf_counter()
+    build_checker(symspell_path).export(os.path.join(output_dir, FREQUENCY_ARTIFACT), gzipped=True)
+    print(f"[SpellingResources] Frequenzliste kompiliert ({time.perf_counter() - start:.1f}s)")
+
+    manifest = {
+        "version": FORMAT_VERSION,
+        "max_edit_distance": max_edit_distance,
+        "sources": source_hashes(symspell_path, hunspell_path),
+    }
+    with open(os.path.join(output_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest
+
+def is_compiled(
+    output_dir: str = COMPILED_DIR,
+    symspell_path: str = SYMSPELL_PATH,
+    hunspell_path: str = HUNSPELL_PATH,
+    max_edit_distance: int = MAX_EDIT_DISTANCE,
+    hashes: dict[str, str | None] | None = None,
+) -> bool:
+    """
+    True if the artifacts in output_dir were compiled from the current sources.
+    hashes are the source_hashes() if already known
+    """
+    try:
+        with open(os.path.join(output_dir, MANIFEST), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return False
+
+    if manifest.get("version") != FORMAT_VERSION or manifest.get("max_edit_distance") != max_edit_distance:
+        return False
+
+    if hashes is None:
+        hashes = source_hashes(symspell_path, hunspell_path)
+
+    return all(sha is not None and manifest["sources"].get(name) == sha for name, sha in hashes.items())
+
+@contextmanager
+def _gc_paused():
+    """
+    Unpickling millions of small objects triggers the cyclic GC over and over, pausing it halves the loading time
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+def _unpickle(path: str) -> Any:
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+class SpellingResources:
+    """
+    Loads the dictionaries of the TextCorrector. Compiled artifacts are used when they
+    match the sources, otherwise the sources are parsed (slow, see compile_resources)
+    """
+    def __init__(
+        self,
+        compiled_dir: str = COMPILED_DIR,
+        symspell_path: str = SYMSPELL_PATH,
+        hunspell_path: str = HUNSPELL_PATH,
+        max_edit_distance: int = MAX_EDIT_DISTANCE,
+    ):
+        self.compiled_dir = compiled_dir
+        self.symspell_path = symspell_path
+        self.hunspell_path = hunspell_path
+        self.max_edit_distance = max_edit_distance
+        self._compiled: bool | None = None
+        self._hashes: dict[str, str | None] | None = None
+
+    @property
+    def hashes(self) -> dict[str, str | None]:
+        """
+        source_hashes() of the dictionaries, hashing the sources once per instance is enough
+        """
+        if self._hashes is None:
+            self._hashes = source_hashes(self.symspell_path, self.hunspell_path)
+
+        return self._hashes
+
+    def fingerprint(self) -> str:
+        """
+        Identifies the content of the dictionaries, e.g. in keys of persistent caches
+        """
+        return ":".join(f"{name}={sha}" for name, sha in sorted(self.hashes.items()))
+
+    @property
+    def compiled(self) -> bool:
+        """
+        True if the artifacts match the sources, checked once per instance
+        """
+        if self._compiled is None:
+            self._compiled = is_compiled(self.compiled_dir, self.symspell_path, self.hunspell_path, self.max_edit_distance, self.hashes)
+            if not self._compiled:
+                print("[SpellingResources] Keine aktuellen kompilierten Wörterbücher, lade Quellen. "
+                      "Kompilieren mit: python src/libs/spelling_resources.py")
+
+        return self._compiled
+
+    def _load(self, artifact: str, from_artifact: Callable[[str], Any], from_source: Callable[[], Any]) -> Any:
+        if self.compiled:
+            start = time.perf_counter()
+            with _gc_paused():
+                resource = from_artifact(os.path.join(self.compiled_dir, artifact))
+            print(f"[SpellingResources] {artifact} geladen ({time.perf_counter() - start:.2f}s)")
+
+            return resource
+
+        return from_source()
+
+    def symspell(self):
+        """
+        SymSpell index with max_edit_distance
+        """
+        def from_artifact(path: str):
+            # pylint: disable=import-outside-toplevel
+            from symspellpy import SymSpell
+
+            symspell = SymSpell(max_dictionary_edit_distance=self.max_edit_distance)
+            symspell.load_pickle(path, compressed=False)
+
+            return symspell
+
+        return self._load(SYMSPELL_ARTIFACT, from_artifact, lambda: build_symspell(self.symspell_path, self.max_edit_distance))
+
+    def hunspell(self):
+        """
+        spylls Hunspell Dictionary
+        """
+        return self._load(HUNSPELL_ARTIFACT, _unpickle, lambda: build_hunspell(self.hunspell_path))
+
+    def checker(self):
+        """
+        pyspellchecker with the merged frequency list, see build_checker
+        """
+        def from_artifact(path: str):
+            # pylint: disable=import-outside-toplevel
+            from spellchecker import SpellChecker
+
+            return SpellChecker(language=None, local_dictionary=path)
+
+        return self._load(FREQUENCY_ARTIFACT, from_artifact, lambda: build_checker(self.symspell_path))
+
+    def word_forms(self, dictionary=None) -> frozenset[str]:
+        """
+        Expanded Hunspell word forms. Without artifacts they are expanded from dictionary,
+        if the Hunspell dictionary is already loaded, instead of parsing it again
+        """
+        def from_source():
+            return expand_word_forms(dictionary if dictionary is not None else build_hunspell(self.hunspell_path))
+
+        return self._load(WORD_FORMS_ARTIFACT, _unpickle, from_source)
+
+def main():
+    """
+    Compiles the artifacts, paths can be overridden on the command line
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output-dir", default=COMPILED_DIR)
+    parser.add_argument("--symspell", default=SYMSPELL_PATH)
+    parser.add_argument("--hunspell", default=HUNSPELL_PATH, help="Pfad ohne .aff/.dic Endung")
+    parser.add_argument("--max-edit-distance", type=int, default=MAX_EDIT_DISTANCE)
+    args = parser.parse_args()
+
+    manifest = compile_resources(args.output_dir, args.symspell, args.hunspell, args.max_edit_distance)
+    print(json.dumps(manifest, indent=2))
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
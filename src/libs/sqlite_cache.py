@@ -0,0 +1,115 @@
+import os
+import time
+import sqlite3
+import threading
+
+DEFAULT_CACHE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data", "cache", "cache.sqlite"))
+
+class SqliteCache:
+    """
+    Persistent key-value cache on top of SQLite.
+    Entries expire after ttl_seconds, beyond max_entries the least recently used entries are removed.
+    Eviction runs in batches once the table holds max_entries * (1 + evict_slack) entries,
+    so a write to a large table does not scan it every time.
+    Can be shared between threads.
+    """
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, table: str = "cache", ttl_seconds: float | None = None,
+                 max_entries: int | None = 10_000, evict_slack: float = 0.0):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name: {table}")
+
+        self.path = path
+        self.table = table
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.evict_slack = evict_slack
+        self.hits = 0
+        self.misses = 0
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_accessed ON {self.table} (accessed_at)")
+            # Upper bound of the entries, replaced keys are counted twice until the next eviction
+            self._size = self._count()
+
+    def get(self, key: str) -> str | None:
+        """
+        Returns cached value or None for a miss or an expired entry
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+
+            if row is not None and self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                row = None
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+
+            return row[0]
+
+    def set(self, key: str, value: str):
+        """
+        Stores value, evicts expired and least recently used entries when the table is full
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            self._size += 1
+
+            if self.max_entries is not None and self._size > self.max_entries * (1 + self.evict_slack):
+                self._evict(now)
+
+    def _evict(self, now: float):
+        """
+        Removes expired entries and the least recently used entries beyond max_entries. Expects the lock to be held
+        """
+        if self.ttl_seconds is not None:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE created_at < ?", (now - self.ttl_seconds,))
+
+        excess = self._count() - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN "
+                f"(SELECT key FROM {self.table} ORDER BY accessed_at ASC LIMIT ?)",
+                (excess,)
+            )
+
+        self._size = self._count()
+
+    def _count(self) -> int:
+        return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def clear(self):
+        """
+        Removes all entries
+        """
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._size = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._count()
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters and current size
+        """
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self)}
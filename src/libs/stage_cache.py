@@ -0,0 +1,126 @@
+import os
+import json
+import pickle
+import hashlib
+import tempfile
+import typing
+import numpy as np
+
+DEFAULT_CACHE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data", "cache", "stages"))
+
+def digest(value: typing.Any) -> str:
+    """
+    Returns a sha256 hex digest of a stage input (numpy image, string or picklable object)
+    """
+    h = hashlib.sha256()
+    if isinstance(value, np.ndarray):
+        h.update(str((value.shape, value.dtype.str)).encode("utf-8"))
+        h.update(np.ascontiguousarray(value).data)
+    elif isinstance(value, bytes):
+        h.update(value)
+    elif isinstance(value, str):
+        h.update(value.encode("utf-8"))
+    else:
+        h.update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+    return h.hexdigest()
+
+class StageCache:
+    """
+    Content-addressed on-disk cache for outputs of pipeline stages.
+    Keys are built from the hash of the input image and the parameters of the stages.
+    The least recently used entries are evicted once max_size_mb is exceeded.
+    """
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_size_mb: float = 2048):
+        self.cache_dir = cache_dir
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(*parts: str) -> str:
+        """
+        Combines parts into a single cache key
+        """
+        return digest(json.dumps(parts))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def contains(self, key: str) -> bool:
+        """
+        Checks if an entry exists without loading it
+        """
+        return os.path.exists(self._path(key))
+
+    def get(self, key: str) -> tuple[bool, typing.Any]:
+        """
+        Returns (True, value) for a hit, (False, None) otherwise
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            self.misses += 1
+            return False, None
+
+        # mtime is used as last access for the LRU eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        self.hits += 1
+        return True, value
+
+    def set(self, key: str, value: typing.Any):
+        """
+        Stores value atomically and evicts old entries if needed
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self._evict()
+
+    def clear(self):
+        """
+        Removes all entries
+        """
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".pkl"):
+                os.remove(entry.path)
+
+    def size_bytes(self) -> int:
+        """
+        Current size of all entries
+        """
+        return sum(entry.stat().st_size for entry in os.scandir(self.cache_dir) if entry.name.endswith(".pkl"))
+
+    def _evict(self):
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".pkl"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size_bytes:
+                break
+
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+
+            total -= size
@@ -14,7 +14,7 @@ pipeline.add_stage(RedRemover(debug=True))
 pipeline.add_stage(HorizontalCutterLineDetect(debug=True))
 pipeline.add_stage(StrikeThroughCleaner(debug=True))
 ## pipeline.add_stage(LineDenoiser(debug=True)) WARNING: Don't use currently. Model needs to be adapted for varying image sizes
-pipeline.add_stage(LineCropper(debug=True))
+pipeline.add_stage(LineCropper(source_key='strike-through-cleaner', debug=True))
 pipeline.add_stage(LinePrepareRecognizer(debug=True))
 pipeline.add_stage(TextRecognizer(debug=True))
 pipeline.add_stage(TextCorrector(debug=True))
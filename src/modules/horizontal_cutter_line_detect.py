@@ -13,6 +13,8 @@ class HorizontalCutterLineDetect(Module):
     3. Zeichnet Linien und schneidet am Originalbild
     Bei Debug aktiviert, wird ein Debug-Bild mit Schnittlinien gespeichert.
     """
+    cacheable = True
+
     def __init__(
         self,
         combine_amount_of_lines: int = 1,
@@ -48,7 +50,7 @@ class HorizontalCutterLineDetect(Module):
             os.makedirs(self.debug_folder, exist_ok=True)
 
     def get_preconditions(self) -> list[str]:
-        return ['input']
+        return ['red-remover']
 
     def _remove_gray(self, img: np.ndarray) -> np.ndarray:
         """
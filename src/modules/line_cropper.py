@@ -9,10 +9,14 @@ class LineCropper(Module):
     indem die Konturen (z.B. des Textes) ermittelt werden.
     Optional wird ein Debug-Bild (mit eingezeichneten Konturen und 
     Bounding-Box) gespeichert.
+    Mit source_key wird die Stage gewählt, deren Ausschnitte zugeschnitten werden.
     """
-    def __init__(self, padding=10, h_desired = 128, debug=False, debug_folder="debug/debug_linecropper"):
+    streamable = True
+
+    def __init__(self, padding=10, h_desired = 128, source_key='horizontal-cutter', debug=False, debug_folder="debug/debug_linecropper"):
         super().__init__("line-cropper")
 
+        self.source_key = source_key
         self.h_desired = h_desired
         self.padding = padding
         self.debug = debug
@@ -21,13 +25,20 @@ class LineCropper(Module):
             os.makedirs(self.debug_folder, exist_ok=True)
 
     def get_preconditions(self) -> list[str]:
-        return ['horizontal-cutter']
+        return [self.source_key]
 
     def process(self, data: dict) -> list:
-        sections: list = data.get('horizontal-cutter', [])
+        sections: list = data.get(self.source_key, [])
+
+        # Sections without content are dropped
+        return [img for img in self.process_batch(sections, 0) if img is not None]
 
+    def process_batch(self, items: list, start_idx: int) -> list:
+        """
+        Crops a chunk of sections to their text, None for sections without text, start_idx is the position of items[0] in the whole list
+        """
         cropped_images = []
-        for idx, img in enumerate(sections):
+        for idx, img in enumerate(items, start=start_idx):
             gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
             _, thresh = cv2.threshold(gray, 180, 255, cv2.THRESH_BINARY_INV)
             kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
@@ -36,6 +47,7 @@ class LineCropper(Module):
 
             if len(contours) == 0:
                 print(f"[LineCropper] Keine Konturen gefunden in Abschnitt {idx}")
+                cropped_images.append(None)
                 continue
 
             all_contours = np.vstack(contours)
@@ -5,8 +5,11 @@ import cv2
 import numpy as np
 import tensorflow
 from tensorflow.keras import models
+from libs.model_registry import get_model_registry
 from .module_base import Module
 
+MODEL_PATH = "models/denoise/model.keras"
+
 def weighted_mse(y_true, y_pred):
     img_height, img_width = y_true.shape[1], y_true.shape[2]
     
@@ -35,14 +38,28 @@ class LineDenoiser(Module):
         
         self.debug = debug
         self.debug_folder = debug_folder
+        self.model = None
         if self.debug:
             os.makedirs(self.debug_folder, exist_ok=True)
 
+    def _warmup(self):
+        self.model = get_model_registry().get(
+            f"keras:{MODEL_PATH}",
+            lambda: models.load_model(MODEL_PATH, custom_objects={"weighted_mse": weighted_mse}),
+            owner=self
+        )
+
+    def _release(self):
+        self.model = None
+
     def get_preconditions(self) -> list[str]:
         return ['strike-through-cleaner']
     
     def process(self, data: dict) -> list:
-        model = models.load_model("models/denoise/model.keras", custom_objects={"weighted_mse": weighted_mse})
+        if self.model is None:
+            raise Exception('Missing warmup phase')
+
+        model = self.model
     
         sections: list = data.get('strike-through-cleaner', [])
 
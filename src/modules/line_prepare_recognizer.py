@@ -9,6 +9,8 @@ class LinePrepareRecognizer(Module):
     Prepares a line image for the text recognizer
     Currently only converts color into a blue text color
     """
+    streamable = True
+
     def __init__(self, debug=False, debug_folder="debug/debug_lineprepared"):
         super().__init__("line-prepared")
         
@@ -65,8 +67,14 @@ class LinePrepareRecognizer(Module):
     def process(self, data: dict) -> list:
         images: list = data.get('line-cropper', [])
 
+        return self.process_batch(images, 0)
+
+    def process_batch(self, items: list, start_idx: int) -> list:
+        """
+        Prepares a chunk of line images for the recognizer, start_idx is the position of items[0] in the whole list
+        """
         cropped_images = []
-        for idx, img in enumerate(images):
+        for idx, img in enumerate(items, start=start_idx):
             image = Image.fromarray(img, 'RGB')
             gray = ImageOps.grayscale(image)
             enhanced = ImageOps.autocontrast(gray)
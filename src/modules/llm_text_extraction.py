@@ -1,10 +1,6 @@
 import os
 import json
 
-# instructor + Groq
-import instructor
-from groq import Groq
-
 from pydantic import ValidationError
 from models.parser.extraction_result import ExtractionResult
 from libs.language_client import LanguageClient
@@ -13,7 +9,7 @@ from .llm_module_base import LLMModule
 class LLMExtraction(LLMModule):
     """
     LLM-Modul zur Extraktion der Aspekt-Bewertung aus Schüleraufsätzen.
-    Jetzt über Instructor API mit Groq.
+    Jetzt über Instructor API mit Groq, die Anfragen laufen über den gemeinsamen LanguageClient.
     """
 
     def __init__(self, language_client: LanguageClient, debug=False, debug_folder="debug/debug_llm_extraction"):
@@ -25,12 +21,6 @@ class LLMExtraction(LLMModule):
         if self.debug:
             os.makedirs(self.debug_folder, exist_ok=True)
 
-        # Initialisiere Groq + Instructor Client
-        self.client = instructor.from_groq(
-            Groq(api_key=os.environ.get("GROQ_API_KEY")),
-            mode=instructor.Mode.JSON
-        )
-
     def get_preconditions(self) -> list[str]:
         return []
 
@@ -54,9 +44,9 @@ class LLMExtraction(LLMModule):
         {self.schema_json}
         """
 
-    def process(self, data: dict, _ = None) -> ExtractionResult:
+    def _build_messages(self, data: dict) -> list[dict]:
         """
-        Führt die Extraktion via Instructor-Groq durch und validiert gegen das ExtractionResult-Modell.
+        Builds few-shot prompt for the extraction
         """
         few_shot_student = """
 Bitte analysiere den folgenden Schüleraufsatz im Vergleich zur Musterlösung und gib für jede Teilaufgabe an, welche Aspekte vom Schüler korrekt wiedergegeben wurden. 
@@ -132,24 +122,50 @@ Diskrepanz: Wenn Realselbst und Ideal-Selbst nicht übereinstimmen.
                             }
                         ]
 
+        return messages
+
+    def _handle_error(self, e: Exception):
+        """
+        Logs failed extraction and writes debug output
+        """
+        if isinstance(e, ValidationError):
+            print("JSON konnte nicht validiert werden:", e)
+            if self.debug:
+                with open(os.path.join(self.debug_folder, "validation_error.json"), "w", encoding="utf-8") as f:
+                    f.write(e.json(indent=2))
+            return
+
+        print("Fehler beim Verarbeiten der LLM-Antwort:", str(e))
+        if self.debug:
+            with open(os.path.join(self.debug_folder, "llm_response_failed.txt"), "w", encoding="utf-8") as f:
+                f.write(str(e))
+
+    def process(self, data: dict, _ = None) -> ExtractionResult:
+        """
+        Führt die Extraktion via Instructor-Groq durch und validiert gegen das ExtractionResult-Modell.
+        """
         try:
             return self.language_client.get_response(
-                messages=messages,
+                messages=self._build_messages(data),
                 schema=ExtractionResult,
                 temperature=0.0,
                 seed = 42
             )
+        except Exception as e:
+            self._handle_error(e)
+            raise e
 
-        except ValidationError as ve:
-            print("JSON konnte nicht validiert werden:", ve)
-            if self.debug:
-                with open(os.path.join(self.debug_folder, "validation_error.json"), "w", encoding="utf-8") as f:
-                    f.write(ve.json(indent=2))
-            raise ve
-
+    async def aprocess(self, data: dict, _ = None) -> ExtractionResult:
+        """
+        Async Variante von process()
+        """
+        try:
+            return await self.language_client.aget_response(
+                messages=self._build_messages(data),
+                schema=ExtractionResult,
+                temperature=0.0,
+                seed = 42
+            )
         except Exception as e:
-            print("Fehler beim Verarbeiten der LLM-Antwort:", str(e))
-            if self.debug:
-                with open(os.path.join(self.debug_folder, "llm_response_failed.txt"), "w", encoding="utf-8") as f:
-                    f.write(str(e))
+            self._handle_error(e)
             raise e
@@ -1,23 +1,91 @@
 import typing
 
 class Module:
-    """ 
+    """
     Base Module Interface
     """
     module_key=None
-    
+    # Output may be stored in the StageCache of a pipeline
+    cacheable=False
+    # Attributes which do not influence the output of the Module
+    cache_ignore=('debug', 'debug_folder', 'is_warm', 'device', 'stream_batch_size')
+    # Module works line by line and implements process_batch(items, start_idx), see Pipeline scheduler="streaming".
+    # start_idx is the position of the first item in the whole list, one output per item, None drops the item
+    streamable=False
+    stream_batch_size=1
+
     def __init__(self, module_key = None):
         if not module_key:
             raise Exception("Please declare a module key")
-        
+
         self.module_key = module_key
+        self.is_warm = False
+
+    def __getstate__(self):
+        # Warm modules are pickled cold, e.g. for process pools. Workers load their own models
+        if not getattr(self, 'is_warm', False):
+            return self.__dict__
+
+        clone = object.__new__(type(self))
+        clone.__dict__.update(self.__dict__)
+        clone._release()
+        clone.is_warm = False
+
+        return clone.__dict__
 
     def get_preconditions(self) -> list[str]:
         """
         Returns preconditions of current Module
         """
         raise Exception("Please define get_preconditions")
-    
+
+    def get_cache_params(self) -> dict:
+        """
+        Returns constructor parameters and model identity which influence the output.
+        Loaded models are no plain values and None marks a resource which is not loaded yet,
+        so both are skipped
+        """
+        return {
+            k: v for k, v in sorted(vars(self).items())
+            if k not in self.cache_ignore and isinstance(v, (str, int, float, bool, tuple))
+        }
+
+    def _warmup(self):
+        """
+        Loads models and resources of current Module. Override if needed
+        """
+
+    def _release(self):
+        """
+        Frees models and resources of current Module. Override if needed
+        """
+
+    def warmup(self):
+        """
+        Loads models and resources once. Further calls are a no-op while the Module is warm
+        """
+        if self.is_warm:
+            return
+
+        self._warmup()
+        self.is_warm = True
+
+    def close(self):
+        """
+        Frees models and resources, next warmup() will load them again
+        """
+        if not self.is_warm:
+            return
+
+        self._release()
+        self.is_warm = False
+
+    def stream_input_key(self) -> str:
+        """
+        Key of the list a streamable Module processes item by item
+        """
+        return self.get_preconditions()[0]
+
     def process(self, data: dict) -> typing.Any:
         """
         Executes current Module
@@ -10,6 +10,8 @@ class RedRemover(Module):
     (mit optionaler Dominanz und Schwelle), werden aufgefüllt.
     Optional kann ein Debug-Bild gespeichert werden.
     """
+    cacheable = True
+
     def __init__(self,
                  thr: int = 0,
                  dom: int = 0,
@@ -1,18 +1,52 @@
 import os
 import cv2
+import numpy as np
 from ultralytics import YOLO
+from libs.model_registry import get_model_registry
 from .module_base import Module
 
 class StrikeThroughCleaner(Module):
     """
     Entfernt in jedem Bildausschnitt den durchgestrichene Stellen.
     Optional wird ein Debug-Bild (mit eingezeichneter Bounding-Box) gespeichert.
+
+    Modi der Erkennung:
+    - "batch": Ausschnitte werden in Batches von batch_size an YOLO übergeben (Standard)
+    - "page": Ausschnitte werden untereinander zu Stapeln zusammengesetzt, die höchstens so hoch wie
+      breit sind, und in Batches erkannt. YOLO skaliert nach der längeren Seite, ein Ausschnitt wird
+      so nicht stärker verkleinert als im "batch" Modus. Die Boxen werden anhand der y-Offsets
+      auf die Ausschnitte verteilt
+    - "single": jeder Ausschnitt einzeln
+
+    Backends:
+    - "torch": PyTorch Gewichte (best.pt)
+    - "onnx": nach ONNX exportiertes Modell, ausgeführt mit ONNX Runtime
+    - "onnx-int8": wie "onnx", Gewichte dynamisch auf INT8 quantisiert
+    Exportierte Modelle werden neben den Gewichten abgelegt und wiederverwendet.
     """
-    def __init__(self, debug=False, debug_folder="debug/debug_strikethrough_cleaner", model_path="models/strikethrough/best.pt"):
+    cache_ignore = Module.cache_ignore + ('batch_size',)
+    streamable = True
+
+    MODES = ("batch", "page", "single")
+    BACKENDS = ("torch", "onnx", "onnx-int8")
+
+    def __init__(self, debug=False, debug_folder="debug/debug_strikethrough_cleaner", model_path="models/strikethrough/best.pt",
+                 mode: str = "batch", batch_size: int = 16, backend: str = "torch"):
         super().__init__("strike-through-cleaner")
-        
+
+        if mode not in self.MODES:
+            raise ValueError(f"Unbekannter Modus: {mode}")
+
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unbekanntes Backend: {backend}")
+
         self.confidence_threshold = 0.3
-        self.model = YOLO(model_path)
+        self.model_path = model_path
+        self.backend = backend
+        self.model = None
+        self.mode = mode
+        self.batch_size = batch_size
+        self.stream_batch_size = batch_size
         self.debug = debug
         self.debug_folder = debug_folder
         if self.debug:
@@ -20,16 +54,137 @@ class StrikeThroughCleaner(Module):
 
     def get_preconditions(self) -> list[str]:
         return ['horizontal-cutter']
-    
+
+    def _warmup(self):
+        self.model = get_model_registry().get(f"yolo:{self.model_path}:{self.backend}", self._load_model, owner=self)
+
+    def _release(self):
+        self.model = None
+
+    def _load_model(self) -> YOLO:
+        """
+        Loads detector for the configured backend, exports it on first use
+        """
+        if self.backend == "torch":
+            return YOLO(self.model_path)
+
+        onnx_path = export_onnx(self.model_path, int8=self.backend == "onnx-int8")
+        print(f"[StrikeThroughCleaner] Verwende ONNX Modell: {onnx_path}")
+
+        # Ultralytics runs .onnx files with ONNX Runtime and keeps pre- and postprocessing identical
+        return YOLO(onnx_path, task="detect")
+
+    def _predict(self, images) -> list:
+        """
+        Returns xyxy boxes per image
+        """
+        results = self.model.predict(images, conf=self.confidence_threshold, verbose=self.debug)
+
+        boxes = []
+        for result in results:
+            xyxy = result.boxes.xyxy
+            if hasattr(xyxy, "cpu"):
+                xyxy = xyxy.cpu().numpy()
+
+            boxes.append(np.asarray(xyxy).reshape(-1, 4))
+
+        return boxes
+
+    def _detect_batch(self, sections: list) -> list:
+        boxes = []
+        for start in range(0, len(sections), self.batch_size):
+            boxes.extend(self._predict(sections[start:start + self.batch_size]))
+
+        return boxes
+
+    @staticmethod
+    def _stacks(sections: list) -> list[list[int]]:
+        """
+        Groups consecutive sections into stacks which are at most as tall as wide.
+        A section which is taller than wide forms a stack of its own
+        """
+        stacks = []
+        height = width = 0
+        for idx, img in enumerate(sections):
+            stack_width = max(width, img.shape[1])
+            if stacks and height + img.shape[0] <= stack_width:
+                stacks[-1].append(idx)
+                height += img.shape[0]
+                width = stack_width
+            else:
+                stacks.append([idx])
+                height, width = img.shape[:2]
+
+        return stacks
+
+    def _detect_page(self, sections: list) -> list:
+        """
+        Runs detection on the sections stacked vertically, see _stacks
+        """
+        stacks = self._stacks(sections)
+
+        pages = []
+        offsets = []
+        for stack in stacks:
+            width = max(sections[idx].shape[1] for idx in stack)
+            page = np.full((sum(sections[idx].shape[0] for idx in stack), width, 3), 255, dtype=np.uint8)
+
+            y = 0
+            for idx in stack:
+                img = sections[idx]
+                page[y:y + img.shape[0], :img.shape[1]] = img
+                offsets.append(y)
+                y += img.shape[0]
+
+            pages.append(page)
+
+        page_boxes = self._detect_batch(pages)
+
+        boxes = []
+        for stack, stack_boxes in zip(stacks, page_boxes):
+            for idx in stack:
+                img, offset = sections[idx], offsets[idx]
+                section_boxes = []
+                for x_min, y_min, x_max, y_max in stack_boxes:
+                    # Box overlaps this section, clipping happens in process()
+                    if y_max > offset and y_min < offset + img.shape[0]:
+                        section_boxes.append([x_min, y_min - offset, x_max, y_max - offset])
+
+                boxes.append(np.array(section_boxes).reshape(-1, 4))
+
+        return boxes
+
+    def _detect(self, sections: list) -> list:
+        if self.mode == "page":
+            return self._detect_page(sections)
+
+        if self.mode == "batch":
+            return self._detect_batch(sections)
+
+        return [self._predict(img)[0] for img in sections]
+
     def process(self, data: dict) -> list:
         sections: list = data.get('horizontal-cutter')
-    
-        cleaned_images = []
-        for idx, img in enumerate(sections):
-            results = self.model.predict(img, conf=self.confidence_threshold, verbose=self.debug)
+        if not sections:
+            return []
+
+        return self.process_batch(sections, 0)
 
+    def process_batch(self, items: list, start_idx: int) -> list:
+        """
+        Whitens the detected strike-throughs on copies of a chunk of sections, start_idx is the position of items[0] in the whole list
+        """
+        if self.model is None:
+            raise Exception('Missing warmup phase')
+
+        boxes_per_section = self._detect(items)
+
+        cleaned_images = []
+        for idx, (img, boxes) in enumerate(zip(items, boxes_per_section), start=start_idx):
+            # Sections of horizontal-cutter may be read by other stages at the same time
+            img = img.copy()
             debug_img = img.copy()
-            for box in results[0].boxes.xyxy:  # (x_min, y_min, x_max, y_max)
+            for box in boxes:  # (x_min, y_min, x_max, y_max)
                 x_min, y_min, x_max, y_max = map(int, box)
 
                 # Sicherheits-Check: Rand prüfen
@@ -55,3 +210,28 @@ class StrikeThroughCleaner(Module):
             cleaned_images.append(img)
 
         return cleaned_images
+
+def export_onnx(model_path: str, int8: bool = False, imgsz: int = 640) -> str:
+    """
+    Exports YOLO weights to ONNX (dynamic batch size) and optionally quantizes them to INT8.
+    Existing exports next to the weights are reused. Returns path of the ONNX model
+    """
+    base_path = os.path.splitext(model_path)[0]
+    onnx_path = base_path + ".onnx"
+    int8_path = base_path + ".int8.onnx"
+
+    if not os.path.exists(onnx_path):
+        print(f"[StrikeThroughCleaner] Exportiere {model_path} nach ONNX...")
+        onnx_path = YOLO(model_path).export(format="onnx", imgsz=imgsz, dynamic=True)
+
+    if not int8:
+        return onnx_path
+
+    if not os.path.exists(int8_path):
+        # pylint: disable=import-outside-toplevel
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        print(f"[StrikeThroughCleaner] Quantisiere {onnx_path} nach INT8...")
+        quantize_dynamic(onnx_path, int8_path, weight_type=QuantType.QUInt8)
+
+    return int8_path
@@ -1,12 +1,12 @@
-import time
 import json
-import base64
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Type, List, Optional
 
 from pydantic import BaseModel
 from models.parser.model_solution import PageExtraction, ModelSolution, TaskSolution
 from models.parser.student_text import StudentText
 from libs.language_client import LanguageClient
+from libs.image_encoder import ImageEncoder
 
 class StructuredDocumentParser:
     """
@@ -14,13 +14,19 @@ class StructuredDocumentParser:
     """
 
     # --- Handles different LLM providers ---
-    def __init__(self, schema_model: Type[BaseModel], prompt: str, llm_client: LanguageClient,debug: bool = False, callback=None):
+    def __init__(self, schema_model: Type[BaseModel], prompt: str, llm_client: LanguageClient,debug: bool = False, callback=None,
+                 max_concurrency: int = 4, page_retries: int = 2, speculative: bool = False,
+                 image_encoder: ImageEncoder | None = None):
         self.schema_model = schema_model
         self.system_prompt_template = prompt
         self.debug = debug
         self.callback = callback
         self.output_path = "debug_output.txt"
         self.client = llm_client
+        self.max_concurrency = max_concurrency
+        self.page_retries = page_retries
+        self.speculative = speculative
+        self.image_encoder = image_encoder if image_encoder is not None else ImageEncoder()
 
     # --- 1. The Main Dispatcher Method ---
     def process(self, data: dict) -> BaseModel:
@@ -48,6 +54,8 @@ class StructuredDocumentParser:
         """
         Transcribe each image in `paths` into a list of lines.
         Returns a StudentText model containing all lines from all pages.
+        Up to max_concurrency pages are transcribed at once, failed pages are retried
+        page_retries times. Raises RuntimeError if a page still fails afterwards.
         """
         # Wir sammeln hier Dikt-Einträge für Pydantic
         all_lines_data: list[dict] = []
@@ -62,43 +70,79 @@ class StructuredDocumentParser:
             "Ignore any red teacher markup, corrections, strikethroughs or other annotations."
         )
 
-        for i, path in enumerate(paths):
-            if self.callback:
-                self.callback(i + 1, len(paths))
-            print(f"[Parser] Transcribing page {i+1}/{len(paths)}...")
-
-            # Bild laden & Base64
-            with open(path, "rb") as img_file:
-                img_b64 = base64.b64encode(img_file.read()).decode("utf-8")
-
-            try:
-                messages = [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": [
-                        {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{img_b64}"}}
-                    ]}
-                ]
-
-                response = self.client.get_response(
-                    messages=messages,
-                    schema=StudentText,
-                    temperature=0.2
-                )
-                for item in response.lines:
-                    all_lines_data.append({"text": item.text})
-
-            except Exception as e:
-                print(f"[Parser] WARNUNG: Seite {i+1} konnte nicht transkribiert werden: {e}")
-                continue
+        # Seiten sind unabhängig voneinander und werden parallel transkribiert
+        page_lines: dict[int, list[dict]] = {}
+        attempts = {i: 0 for i in range(len(paths))}
+        failed: dict[int, Exception] = {}
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_concurrency, len(paths)))) as executor:
+            pending = {
+                executor.submit(self._transcribe_page, path, system_prompt): i
+                for i, path in enumerate(paths)
+            }
+
+            while pending:
+                future = next(as_completed(pending))
+                i = pending.pop(future)
+
+                try:
+                    page_lines[i] = future.result()
+                except Exception as e:
+                    attempts[i] += 1
+                    if attempts[i] <= self.page_retries:
+                        print(f"[Parser] WARNUNG: Seite {i+1} fehlgeschlagen ({e}), neuer Versuch {attempts[i]}/{self.page_retries}")
+                        pending[executor.submit(self._transcribe_page, paths[i], system_prompt)] = i
+                        continue
+
+                    failed[i] = e
+
+                # Callback runs in the calling thread, Streamlit elements must not be updated from workers
+                done = len(page_lines) + len(failed)
+                print(f"[Parser] Transcribed page {i+1} ({done}/{len(paths)})")
+                if self.callback:
+                    self.callback(done, len(paths))
+
+        if failed:
+            pages = ", ".join(str(i + 1) for i in sorted(failed))
+            raise RuntimeError(f"Seite(n) {pages} konnten nicht transkribiert werden: {failed[min(failed)]}")
+
+        # Zeilen in Seitenreihenfolge zusammenführen
+        for i in range(len(paths)):
+            all_lines_data.extend(page_lines[i])
 
         # 3) Am Ende erstellen wir das Pydantic-Objekt aus den dicts
         return StudentText(lines=all_lines_data)
 
+    def _transcribe_page(self, path: str, system_prompt: str) -> list[dict]:
+        """
+        Transcribes a single page, returns its lines in order
+        """
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": [
+                {"type": "image_url", "image_url": {"url": self._encode_image(path)}}
+            ]}
+        ]
 
+        response = self.client.get_response(
+            messages=messages,
+            schema=StudentText,
+            temperature=0.2
+        )
 
+        return [{"text": item.text} for item in response.lines]
+
+    def _encode_image(self, path: str) -> str:
+        """
+        Loads, downscales and re-encodes image, returns it as base64 data url
+        """
+        return self.image_encoder.encode(path)
 
     # --- 3. Internal Method for Structured Solution Extraction ---
     def _process_structured_solution(self, paths: list[str]) -> ModelSolution:
+        if self.speculative and len(paths) > 1:
+            return self._process_structured_solution_speculative(paths)
+
         page_results: List[PageExtraction] = []
         context_for_next_page: Optional[str] = None
         
@@ -107,32 +151,8 @@ class StructuredDocumentParser:
                 self.callback(i + 1, len(paths))
             print(f"[Parser] Verarbeite Seite {i+1}/{len(paths)}...")
             system_prompt = self._build_prompt_for_page(context_for_next_page)
-            with open(path, "rb") as img_file:
-                b64 = base64.b64encode(img_file.read()).decode("utf-8")
-            
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": [
-                    {"type": "text", "text": "Bitte extrahiere die Aufgaben..."},
-                    {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{b64}"}}
-                ]}
-            ]
-
-            parsed_page: Optional[PageExtraction] = None
-            for attempt in range(1, 4):
-                try:
-                    # --- GROQ API CALL ---
-                    response = self.client.get_response(
-                        messages=messages,
-                        schema=PageExtraction,
-                        temperature=0.2
-                    )
-                    parsed_page = response
-                    break
-                except Exception as e:
-                    print(f"[Parser] Fehler bei Seite {i+1} (Versuch {attempt}): {e}")
-                    if attempt < 3:
-                        time.sleep(attempt * 5)
+
+            parsed_page = self._extract_page(path, system_prompt, i)
 
             if parsed_page:
                 page_results.append(parsed_page)
@@ -146,14 +166,138 @@ class StructuredDocumentParser:
         print("[Parser] Zusammenführung abgeschlossen.")
         return final_result
 
+    def _process_structured_solution_speculative(self, paths: list[str]) -> ModelSolution:
+        """
+        Extracts all pages in parallel without context of the previous page.
+        Pages whose continuation flag does not match the task numbers are re-queried
+        with context afterwards, so the whole document needs one to two round trips.
+        """
+        prompts = [self._build_prompt_for_page(None, first_page=i == 0) for i in range(len(paths))]
+        results = self._extract_pages_parallel(list(enumerate(paths)), prompts)
+
+        ambiguous = self._find_ambiguous_pages(results)
+        if ambiguous:
+            print(f"[Parser] Fortsetzung unklar auf Seite(n) {', '.join(str(i + 1) for i in ambiguous)}, frage mit Kontext erneut an...")
+
+            contexts = {i: self._context_before(results, i) for i in ambiguous}
+            requery = self._extract_pages_parallel(
+                [(i, paths[i]) for i in ambiguous],
+                {i: self._build_prompt_for_page(contexts[i]) for i in ambiguous}
+            )
+            for i, parsed_page in requery.items():
+                if parsed_page is not None:
+                    results[i] = parsed_page
+
+        page_results: List[PageExtraction] = []
+        for i in range(len(paths)):
+            if results.get(i) is not None:
+                page_results.append(results[i])
+            else:
+                print(f"[Parser] WARNUNG: Seite {i+1} konnte nicht verarbeitet werden. Überspringe.")
+
+        print("[Parser] Alle Seiten verarbeitet. Führe Ergebnisse zusammen...")
+        final_result = self._merge_results(page_results)
+        print("[Parser] Zusammenführung abgeschlossen.")
+        return final_result
+
+    def _extract_pages_parallel(self, pages: list[tuple[int, str]], prompts) -> dict[int, Optional[PageExtraction]]:
+        """
+        Extracts the given (index, path) pages with up to max_concurrency requests at once
+        """
+        results: dict[int, Optional[PageExtraction]] = {}
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_concurrency, len(pages)))) as executor:
+            futures = {
+                executor.submit(self._extract_page, path, prompts[i], i): i
+                for i, path in pages
+            }
+
+            for future in as_completed(futures):
+                i = futures[future]
+                results[i] = future.result()
+
+                print(f"[Parser] Seite {i+1} verarbeitet ({len(results)}/{len(pages)})")
+                if self.callback:
+                    self.callback(len(results), len(pages))
+
+        return results
+
+    def _extract_page(self, path: str, system_prompt: str, index: int) -> Optional[PageExtraction]:
+        """
+        Extracts tasks of a single page, returns None on failure
+        """
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": [
+                {"type": "text", "text": "Bitte extrahiere die Aufgaben..."},
+                {"type": "image_url", "image_url": {"url": self._encode_image(path)}}
+            ]}
+        ]
+
+        try:
+            # --- GROQ API CALL --- (rate limits and retries are handled by the LanguageClient)
+            return self.client.get_response(
+                messages=messages,
+                schema=PageExtraction,
+                temperature=0.2
+            )
+        except Exception as e:
+            print(f"[Parser] Fehler bei Seite {index+1}: {e}")
+            return None
+
+    @staticmethod
+    def _last_task_before(results: dict[int, Optional[PageExtraction]], index: int) -> Optional[TaskSolution]:
+        """
+        Returns last task of the closest previous page with tasks
+        """
+        for i in range(index - 1, -1, -1):
+            page = results.get(i)
+            if page is not None and page.tasks:
+                return page.tasks[-1]
+
+        return None
+
+    def _context_before(self, results: dict[int, Optional[PageExtraction]], index: int) -> Optional[str]:
+        last_task = self._last_task_before(results, index)
+
+        return last_task.model_dump_json(indent=2) if last_task is not None else None
+
+    def _find_ambiguous_pages(self, results: dict[int, Optional[PageExtraction]]) -> list[int]:
+        """
+        Pages extracted without context whose continuation can not be decided reliably:
+        - flagged as continuation, but the first task has a different number than the previous task
+        - not flagged, but the first task is unnumbered or repeats the number of the previous task
+        """
+        ambiguous = []
+        for i in sorted(results):
+            page = results[i]
+            if i == 0 or page is None or not page.tasks:
+                continue
+
+            previous = self._last_task_before(results, i)
+            if previous is None:
+                continue
+
+            number = page.tasks[0].number
+            if page.is_first_task_a_continuation:
+                if number is not None and previous.number is not None and number != previous.number:
+                    ambiguous.append(i)
+            elif number is None or number == previous.number:
+                ambiguous.append(i)
+
+        return ambiguous
+
     # --- 4. Helper Methods for Structured Solution Extraction ---
-    def _build_prompt_for_page(self, context_from_previous_page: Optional[str]) -> str:
+    def _build_prompt_for_page(self, context_from_previous_page: Optional[str], first_page: bool = True) -> str:
         schema_json = json.dumps(PageExtraction.model_json_schema(), indent=2)
-        prompt = (f"{self.system_prompt_template}\n\n...--- REQUIRED JSON SCHEMA ---\n{schema_json}\n--- END OF SCHEMA ---\n")
+        prompt = f"{self.system_prompt_template}\n\n...--- REQUIRED JSON SCHEMA ---\n{schema_json}\n--- END OF SCHEMA ---\n"
         if context_from_previous_page:
-            prompt += ("\n--- CONTEXT FROM PREVIOUS PAGE ---\n...\n")
-        else:
+            prompt += (f"\n--- CONTEXT FROM PREVIOUS PAGE ---\n{context_from_previous_page}\n--- END OF CONTEXT ---\n")
+        elif first_page:
             prompt += "\nThis is the first page..."
+        else:
+            prompt += ("\nThe previous page is not available. Set `is_first_task_a_continuation` to true "
+                       "only if this page starts in the middle of a task.")
         return prompt
 
     def _merge_results(self, page_results: List[PageExtraction]) -> ModelSolution:
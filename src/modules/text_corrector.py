@@ -1,72 +1,164 @@
 import os
 import re
+import sys
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import torch
 import torch.nn.functional as F
-from spellchecker import SpellChecker
 from transformers import (
     DistilBertTokenizerFast,
     DistilBertForMaskedLM,
     pipeline
 )
 from Levenshtein import ratio, distance
-from spylls.hunspell import Dictionary
 from jarowinkler import jarowinkler_similarity
-from symspellpy import SymSpell, Verbosity
 
+from libs.model_registry import get_model_registry
+from libs.spelling_resources import SpellingResources, SYMSPELL_PATH, HUNSPELL_PATH, COMPILED_DIR
+from libs.known_words import KnownWords
+from libs.candidate_generator import CandidateGenerator, WordCandidates
+from libs.sqlite_cache import SqliteCache
+from libs.name_gazetteer import NameGazetteer
 from .module_base import Module
 
+MLM_MODEL_NAME = "distilbert/distilbert-base-german-cased"
+# Optional, about 2 GB. Any token classification model with PER entities can be used instead
+NER_MODEL_NAME = "FacebookAI/xlm-roberta-large-finetuned-conll03-german"
+
+# Chunks end after one of these tokens if possible
+CHUNK_BOUNDARIES = {"new_line", ".", "!", "?"}
+
+# Warm corrector of a chunk worker process, inherited (fork) or loaded (spawn), see TextCorrector._correct_parallel
+_worker_corrector = None
+
+def _init_chunk_worker():
+    # One torch thread per process, the workers already use all cores
+    torch.set_num_threads(1)
+    _worker_corrector._after_fork() # pylint: disable=protected-access
+
+def _init_spawned_chunk_worker(config: dict, num_threads: int):
+    """
+    Builds and warms up the corrector once per spawned worker process
+    """
+    global _worker_corrector # pylint: disable=global-statement
+
+    torch.set_num_threads(num_threads)
+    _worker_corrector = TextCorrector(**config)
+    _worker_corrector.warmup()
+
+def _correct_chunk(words: list[str], ner_result: dict, start: int, end: int) -> list[str]:
+    return _worker_corrector._correct(words, ner_result, start, end) # pylint: disable=protected-access
+
+def split_chunks(words: list[str], chunk_words: int, overlap: int) -> list[tuple[int, int, int, int]]:
+    """
+    Splits words into chunks of about chunk_words words which end at a line or sentence boundary.
+    Returns (window start, start, end, window end) per chunk, the window adds overlap words
+    of context on both sides which are not corrected by the chunk
+    """
+    chunks = []
+    start = 0
+    while start < len(words):
+        end = min(start + chunk_words, len(words))
+        if end < len(words):
+            # Latest boundary in the second half of the chunk, else cut hard
+            for boundary in range(end, start + chunk_words // 2, -1):
+                if words[boundary - 1] in CHUNK_BOUNDARIES:
+                    end = boundary
+                    break
+
+        chunks.append((_extend_window(words, start, -1, overlap), start, end, _extend_window(words, end, 1, overlap)))
+        start = end
+
+    return chunks
+
+def _extend_window(words: list[str], position: int, step: int, overlap: int) -> int:
+    """
+    Moves position by overlap words in direction step, line markers do not count as context
+    """
+    counted = 0
+    if step < 0:
+        while counted < overlap and position > 0:
+            position -= 1
+            counted += words[position] != "new_line"
+    else:
+        while counted < overlap and position < len(words):
+            counted += words[position] != "new_line"
+            position += 1
+
+    return position
+
 class TextCorrector(Module):
     """
     Tries to correct the recognized text by some degree
+    With batch_scoring the candidates of all words are generated first and scored
+    with few large batched forward passes instead of one pass per word
+    The dictionaries are loaded from compiled_dir, see libs/spelling_resources.py
+    Words found in the vocabulary (KnownWords) are kept without generating candidates
+    Dictionary candidates are memoized, with candidate_cache also persistently (SqliteCache)
+    With workers > 1 pages longer than chunk_words are split at line and sentence boundaries
+    and the chunks are corrected in worker processes. chunk_overlap words of context are added
+    on both sides, with batch_scoring the result equals the serial one.
+    A single-threaded process forks its workers, they share the warm models. Forking is not safe
+    next to other threads (Streamlit, Pipeline scheduler="streaming" or "dag"), there a pool of
+    spawned workers is kept until close(). Each of them loads the compiled dictionaries, the
+    language model and the candidate cache once. On cuda the chunks are corrected serially
+    Person names of the assignment (names) are matched per word with a NameGazetteer. A NER model
+    (ner_model, e.g. NER_MODEL_NAME) is optional and runs in chunks of at most ner_max_tokens tokens
     """
-    def __init__(self, debug=False, debug_folder="debug/debug_textcorrector"):
+    def __init__(self, batch_scoring=False, score_batch_size=16, compiled_dir=COMPILED_DIR, candidate_cache=False,
+                 workers=1, chunk_words=200, chunk_overlap=40, names=("Tim", "Marcia"), ner_model=None, ner_max_tokens=512,
+                 debug=False, debug_folder="debug/debug_textcorrector"):
         super().__init__("text-corrector")
 
+        self.names = tuple(names)
+        self.ner_model = ner_model
+        self.ner_max_tokens = ner_max_tokens
+        self.workers = max(1, workers)
+        self.chunk_words = max(1, chunk_words)
+        self.chunk_overlap = chunk_overlap
+        self.candidate_cache = candidate_cache
+        self.compiled_dir = compiled_dir
         self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        self.batch_scoring = batch_scoring
+        self.score_batch_size = max(1, score_batch_size)
         self.debug = debug
         self.debug_folder = debug_folder
 
+        self.resources = None
         self.hunspell = None
         self.symspell = None
-        self.possible_per_names = None
+        self.gazetteer = None
         self.checker = None
+        self.known_words = None
+        self.candidate_generator = None
         self.tokenizer = None
         self.model = None
         self.ner = None
         self.fill_mask = None
+        self._chunk_pool = None
 
         if self.debug:
             os.makedirs(self.debug_folder, exist_ok=True)
 
     def _warmup(self):
-        spellchecker_words = []
-        path = os.path.join("models", "symspell", "de-100k_schulbuch.txt")
-
-        with open(path, "r", encoding="utf-8") as dic:
-            for line in dic:
-                parts = line.strip().split()
-                if len(parts) >= 2:
-                    spellchecker_words.append(parts[0])
+        registry = get_model_registry()
+        self.resources = resources = SpellingResources(compiled_dir=self.compiled_dir)
+
+        self.hunspell = registry.get(f"hunspell:{HUNSPELL_PATH}", resources.hunspell, owner=self)
+        self.symspell = registry.get(f"symspell:{SYMSPELL_PATH}", resources.symspell, owner=self)
+        self.checker = registry.get(f"spellchecker:de:{SYMSPELL_PATH}", resources.checker, owner=self)
+        self.known_words = registry.get(
+            f"known-words:{SYMSPELL_PATH}:{HUNSPELL_PATH}",
+            lambda: KnownWords.from_files(SYMSPELL_PATH, resources.word_forms(self.hunspell)),
+            owner=self
+        )
 
-        self.hunspell = Dictionary.from_files('models/hunspell/de_DE_frami')
-        self.symspell = SymSpell(max_dictionary_edit_distance=4)
-        self.symspell.load_dictionary('models/symspell/de-100k_schulbuch.txt', 0, 1)
+        self.gazetteer = NameGazetteer(self.names)
 
-        self.possible_per_names = ["Tim", "Marcia"]
-
-        self.checker = SpellChecker(language="de")
-        # Here load dictionary of all words from Schulbuch
-        self.checker.word_frequency.load_words(spellchecker_words)
-        
-        self.tokenizer = DistilBertTokenizerFast.from_pretrained("distilbert/distilbert-base-german-cased")
-        self.model = DistilBertForMaskedLM.from_pretrained("distilbert/distilbert-base-german-cased")
-        
-        self.ner = pipeline(
-            "ner",
-            model="FacebookAI/xlm-roberta-large-finetuned-conll03-german",
-            tokenizer="FacebookAI/xlm-roberta-large-finetuned-conll03-german",
-            grouped_entities=True
-        )
+        self.tokenizer, self.model = registry.get(f"mlm:{MLM_MODEL_NAME}", self._load_mlm, owner=self)
+        if self.ner_model is not None:
+            self.ner = registry.get(f"ner:{self.ner_model}", self._load_ner, owner=self)
 
         self.fill_mask = pipeline(
             "fill-mask",
@@ -74,7 +166,47 @@ class TextCorrector(Module):
             tokenizer=self.tokenizer,
             device=0 if 'cuda' in self.device else -1
         )
-    
+
+    @staticmethod
+    def _load_mlm() -> tuple[DistilBertTokenizerFast, DistilBertForMaskedLM]:
+        tokenizer = DistilBertTokenizerFast.from_pretrained(MLM_MODEL_NAME)
+        model = DistilBertForMaskedLM.from_pretrained(MLM_MODEL_NAME)
+
+        return tokenizer, model
+
+    def _load_ner(self):
+        return pipeline(
+            "ner",
+            model=self.ner_model,
+            tokenizer=self.ner_model,
+            aggregation_strategy="simple"
+        )
+
+    def _release(self):
+        self.resources = None
+        self.hunspell = None
+        self.symspell = None
+        self.gazetteer = None
+        self.checker = None
+        self.known_words = None
+        self.candidate_generator = None
+        self.tokenizer = None
+        self.model = None
+        self.ner = None
+        self.fill_mask = None
+        # Only dropped here, a pickled clone must not shut down the pool of the original, see close()
+        self._chunk_pool = None
+
+    def close(self):
+        """
+        Shuts down the spawned chunk workers and frees models and resources
+        """
+        if self._chunk_pool is not None:
+            self._chunk_pool.shutdown()
+            self._chunk_pool = None
+
+        super().close()
+
     def get_preconditions(self) -> list[str]:
         return ['text-recognizer']
     
@@ -131,8 +263,12 @@ class TextCorrector(Module):
         """
         Create map of ner to person name
         """
-        total_names = len(self.possible_per_names)
-        for per in self.possible_per_names:
+        # Assignment without known names, the recognized name is kept
+        if not self.names:
+            return ner_result['word']
+
+        total_names = len(self.names)
+        for per in self.names:
             if ratio(ner_result['word'], per) > 1 / total_names:
                 return per
             
@@ -141,12 +277,11 @@ class TextCorrector(Module):
         
         return ner_result['word']
 
-    def process(self, data: dict) -> list:
-        texts: list = data.get('text-recognizer', [])
-
-        if self.hunspell is None:
-            raise Exception('Warmup Phase missing')
-
+    def _preprocess(self, texts: list[str]) -> tuple[list[str], dict]:
+        """
+        Joins recognized lines, fixes hyphenated line breaks and maps person names.
+        Returns words of the page and the name mapping
+        """
         text = " new_line ".join(texts)
         # Fix linebreaks with wo-rd
         pattern = re.compile(r'(\w+)-\snew_line\s+(\w+)', re.UNICODE)
@@ -156,178 +291,448 @@ class TextCorrector(Module):
                 break
 
         # Use NER to map possible names
-        ner_result = {res['word']: self._map_ner_to_per(res) for res in self.ner(text) if res['score'] > 0.8 and res['entity_group'] == "PER"}
+        ner_result = self._ner_names(text)
 
         # Add space after and before symbols. Else: BERT has problems
         words = (re.sub(r'([.,!?;:()\[\]{}"“”])', r' \1 ', text)).split()
 
-        corrected_words = []
-        for i, _ in enumerate(words):
-            original_word = words[i]
+        return words, ner_result
+
+    def _ner_names(self, text: str) -> dict:
+        """
+        Maps person names found by the NER model to the names of the assignment
+        """
+        chunks = self._ner_chunks(text.split()) if self.ner is not None else []
+        if not chunks:
+            return {}
+
+        ner_result = {}
+        for entities in self.ner(chunks):
+            for res in entities:
+                if res['score'] > 0.8 and res['entity_group'] == "PER":
+                    ner_result[res['word']] = self._map_ner_to_per(res)
+
+        return ner_result
+
+    def _ner_chunks(self, words: list[str]) -> list[str]:
+        """
+        Joins words to texts which fit into the NER model including its two special tokens
+        """
+        max_tokens = self.ner_max_tokens - 2
+
+        chunks = []
+        chunk = []
+        length = 0
+        for word in words:
+            count = len(self.ner.tokenizer.tokenize(word))
+            if chunk and length + count > max_tokens:
+                chunks.append(" ".join(chunk))
+                chunk = []
+                length = 0
+
+            chunk.append(word)
+            length += count
+
+        if chunk:
+            chunks.append(" ".join(chunk))
+
+        return chunks
+
+    def _trivial_correction(self, original_word: str, ner_result: dict) -> str | None:
+        """
+        Returns the output for words which need no language model, else None
+        """
+        # Add line breaks to their original position
+        if original_word == "new_line":
+            return "\n"
+
+        # Symbols are symobls, no need for predictions
+        if re.fullmatch(r'(?:[.,!?;:()\[\]{}"“”]|\d+)', original_word):
+            return original_word
+
+        # Mostly just noise
+        if len(original_word) <= 1:
+            return original_word
+
+        for possible_per, mapped_value in ner_result.items():
+            # TODO: This has to be done better
+            if possible_per in original_word:
+                return mapped_value
+
+        if self.gazetteer is not None:
+            # Dictionary words like Maria are no misspelled names, only exact names are mapped
+            return self.gazetteer.match(original_word, fuzzy=not self._in_vocabulary(original_word))
+
+        return None
+
+    def _in_vocabulary(self, original_word: str) -> bool:
+        """
+        Fast path: word is a known word form and needs no candidates at all
+        """
+        return self.known_words is not None and original_word in self.known_words
+
+    def _candidates(self, original_word: str) -> WordCandidates:
+        """
+        Dictionary candidates of a word, memoized across words, pages and students
+        """
+        # Built on first use, so it always wraps the currently loaded dictionaries
+        if self.candidate_generator is None:
+            store = self._candidate_store()
+            self.candidate_generator = CandidateGenerator(
+                self.checker, self.hunspell, self.symspell, cache=store,
+                # Persisted candidates of edited dictionaries are not reused
+                namespace=self.resources.fingerprint() if store is not None else ""
+            )
+
+        return self.candidate_generator.generate(original_word)
+
+    def _candidate_store(self) -> SqliteCache | None:
+        if not self.candidate_cache:
+            return None
+
+        return SqliteCache(table="word_candidates", ttl_seconds=30 * 24 * 3600, max_entries=100_000, evict_slack=0.1)
+
+    def _after_fork(self):
+        """
+        A sqlite connection must not be shared with the parent process
+        """
+        if self.candidate_generator is not None:
+            self.candidate_generator.cache = self._candidate_store()
+
+    def _context(self, words: list[str], i: int, pre_words: list[str], pre_end: int) -> tuple[list[str], list[str]]:
+        """
+        Returns up to 40 words of context before and after position i.
+        The left context is taken from pre_words up to pre_end
+        """
+        pre_context = pre_words[max(0, pre_end - 40) : pre_end]
+        post_context = words[i + 1 : min(len(words) - 1, i + 40)]
+        post_context = list(filter(lambda x: x != 'new_line', post_context))
 
-            # Add line breaks to their original position
-            if original_word == "new_line":
-                corrected_words.append("\n")
+        return pre_context, post_context
 
+    def _select_best(self, original_word: str, bert_scores: dict[str, float]) -> str:
+        """
+        Combines language model scores with the similarity to the original word
+        """
+        # We filter candidates with a too bad score
+        bert_scores = {k: v for k, v in bert_scores.items() if v > -0.1}
+
+        lm_weight = 0.5
+        lev_weight = 1.5
+
+        scores = bert_scores.values()
+        min_s, max_s = min(scores), max(scores)
+        eps = 1e-6
+        norm_scores = {w: (s - min_s) * 2 / (max_s - min_s + eps) for w, s in bert_scores.items()}
+
+        final_scores = {}
+        for w, s in norm_scores.items():
+            length = len(w)
+            org_length = len(original_word)
+
+            # Compute similarity
+            jaro = jarowinkler_similarity(w.lower(), original_word.lower())
+            lev = ratio(original_word.lower(), w.lower())
+
+            if jaro == 0 or lev == 0:
                 continue
 
-            # Symbols are symobls, no need for predictions
-            if re.fullmatch(r'(?:[.,!?;:()\[\]{}"“”]|\d+)', original_word):
-                corrected_words.append(original_word)
+            proportion = length  / org_length
+            if length > org_length:
+                proportion = org_length / length
+
+            # Short words
+            if org_length <= 5:
+                proportion = 1
+
+            similarity = (jaro + lev) * proportion * lev_weight
+
+            score = (lm_weight * s) + similarity
+
+            final_scores[w] = score
+
+        if len(final_scores.values()) == 0:
+            return original_word
+
+        best = max(final_scores, key=lambda w: final_scores[w])
+        if distance(original_word, best) > 4:
+            return original_word
+
+        return best
+
+    def _token_ids(self, word: str, cache: dict[str, list[int]]) -> list[int]:
+        """
+        Tokenizes a word once, WordPiece tokens of a joined text equal the concatenated tokens of its words
+        """
+        if word not in cache:
+            cache[word] = self.tokenizer.convert_tokens_to_ids(self.tokenizer.tokenize(word))
+
+        return cache[word]
+
+    def score_candidates_document(
+        self,
+        requests: list[tuple[list[str], list[str], list[str]]]
+    ) -> list[dict[str, float]]:
+        """
+        Scores the candidates of many words with a few large batched forward passes.
+        Each request is (pre context, post context, candidates)
+        """
+        token_cache: dict[str, list[int]] = {}
+        max_len = self.tokenizer.model_max_length if self.tokenizer.model_max_length < 100_000 else 512
+
+        # (request index, candidate, input ids, mask start, mask length)
+        sequences = []
+        for req_idx, (pre, post, candidates) in enumerate(requests):
+            pre_ids = [t for w in pre for t in self._token_ids(w, token_cache)]
+            post_ids = [t for w in post for t in self._token_ids(w, token_cache)]
+
+            for cand in candidates:
+                cand_ids = self._token_ids(cand, token_cache)
+                if len(cand_ids) == 0:
+                    continue
+
+                # Trim context symmetrically if sequence does not fit into the model
+                _pre, _post = pre_ids, post_ids
+                while len(_pre) + len(cand_ids) + len(_post) + 2 > max_len and (_pre or _post):
+                    if len(_pre) >= len(_post):
+                        _pre = _pre[1:]
+                    else:
+                        _post = _post[:-1]
+
+                ids = [self.tokenizer.cls_token_id] + _pre + cand_ids + _post + [self.tokenizer.sep_token_id]
+                sequences.append((req_idx, cand, ids, len(_pre) + 1, len(cand_ids)))
+
+        scores: list[dict[str, float]] = [{} for _ in requests]
+
+        # Sort by length so a batch needs little padding
+        sequences.sort(key=lambda seq: len(seq[2]))
+        pad_id = self.tokenizer.pad_token_id or 0
+        for start in range(0, len(sequences), self.score_batch_size):
+            batch = sequences[start : start + self.score_batch_size]
+            batch_len = max(len(seq[2]) for seq in batch)
+
+            input_ids = torch.full((len(batch), batch_len), pad_id, dtype=torch.long)
+            attention_mask = torch.zeros((len(batch), batch_len), dtype=torch.long)
+            for row, seq in enumerate(batch):
+                input_ids[row, :len(seq[2])] = torch.tensor(seq[2])
+                attention_mask[row, :len(seq[2])] = 1
+
+            with torch.no_grad():
+                logits = self.model(
+                    input_ids.to(self.device),
+                    attention_mask=attention_mask.to(self.device)
+                ).logits
+
+            for row, (req_idx, cand, ids, mask_start, mask_len) in enumerate(batch):
+                # Only normalize the masked positions instead of the whole (batch, seq, vocab) tensor
+                log_probs = F.log_softmax(logits[row, mask_start : mask_start + mask_len], dim=-1)
+                token_ids = torch.tensor(ids[mask_start : mask_start + mask_len], device=log_probs.device)
+                total_prob = log_probs.gather(1, token_ids.unsqueeze(1)).sum().item()
+
+                scores[req_idx][cand] = total_prob / mask_len # We normalize here to have an even probability
+
+        return scores
+
+    def _correct_sequential(self, words: list[str], ner_result: dict, start: int = 0, end: int | None = None) -> list[str]:
+        """
+        Corrects words[start:end] word by word, left context is already corrected.
+        Words outside of the range are only context
+        """
+        end = len(words) if end is None else end
+
+        corrected_words = list(words[:start])
+        for i in range(start, end):
+            original_word = words[i]
+
+            trivial = self._trivial_correction(original_word, ner_result)
+            if trivial is not None:
+                corrected_words.append(trivial)
 
                 continue
 
-            # Mostly just noise
-            if len(original_word) <= 1:
+            if self._in_vocabulary(original_word):
                 corrected_words.append(original_word)
+
                 continue
 
-            found_per = False
-            for possible_per, mapped_value in ner_result.items():
-                # TODO: This has to be done better
-                if not found_per and possible_per in original_word:
-                    found_per = True
-                    corrected_words.append(mapped_value)
+            word_candidates = self._candidates(original_word)
+            if word_candidates.known:
+                corrected_words.append(original_word)
 
-            if found_per:
                 continue
 
-            corrected_candidates = self.checker.candidates(original_word)
-            if corrected_candidates and len(corrected_candidates) == 1:
-                corrected = list(corrected_candidates)[0]
-            
-                if corrected == original_word and len(corrected) >= 4:
-                    corrected_words.append(corrected)
-                    
-                    continue
-
             try:
-                pre_context = corrected_words[max(0, i - 40) : i]
-                post_context = words[i + 1 : min(len(words) - 1, i + 40)]
-                post_context = list(filter(lambda x: x != 'new_line', post_context))
-
-                context = pre_context + ['[MASK]'] + post_context
-                masked_text = ' '.join(context)
-
-                canditates = []
-                #score_corrected = float('-inf')
-                if corrected_candidates is not None:
-                    amount = 0
-                    for canditate in list(corrected_candidates):
-                        amount += 1
-                        if amount <= 3:
-                            canditates.append(canditate)
-                    #corrected = list(corrected_candidates)[0]
-                    #score_corrected = self._score_sentence_bert_batch(" ".join(pre_context + [corrected] + post_context))
-                    #canditates.append(corrected)
-                else:
-                    pass
-                    #corrected = original_word
-                    #score_corrected = self._score_sentence_bert_batch(" ".join(pre_context + [original_word] + post_context))
-
-                amount = 0
-                for suggest in self.hunspell.suggest(original_word):
-                    if suggest not in canditates and suggest is not original_word:
-                        amount += 1
-                        if amount <= 3:
-                            canditates.append(suggest)
-
-                amount = 0
-                for suggest in self.symspell.lookup(original_word, Verbosity.CLOSEST, max_edit_distance=4, transfer_casing=True):
-                    if suggest.term not in canditates and suggest.term is not original_word:
-                        amount += 1
-                        if amount <= 3:
-                            canditates.append(suggest.term)
-                
+                pre_context, post_context = self._context(words, i, corrected_words, i)
+                masked_text = ' '.join(pre_context + ['[MASK]'] + post_context)
+
+                canditates = list(word_candidates.candidates)
+
                 top = self.fill_mask(masked_text, top_k=3)
                 for t in top:
                     w = t['token_str'].strip()
                     if w and w not in canditates:
                         canditates.append(w)
 
-                    #new_score = self._score_sentence_bert_batch(" ".join(pre_context + [suggest] + post_context))
+                if word_candidates.segmented is not None:
+                    canditates.append(word_candidates.segmented)
+
+                bert_scores = self.score_candidates_batch(pre_context, post_context, canditates)
 
-                    #if new_score > score_corrected:
-                    #    corrected = suggest
-                    #    score_corrected = new_score
+                corrected_words.append(self._select_best(original_word, bert_scores))
+            except Exception as e:
+                print("[TextCorrector] an Error occured during text reparation", e)
 
+        return corrected_words[start:]
 
-                #score_predicted = self._score_sentence_bert_batch(" ".join(pre_context + [predicted_token] + post_context))
+    def _correct_batched(self, words: list[str], ner_result: dict, start: int = 0, end: int | None = None) -> list[str]:
+        """
+        Generates candidates for words[start:end] first and scores them afterwards
+        with few batched forward passes. Left context is the uncorrected text
+        """
+        end = len(words) if end is None else end
+
+        context_words = [w for w in words if w != 'new_line']
+        # Position of each word inside context_words
+        context_positions = []
+        position = 0
+        for w in words:
+            context_positions.append(position)
+            if w != 'new_line':
+                position += 1
+
+        corrected_words: list[str | None] = [None] * len(words)
+        pending = [] # (word index, pre context, post context, candidates, segmented)
+        for i in range(start, end):
+            original_word = words[i]
+            trivial = self._trivial_correction(original_word, ner_result)
+            if trivial is not None:
+                corrected_words[i] = trivial
 
-                #print(masked_text)
-                result = self.symspell.word_segmentation(original_word)
-                if result.distance_sum == 1:
-                    result_string = result.corrected_string
+                continue
 
-                    if len(result_string.split(" ")) >= 2:
-                        canditates.append(result.corrected_string)
+            if self._in_vocabulary(original_word):
+                corrected_words[i] = original_word
 
-                bert_scores = self.score_candidates_batch(pre_context, post_context, canditates)
-                # We filter candidates with a too bad score
-                bert_scores = {k: v for k, v in bert_scores.items() if v > -0.1}
+                continue
 
-                lm_weight = 0.5
-                lev_weight = 1.5
+            try:
+                word_candidates = self._candidates(original_word)
+                if word_candidates.known:
+                    corrected_words[i] = original_word
 
-                scores = bert_scores.values()
-                min_s, max_s = min(scores), max(scores)
-                eps = 1e-6
-                norm_scores = {w: (s - min_s) * 2 / (max_s - min_s + eps) for w, s in bert_scores.items()}
-                #print(bert_scores)
-                #print(norm_scores)
+                    continue
 
-                final_scores = {}
-                for w, s in norm_scores.items():
-                    length = len(w)
-                    org_length = len(original_word)
+                pre_context, post_context = self._context(words, i, context_words, context_positions[i])
+                pending.append((i, pre_context, post_context, list(word_candidates.candidates), word_candidates.segmented))
+            except Exception as e:
+                print("[TextCorrector] an Error occured during text reparation", e)
+
+        if len(pending) == 0:
+            return [w for w in corrected_words[start:end] if w is not None]
 
-                    # Compute similarity
-                    jaro = jarowinkler_similarity(w.lower(), original_word.lower())
-                    lev = ratio(original_word.lower(), w.lower())
+        masked_texts = [' '.join(pre + ['[MASK]'] + post) for _, pre, post, _, _ in pending]
+        tops = self.fill_mask(masked_texts, top_k=3, batch_size=self.score_batch_size)
+        if len(masked_texts) == 1:
+            tops = [tops]
 
-                    if jaro == 0 or lev == 0:
-                        continue
+        for (_, _, _, canditates, segmented), top in zip(pending, tops):
+            for t in top:
+                w = t['token_str'].strip()
+                if w and w not in canditates:
+                    canditates.append(w)
 
-                    proportion = length  / org_length
-                    if length > org_length:
-                        proportion = org_length / length
+            if segmented is not None:
+                canditates.append(segmented)
 
-                    # Short words
-                    if org_length <= 5:
-                        proportion = 1
+        all_scores = self.score_candidates_document([(pre, post, cands) for _, pre, post, cands, _ in pending])
 
-                    similarity = (jaro + lev) * proportion * lev_weight
+        for (i, _, _, _, _), bert_scores in zip(pending, all_scores):
+            try:
+                corrected_words[i] = self._select_best(words[i], bert_scores)
+            except Exception as e:
+                print("[TextCorrector] an Error occured during text reparation", e)
 
-                    score = (lm_weight * s) + similarity
+        return [w for w in corrected_words[start:end] if w is not None]
 
-                    final_scores[w] = score
-                    #print(lev, w, s * lm_weight, similarity, f'Final: {final_scores[w]}')
-                
-                if len(final_scores.values()) == 0:
-                    corrected_words.append(original_word)
+    def _correct(self, words: list[str], ner_result: dict, start: int, end: int) -> list[str]:
+        if self.batch_scoring:
+            return self._correct_batched(words, ner_result, start, end)
 
-                    continue
-                    
-                best = max(final_scores, key=lambda w: final_scores[w])
-                if distance(original_word, best) > 4:
-                    corrected_words.append(original_word)
+        return self._correct_sequential(words, ner_result, start, end)
 
-                    continue
+    def _correct_parallel(self, words: list[str], ner_result: dict) -> list[str]:
+        """
+        Corrects the chunks of words in a pool of worker processes and stitches the results in order
+        """
+        global _worker_corrector # pylint: disable=global-statement
 
-                #print(best)
+        chunks = split_chunks(words, self.chunk_words, self.chunk_overlap)
+        tasks = [
+            (words[window_start:window_end], ner_result, start - window_start, end - window_start)
+            for window_start, start, end, window_end in chunks
+        ]
 
-                #lev_score_corrected = score_corrected * (1 - ratio(corrected, original_word))
-                #lev_score_predicted = score_predicted * (1 - ratio(predicted_token, original_word))
+        # Cuda can not be used in forked processes, spawned workers would each hold a copy of the model on the gpu
+        if 'cuda' in self.device:
+            print(f"[TextCorrector] workers={self.workers} wird auf cuda nicht genutzt, korrigiere {len(chunks)} Abschnitte seriell")
+            return [w for task in tasks for w in self._correct(*task)]
 
-                #_, best_word = max([
-                #    (score_corrected + lev_score_corrected, corrected),
-                #    (score_predicted + lev_score_predicted, predicted_token),
-                #], key=lambda x: x[0])
+        # A fork copies locks held by other threads (ModelRegistry, SqliteCache, tokenizers), the child could deadlock
+        if "fork" not in multiprocessing.get_all_start_methods() or sys.platform == "darwin" or threading.active_count() > 1:
+            print(f"[TextCorrector] Korrigiere {len(chunks)} Abschnitte mit {self.workers} gestarteten Prozessen")
+            results = self._spawned_pool().map(_correct_chunk, *zip(*tasks))
+
+            return [w for result in results for w in result]
+
+        print(f"[TextCorrector] Korrigiere {len(chunks)} Abschnitte mit {self.workers} Prozessen")
+        _worker_corrector = self
+        try:
+            with multiprocessing.get_context("fork").Pool(min(self.workers, len(tasks)), initializer=_init_chunk_worker) as pool:
+                results = pool.starmap(_correct_chunk, tasks)
+        finally:
+            _worker_corrector = None
+
+        return [w for result in results for w in result]
+
+    def _worker_config(self) -> dict:
+        """
+        Constructor parameters of the correctors in spawned workers. NER runs before the chunking in this process
+        """
+        return {
+            "batch_scoring": self.batch_scoring,
+            "score_batch_size": self.score_batch_size,
+            "compiled_dir": os.path.abspath(self.compiled_dir),
+            "candidate_cache": self.candidate_cache,
+            "names": self.names,
+        }
+
+    def _spawned_pool(self) -> ProcessPoolExecutor:
+        """
+        Pool of spawned chunk workers, started on first use and kept warm until close()
+        """
+        if self._chunk_pool is None:
+            self._chunk_pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_spawned_chunk_worker,
+                initargs=(self._worker_config(), max(1, (os.cpu_count() or 1) // self.workers)),
+            )
+
+        return self._chunk_pool
+
+    def process(self, data: dict) -> list:
+        texts: list = data.get('text-recognizer', [])
+
+        if self.hunspell is None:
+            raise Exception('Warmup Phase missing')
+
+        words, ner_result = self._preprocess(texts)
+
+        if self.workers > 1 and len(words) > self.chunk_words:
+            corrected_words = self._correct_parallel(words, ner_result)
+        else:
+            corrected_words = self._correct(words, ner_result, 0, len(words))
 
-                corrected_words.append(best)
-            except Exception as e:
-                print("[TextCorrector] an Error occured during text reparation", e)
-    
         if self.debug:
             debug_path = os.path.join(self.debug_folder, "debug_textcorrector.txt")
             with open(debug_path, "w", encoding="utf-8") as f:
@@ -3,21 +3,42 @@ import torch
 import cv2
 from PIL import Image
 from transformers import TrOCRProcessor, VisionEncoderDecoderModel
+from libs.model_registry import get_model_registry
 from .module_base import Module
 
+ONNX_EXPORT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data", "cache", "onnx"))
+
 class TextRecognizer(Module):
     """
     Nutzt das TrOCR-Modell zur Handschriftenerkennung in Bildausschnitten.
     Erkennt den Text und erstellt optional ein Debug-Log, das die 
     erkannten Ergebnisse auflistet.
+    Zeilen werden nach Seitenverhältnis sortiert und in Batches von maximal
+    batch_size Bildern erkannt.
+
+    Backends:
+    - "torch": fp32 PyTorch Modell
+    - "int8": Linear-Layer des Decoders dynamisch auf INT8 quantisiert (nur CPU)
+    - "onnx": Encoder und Decoder (mit KV-Cache) als ONNX Export, ausgeführt mit ONNX Runtime (benötigt optimum)
     """
-    _model_cache: dict[str, tuple[TrOCRProcessor, VisionEncoderDecoderModel]] = {}
+    cacheable = True
+    streamable = True
+    cache_ignore = Module.cache_ignore + ('batch_size',)
 
-    def __init__(self, model_name="fhswf/TrOCR_german_handwritten", debug=False, debug_folder="debug/debug_textrecognizer"):
+    BACKENDS = ("torch", "int8", "onnx")
+
+    def __init__(self, model_name="fhswf/TrOCR_german_handwritten", batch_size=8, backend="torch", debug=False, debug_folder="debug/debug_textrecognizer"):
         super().__init__("text-recognizer")
 
-        self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unbekanntes Backend: {backend}")
+
+        # Quantized and ONNX Runtime models only run on the CPU
+        self.device = 'cuda' if torch.cuda.is_available() and backend == "torch" else 'cpu'
+        self.backend = backend
         self.model_name = model_name
+        self.batch_size = max(1, batch_size)
+        self.stream_batch_size = self.batch_size
         self.debug = debug
         self.debug_folder = debug_folder
         self.model = None
@@ -27,27 +48,84 @@ class TextRecognizer(Module):
             os.makedirs(self.debug_folder, exist_ok=True)
 
     def _warmup(self):
-        self.processor, self.model = self._get_processor_and_model(self.model_name)
+        self.processor, self.model = self._get_processor_and_model(self.model_name, self.backend, owner=self)
+
+    def _release(self):
+        self.processor = None
+        self.model = None
 
     @classmethod
-    def _get_processor_and_model(cls, model_name: str) -> tuple[TrOCRProcessor, VisionEncoderDecoderModel]:
+    def _get_processor_and_model(cls, model_name: str, backend: str = "torch", owner=None) -> tuple[TrOCRProcessor, VisionEncoderDecoderModel]:
         """
-        Lädt Prozessor und Modell nur einmal pro model_name und cached sie.
+        Lädt Prozessor und Modell nur einmal pro model_name und Backend über die ModelRegistry.
         """
-        if model_name not in cls._model_cache:
+        def load():
             processor = TrOCRProcessor.from_pretrained(model_name)
-            model = VisionEncoderDecoderModel.from_pretrained(model_name)
-            cls._model_cache[model_name] = (processor, model)
+            if backend == "onnx":
+                model = cls._load_onnx_model(model_name)
+            else:
+                model = VisionEncoderDecoderModel.from_pretrained(model_name)
+                if backend == "int8":
+                    model = cls._quantize_decoder(model)
+
+            return processor, model
+
+        return get_model_registry().get(f"trocr:{model_name}:{backend}", load, owner=owner)
+
+    @staticmethod
+    def _quantize_decoder(model: VisionEncoderDecoderModel) -> VisionEncoderDecoderModel:
+        """
+        Quantisiert die Linear-Layer des Decoders dynamisch auf INT8.
+        Der Decoder läuft autoregressiv pro Token und dominiert die Laufzeit auf der CPU
+        """
+        model.eval()
+        model.decoder = torch.ao.quantization.quantize_dynamic(model.decoder, {torch.nn.Linear}, dtype=torch.qint8)
+
+        return model
 
-        return cls._model_cache[model_name]
+    @staticmethod
+    def _load_onnx_model(model_name: str):
+        """
+        Exportiert Encoder und Decoder (mit KV-Cache) einmalig nach ONNX und lädt sie mit ONNX Runtime
+        """
+        # pylint: disable=import-outside-toplevel
+        try:
+            from optimum.onnxruntime import ORTModelForVision2Seq
+        except ImportError as e:
+            raise ImportError("Das ONNX Backend benötigt 'optimum[onnxruntime]'") from e
+
+        export_dir = os.path.join(ONNX_EXPORT_DIR, model_name.replace("/", "__"))
+        if os.path.exists(export_dir):
+            return ORTModelForVision2Seq.from_pretrained(export_dir, use_cache=True)
+
+        print(f"[TextRecognizer] Exportiere {model_name} nach ONNX: {export_dir}")
+        model = ORTModelForVision2Seq.from_pretrained(model_name, export=True, use_cache=True)
+        model.save_pretrained(export_dir)
+
+        return model
     
     def get_preconditions(self) -> list[str]:
         return ['line-prepared']
+
+    def _bucket_batches(self, images: list) -> list[list[int]]:
+        """
+        Groups image indices into batches of similar aspect ratio.
+        Lines of similar width hold a similar amount of text, so generate() of one
+        batch does not wait long for a single much longer line
+        """
+        order = sorted(range(len(images)), key=lambda idx: images[idx].shape[1] / max(1, images[idx].shape[0]))
+
+        return [order[i:i + self.batch_size] for i in range(0, len(order), self.batch_size)]
     
     def process(self, data: dict) -> list:
         images: list = data.get('line-prepared', [])
 
-        texts = []
+        return self.process_batch(images, 0)
+
+    def process_batch(self, items: list, start_idx: int) -> list:
+        """
+        Recognizes the text of a chunk of line images, start_idx is the position of items[0] in the whole list
+        """
         debug_log = []
 
         if self.model is None or self.processor is None:
@@ -55,23 +133,31 @@ class TextRecognizer(Module):
 
         self.model.to(self.device)
 
-        for idx, img in enumerate(images):
-            pil_img = Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
-            inputs = self.processor(images=pil_img, return_tensors="pt")
+        texts = [""] * len(items)
+        for batch in self._bucket_batches(items):
+            pil_imgs = [Image.fromarray(cv2.cvtColor(items[idx], cv2.COLOR_BGR2RGB)) for idx in batch]
+            # The processor resizes every line to the encoder input size, so the batch stacks into one tensor
+            inputs = self.processor(images=pil_imgs, return_tensors="pt")
             pixel_values = inputs.pixel_values.to(torch.device(self.device))
 
             with torch.no_grad():
                 generated_ids = self.model.generate(pixel_values)
 
-            text = self.processor.batch_decode(generated_ids, skip_special_tokens=True)[0]
-            texts.append(text)
+            batch_texts = self.processor.batch_decode(generated_ids, skip_special_tokens=True)
+            for idx, text in zip(batch, batch_texts):
+                texts[idx] = text
+
+        for idx, text in enumerate(texts, start=start_idx):
             print(f"[TextRecognizer] Erkannt für Bild {idx}: {text}")
             if self.debug:
                 debug_log.append(f"Bild {idx}: {text}")
 
         if self.debug:
             debug_path = os.path.join(self.debug_folder, "debug_textrecognizer.txt")
-            with open(debug_path, "w", encoding="utf-8") as f:
+            # Streamed chunks are appended to the log of the first chunk
+            with open(debug_path, "w" if start_idx == 0 else "a", encoding="utf-8") as f:
+                if start_idx > 0:
+                    f.write("\n")
                 f.write("\n".join(debug_log))
             print(f"[TextRecognizer] Debug-Log gespeichert in: {debug_path}")
 
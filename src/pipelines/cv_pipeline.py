@@ -1,33 +1,111 @@
+import os
 import re
-import cv2
+import itertools
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable
+import numpy as np
+import torch
 
-from libs.file_helper import normalize_paths
+from libs.file_helper import iter_pages, DEFAULT_DPI
+from libs.stage_cache import StageCache
+from libs.profiling import PipelineProfiler
 from .pipeline import Pipeline
 
+# Pipeline of the current worker process, see _init_worker
+_worker_pipeline: Pipeline | None = None
+
+def _init_worker(stages: list, num_threads: int, stage_cache: StageCache | None, scheduler: str):
+    """
+    Builds and warms up the pipeline once per worker process
+    """
+    global _worker_pipeline # pylint: disable=global-statement
+
+    torch.set_num_threads(num_threads)
+
+    _worker_pipeline = CVPipeline(stage_cache=stage_cache, scheduler=scheduler)
+    for stage in stages:
+        _worker_pipeline.add_stage(stage)
+
+    _worker_pipeline.open()
+
+def _run_worker_page(image: np.ndarray):
+    """
+    Runs the warm worker pipeline for a single page
+    """
+    return _worker_pipeline.run(image)
+
 class CVPipeline(Pipeline):
     """
     Stellt eine modulare Pipeline zusammen, in der verschiedene Verarbeitungsschritte
     (Klassen mit einer process()-Methode) sequentiell ausgeführt werden.
     """
-    def __init__(self, input_data: dict | None = None):
-        super().__init__(input_data)
-    
-    def run_and_save_text(self, paths: list[str], output_txt: str|None = None):
+    def __init__(self, input_data: dict | None = None, stage_cache: StageCache | None = None, profiler: PipelineProfiler | None = None,
+                 scheduler: str = "sequential", stream_queue_size: int = 8):
+        super().__init__(input_data, stage_cache, profiler, scheduler, stream_queue_size)
+
+    def _run_pages(self, pages: Iterable[np.ndarray]) -> list:
         """
-        Runs pipeline and saves final text in output file
+        Runs pipeline page by page in current process
         """
-        path_inputs = normalize_paths(paths)
-
         ret = []
-        for _input in path_inputs:
-            image = cv2.imread(_input)
-            if image is None:
-                raise ValueError(f"Bild konnte nicht geladen werden: {_input}")
-            
+        for image in pages:
             data = self.run(image)
 
             ret.append(data)
 
+        return ret
+
+    def _run_pages_parallel(self, pages: Iterable[np.ndarray], workers: int) -> list:
+        """
+        Spreads pages over a process pool. Every worker loads its models once
+        and keeps them warm for all of its pages. Results are in page order.
+        Stages running in the workers are not recorded by the profiler.
+        At most 2 * workers pages are rendered ahead, so memory stays bounded for long scans
+        """
+        num_threads = max(1, (os.cpu_count() or 1) // workers)
+        max_in_flight = 2 * workers
+
+        ret = []
+        # spawn: forking a process with initialized torch threads may deadlock
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.stages, num_threads, self.stage_cache, self.scheduler),
+        ) as executor:
+            in_flight = deque()
+            for image in pages:
+                in_flight.append(executor.submit(_run_worker_page, image))
+
+                if len(in_flight) >= max_in_flight:
+                    ret.append(in_flight.popleft().result())
+
+            while in_flight:
+                ret.append(in_flight.popleft().result())
+
+        return ret
+
+    def run_and_save_text(self, paths: list[str], output_txt: str|None = None, workers: int = 1,
+                          dpi: int = DEFAULT_DPI, thread_count: int = 1, window: int | None = None):
+        """
+        Runs pipeline and saves final text in output file.
+        Pdfs are rendered in memory window pages at a time with the given dpi and pdftoppm thread count.
+        pdf2image splits its threads over the pages of a window, so window defaults to thread_count.
+        With workers > 1 and more than one page the pages are processed in parallel by a process pool
+        """
+        pages = iter_pages(paths, dpi=dpi, thread_count=thread_count, window=window or max(1, thread_count))
+
+        # A pool for a single page would only load every model once more
+        head = list(itertools.islice(pages, 2))
+        pages = itertools.chain(head, pages)
+
+        if workers > 1 and len(head) > 1:
+            ret = self._run_pages_parallel(pages, workers)
+        else:
+            ret = self._run_pages(pages)
+
         full_text = ""
         for page in ret:
             if not isinstance(page, list):
@@ -36,21 +114,21 @@ class CVPipeline(Pipeline):
             for word in page:
                 if not isinstance(word, str):
                     raise ValueError("Das Endergebnis der Pipeline entspricht nicht der erwarteten Textliste.")
-                
+
                 full_text += " " + word
-            
+
             full_text += "\n"
-        
+
         # Wrong place but fine for now -> better: have post-process modules
         full_text = re.sub(r'\s*([\n])\s*', r' \1', full_text)
         #full_text = re.sub(r'\s*([.,!?;:()\[\]{}"“”])\s*', r'\1 ', full_text)
-        
+
         if output_txt is not None:
             with open(output_txt, "w", encoding="utf-8") as f:
                 f.write(full_text)
 
                 print(f"[CVPipeline] Erkannt Texte gespeichert in: {output_txt}")
-            
+
         if len(ret) == 1:
             return ret[0], full_text
 
@@ -1,3 +1,4 @@
+import asyncio
 from typing import Dict
 import streamlit as st
 
@@ -39,14 +40,34 @@ class LLMTextExtractorPipeline(LLMPipeline):
     """
     Pipeline zur Extraktion der Musterlösung aus dem Schülertext
     Sollte im Streamlit Kontext verwendet werden
+    Die Aufgaben werden parallel extrahiert, maximal max_concurrency Anfragen gleichzeitig
     TODO: -> Input sollte Schülertext, splitted Musterlösung enthalten
-          -> Extraktion sollte async parallel bearbeitet werden
     """
-    def __init__(self, llmClient: LanguageClient, input_data: dict | None = None):
+    def __init__(self, llmClient: LanguageClient, input_data: dict | None = None, max_concurrency: int = 4):
         super().__init__(llmClient, input_data)
 
+        self.max_concurrency = max(1, max_concurrency)
         self.add_stage(LLMExtraction(language_client=llmClient, debug=False))
 
+    async def _extract_tasks(self, task_inputs: dict[str, dict], on_done) -> dict:
+        """
+        Sends all task extractions at once, on_done(task_id, finished) is called as they finish
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def _extract(task_id: str, data: dict):
+            async with semaphore:
+                return task_id, await self.arun_isolated(data)
+
+        results = {}
+        for future in asyncio.as_completed([_extract(task_id, data) for task_id, data in task_inputs.items()]):
+            task_id, response = await future
+            results[task_id] = response
+            on_done(task_id, len(results))
+
+        # Keep order of the tasks
+        return {task_id: results[task_id] for task_id in task_inputs}
+
     def process_solutions(self, model_solution: ModelSolution) -> Dict[str, any]:
         """
         Processes model and student solutions to generate LLM prompts.
@@ -62,7 +83,6 @@ class LLMTextExtractorPipeline(LLMPipeline):
 
         raw_student_text = full_text
 
-        llm_responses = {}
         print(f"Processing Assignment: {model_solution.assignment_title or 'N/A'}")
         print(f"Subject: {model_solution.subject or 'N/A'}\n")
 
@@ -70,21 +90,20 @@ class LLMTextExtractorPipeline(LLMPipeline):
         model_tasks = [task for task in model_solution.solutions if task.number is not None]
         total_tasks = len(model_tasks)
 
-        # Loop through the valid tasks
-        with st.status("Starte Aufgabenverarbeitung...", expanded=True) as status:
-            for j, model_task in enumerate(model_tasks):
-                task_id_str = str(model_task.number)
-                combined_model_solution = _combine_task_solution_text(model_task)
-                data = {"student_text": raw_student_text, "solution_text": combined_model_solution}
+        task_inputs = {}
+        for model_task in model_tasks:
+            combined_model_solution = _combine_task_solution_text(model_task)
+            task_inputs[str(model_task.number)] = {"student_text": raw_student_text, "solution_text": combined_model_solution}
 
+        with st.status("Starte Aufgabenverarbeitung...", expanded=True) as status:
+            def _on_done(task_id_str: str, finished: int):
                 # Progress update
-                progress = (j + 1) / len(model_tasks)
-                progress_bar.progress(progress)
-                status.update(label=f"Verarbeite Aufgabe: {j+1} von {total_tasks}")
-
-                llm_responses[task_id_str] = self.run(data)
+                progress_bar.progress(finished / total_tasks)
+                status.update(label=f"Verarbeite Aufgabe: {finished} von {total_tasks}")
                 print(f"Generated prompt for Task {task_id_str} (using full student text).")
 
+            llm_responses = asyncio.run(self._extract_tasks(task_inputs, _on_done))
+
         st.success("Alle Aufgaben verarbeitet!")
 
         return llm_responses
@@ -1,21 +1,60 @@
+import asyncio
 from libs.language_client import LanguageClient
+from libs.profiling import PipelineProfiler
 from .pipeline import Pipeline
 
 class LLMPipeline(Pipeline):
     """
     Basic LLM Pipeline Interface
     """
-    def __init__(self, llm_client: LanguageClient, input_data: dict | None = None):
-        super().__init__(input_data)
+    def __init__(self, llm_client: LanguageClient, input_data: dict | None = None, profiler: PipelineProfiler | None = None):
+        super().__init__(input_data, profiler=profiler)
 
         self.llm_client = llm_client
 
-    def run(self, input_data = None):
+    def _run(self, input_data, run_id: int | None):
         self.data['input'] = input_data
         for module in self.stages:
             super()._check_condition(module)
+            self._warmup_stage(module, run_id)
 
-            self.data[module.module_key] = module.process(self.data['input'], self.llm_client)
+            with self._profile_stage(module.module_key, run_id) as record:
+                self.data[module.module_key] = module.process(self.data['input'], self.llm_client)
+                self._record_output(record, self.data[module.module_key])
 
         # Output is result of last stage
         return self.data[self.stages[-1].module_key]
+
+    def run_isolated(self, input_data = None):
+        """
+        Executes pipeline without sharing self.data, so it can run concurrently
+        """
+        data = {'input': input_data}
+        with self._profile_run() as run_id:
+            for module in self.stages:
+                self._warmup_stage(module, run_id)
+
+                with self._profile_stage(module.module_key, run_id) as record:
+                    data[module.module_key] = module.process(data['input'], self.llm_client)
+                    self._record_output(record, data[module.module_key])
+
+        return data[self.stages[-1].module_key]
+
+    async def arun_isolated(self, input_data = None):
+        """
+        Async variant of run_isolated(). Modules without aprocess() run in a worker thread
+        """
+        data = {'input': input_data}
+        with self._profile_run() as run_id:
+            for module in self.stages:
+                self._warmup_stage(module, run_id)
+
+                # CPU time is process-wide and includes concurrent runs
+                with self._profile_stage(module.module_key, run_id) as record:
+                    if hasattr(module, 'aprocess'):
+                        data[module.module_key] = await module.aprocess(data['input'], self.llm_client)
+                    else:
+                        data[module.module_key] = await asyncio.to_thread(module.process, data['input'], self.llm_client)
+                    self._record_output(record, data[module.module_key])
+
+        return data[self.stages[-1].module_key]
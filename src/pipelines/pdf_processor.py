@@ -3,7 +3,7 @@ import os
 import streamlit as st
 
 from libs.file_helper import save_temp_file, normalize_paths
-from libs.language_client import LanguageClient
+from libs.language_client import get_language_client
 from models.parser.assignment_sheet import AssignmentSheet  # aufgabenblatt
 from models.parser.model_solution import ModelSolution  # musterlösung/erwartungshorizont
 from models.parser.schulbuch_seite import SchulbuchSeite # Schulbuch not needed yet
@@ -12,8 +12,6 @@ from modules.structured_document_parser import StructuredDocumentParser
 
 from .llm_pipeline import LLMPipeline
 
-client = LanguageClient()
-
 class PdfProcessorPipeline(LLMPipeline):
     """
     Png Processing Pipeline mit vordefinierten Stages.
@@ -66,7 +64,7 @@ class PdfProcessorPipeline(LLMPipeline):
                     st.error("Unkown Use Case")
                     return
                 
-                parser = StructuredDocumentParser(schema_model=schema, prompt=prompt, debug=False, llm_client=client, callback = update_progress)
+                parser = StructuredDocumentParser(schema_model=schema, prompt=prompt, debug=False, llm_client=get_language_client(), callback = update_progress, speculative=True)
                 
                 try:
                     final_solution = parser.process({"paths": paths})
@@ -1,24 +1,121 @@
-import torch
+import json
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import nullcontext, ExitStack
 
 from modules.module_base import Module
+from libs.stage_cache import StageCache, digest
+from libs.model_registry import get_model_registry, empty_cuda_cache
+from libs.profiling import PipelineProfiler
+from .streaming import feeds, is_streamable_chain, run_streaming_chain
 
 class Pipeline:
     """
     Stellt eine modulare Pipeline zusammen, in der verschiedene Verarbeitungsschritte
     (Klassen mit einer process()-Methode) sequentiell ausgeführt werden.
+
+    Lifecycle: open() lädt die Modelle aller Stages einmalig, run() kann danach beliebig
+    oft ausgeführt werden, close() gibt die Modelle wieder frei.
+
+    Mit einem StageCache werden Ausgaben cachebarer Stages auf der Festplatte gespeichert.
+    Bei einem erneuten Lauf mit gleichem Input werden nur Stages ab der ersten
+    geänderten Stage neu berechnet.
+
+    Mit einem PipelineProfiler werden Laufzeit, CPU-Zeit, Speicher und Ausgabegröße
+    jeder Stage pro Lauf erfasst.
+
+    Scheduler:
+    - "sequential": jede Stage verarbeitet ihre ganze Liste, bevor die nächste startet
+    - "streaming": aufeinanderfolgende zeilenweise Stages (Module.streamable) laufen parallel
+      und reichen ihre Zeilen über begrenzte Queues (stream_queue_size) weiter
+    - "dag": Stages laufen, sobald ihre get_preconditions() erfüllt sind. Unabhängige Stages
+      (z.B. zwei Zweige auf horizontal-cutter) laufen parallel in einem Thread-Pool (dag_workers).
+      Zwischenergebnisse werden aus self.data entfernt, sobald keine weitere Stage sie benötigt.
+      Stages dürfen ihre Eingaben dann nicht in-place verändern
     """
-    def __init__(self, input_data: dict | None = None):
+    SCHEDULERS = ("sequential", "streaming", "dag")
+
+    def __init__(self, input_data: dict | None = None, stage_cache: StageCache | None = None, profiler: PipelineProfiler | None = None,
+                 scheduler: str = "sequential", stream_queue_size: int = 8, dag_workers: int = 4):
+        if scheduler not in self.SCHEDULERS:
+            raise ValueError(f"Unbekannter Scheduler: {scheduler}")
+
         self.stages: list[Module] = []
         self.data: dict = {}
+        self.stage_cache = stage_cache
+        self.profiler = profiler
+        self.scheduler = scheduler
+        self.stream_queue_size = stream_queue_size
+        self.dag_workers = max(1, dag_workers)
         if input_data is not None:
             self.data = input_data
-    
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def add_stage(self, stage):
         """
         Add module to pipeline
         """
         self.stages.append(stage)
-    
+
+    def open(self):
+        """
+        Warms up all stages once. Already warm stages are skipped
+        """
+        for module in self.stages:
+            module.warmup()
+
+    def warmup(self):
+        """
+        Alias of open()
+        """
+        self.open()
+
+    def close(self):
+        """
+        Frees models of all stages
+        """
+        for module in self.stages:
+            module.close()
+
+        empty_cuda_cache()
+
+    def _profile_run(self):
+        """
+        Profiler context of a whole run, yields the run id (None without profiler)
+        """
+        if self.profiler is None:
+            return nullcontext(None)
+
+        return self.profiler.run(type(self).__name__)
+
+    def _profile_stage(self, stage_key: str, run_id: int | None):
+        """
+        Profiler context of a single stage, yields the stage record (None without profiler)
+        """
+        if self.profiler is None:
+            return nullcontext(None)
+
+        return self.profiler.stage(stage_key, run_id)
+
+    def _warmup_stage(self, module: Module, run_id: int | None):
+        """
+        Warms up module, loading time is profiled separately from process()
+        """
+        if module.is_warm:
+            return
+
+        with self._profile_stage(f"{module.module_key}.warmup", run_id):
+            module.warmup()
+
+    def _record_output(self, record: dict | None, value):
+        if record is not None:
+            self.profiler.set_output(record, value)
+
     def _check_condition(self, module: Module):
         """
         Check if all precondition of current module in pipeline is fulfilled
@@ -27,21 +124,238 @@ class Pipeline:
             if self.data.get(condition, None) is None:
                 raise Exception(f"Precondition of ${module.module_key} not fulfilled")
 
+    def _cache_keys(self, input_data) -> dict[str, str]:
+        """
+        Builds a cache key per stage. A key covers the input and all previous stages,
+        since stages may work on data of earlier stages in place
+        """
+        chain = digest(input_data)
+        keys = {'input': chain}
+        for module in self.stages:
+            fingerprint = json.dumps(
+                [type(module).__qualname__, module.get_cache_params()],
+                sort_keys=True,
+                default=str
+            )
+            chain = self.stage_cache.key(chain, fingerprint)
+            keys[module.module_key] = chain
+
+        return keys
+
+    def _resume_index(self, keys: dict[str, str]) -> int:
+        """
+        Returns index of the last cacheable stage with a cached output, -1 if none
+        """
+        for idx in range(len(self.stages) - 1, -1, -1):
+            module = self.stages[idx]
+            if module.cacheable and self.stage_cache.contains(keys[module.module_key]):
+                return idx
+
+        return -1
+
+    def _load_cached(self, module: Module, keys: dict[str, str]) -> bool:
+        """
+        Loads output of module from cache into self.data
+        """
+        hit, value = self.stage_cache.get(keys[module.module_key])
+        if hit:
+            print(f"[Pipeline] Cache-Treffer für {module.module_key}")
+            self.data[module.module_key] = value
+
+        return hit
+
+    def _load_missing_preconditions(self, module: Module, keys: dict[str, str], skipped: list[Module]):
+        """
+        Loads preconditions produced by skipped stages from cache
+        """
+        for condition in module.get_preconditions():
+            if self.data.get(condition, None) is not None:
+                continue
+
+            for producer in skipped:
+                if producer.module_key == condition and producer.cacheable:
+                    self._load_cached(producer, keys)
+
     def run(self, input_data = None):
         """
         Executes pipeline
         """
+        with self._profile_run() as run_id:
+            return self._run(input_data, run_id)
+
+    def _run(self, input_data, run_id: int | None):
         self.data['input'] = input_data
-        for module in self.stages:
+
+        keys = None
+        start = 0
+        if self.stage_cache is not None:
+            keys = self._cache_keys(input_data)
+            # Outputs of previous runs must not leak into this one
+            for module in self.stages:
+                self.data.pop(module.module_key, None)
+
+            resume = self._resume_index(keys)
+            if resume >= 0 and self._load_cached(self.stages[resume], keys):
+                start = resume + 1
+
+        if self.scheduler == "dag":
+            self._run_dag(self.stages[start:], keys, self.stages[:start], run_id)
+            return self.data[self.stages[-1].module_key]
+
+        idx = start
+        while idx < len(self.stages):
+            module = self.stages[idx]
+            if keys is not None:
+                self._load_missing_preconditions(module, keys, self.stages[:start])
+
             self._check_condition(module)
 
-            # Init of models should be moved there
-            if hasattr(module, '_warmup'):
-                module._warmup()
+            chain = self._streaming_chain(idx)
+            if chain:
+                self._run_chain(chain, run_id)
+            else:
+                chain = [module]
+                self._run_stage(module, run_id)
 
-            self.data[module.module_key] = module.process(self.data)
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
+            if keys is not None:
+                for stage in chain:
+                    if stage.cacheable:
+                        self.stage_cache.set(keys[stage.module_key], self.data[stage.module_key])
+
+            idx += len(chain)
 
         # Output is result of last stage
         return self.data[self.stages[-1].module_key]
+
+    def _run_stage(self, module: Module, run_id: int | None):
+        self.data[module.module_key] = self._process_stage(module, run_id)
+
+    def _process_stage(self, module: Module, run_id: int | None):
+        """
+        Runs process() of module and returns its output
+        """
+        # Models of the running stage must not be evicted by other pipelines
+        with get_model_registry().in_use(module):
+            # No-op if stage is already warm, see open()
+            self._warmup_stage(module, run_id)
+
+            with self._profile_stage(module.module_key, run_id) as record:
+                output = module.process(self.data)
+                self._record_output(record, output)
+
+        empty_cuda_cache()
+
+        return output
+
+    @staticmethod
+    def _dependencies(stages: list[Module]) -> dict[str, set[str]]:
+        """
+        Dependency graph of stages: module key -> keys of the stages producing its preconditions
+        """
+        producers = {module.module_key for module in stages}
+
+        return {
+            module.module_key: {c for c in module.get_preconditions() if c in producers and c != module.module_key}
+            for module in stages
+        }
+
+    def _run_dag(self, stages: list[Module], keys: dict[str, str] | None, skipped: list[Module], run_id: int | None):
+        """
+        Runs every stage as soon as all of its producers are finished.
+        Stage outputs are stored by the calling thread only, workers just read self.data
+        """
+        dependencies = self._dependencies(stages)
+        waiting = {module.module_key: len(dependencies[module.module_key]) for module in stages}
+        dependents = {module.module_key: [] for module in stages}
+        for key, producers in dependencies.items():
+            for producer in producers:
+                dependents[producer].append(key)
+
+        # Open reads per data key, the output of a stage is freed once all consumers are finished
+        readers: dict[str, int] = {}
+        for module in stages:
+            for condition in set(module.get_preconditions()):
+                readers[condition] = readers.get(condition, 0) + 1
+
+        intermediates = {module.module_key for module in self.stages[:-1]}
+        by_key = {module.module_key: module for module in stages}
+
+        with ThreadPoolExecutor(max_workers=self.dag_workers, thread_name_prefix="pipeline-dag") as executor:
+            running = {}
+
+            def submit_ready():
+                for key in [key for key, count in waiting.items() if count == 0]:
+                    module = by_key[key]
+                    del waiting[key]
+
+                    if keys is not None:
+                        self._load_missing_preconditions(module, keys, skipped)
+
+                    self._check_condition(module)
+                    running[executor.submit(self._process_stage, module, run_id)] = module
+
+            submit_ready()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    module = running.pop(future)
+                    self.data[module.module_key] = future.result()
+
+                    if keys is not None and module.cacheable:
+                        self.stage_cache.set(keys[module.module_key], self.data[module.module_key])
+
+                    for dependent in dependents[module.module_key]:
+                        waiting[dependent] -= 1
+
+                    for condition in set(module.get_preconditions()):
+                        readers[condition] -= 1
+                        if readers[condition] == 0 and condition in intermediates:
+                            self.data.pop(condition, None)
+
+                submit_ready()
+
+        if waiting:
+            raise Exception(f"Zyklische Abhängigkeit zwischen den Stages: {', '.join(waiting)}")
+
+    def _streaming_chain(self, idx: int) -> list[Module]:
+        """
+        Returns the consecutive streamable stages starting at idx, each reading only the output
+        of its predecessor. Empty if there are none to stream
+        """
+        if self.scheduler != "streaming" or not self.stages[idx].streamable:
+            return []
+
+        end = idx + 1
+        while end < len(self.stages) and feeds(self.stages[end - 1], self.stages[end]):
+            end += 1
+
+        chain = self.stages[idx:end]
+
+        return chain if is_streamable_chain(chain) else []
+
+    def _run_chain(self, chain: list[Module], run_id: int | None):
+        """
+        Streams the input list of the first stage through all stages of chain.
+        Every following stage consumes the output of its predecessor
+        """
+        registry = get_model_registry()
+        with ExitStack() as stack:
+            for module in chain:
+                stack.enter_context(registry.in_use(module))
+                self._warmup_stage(module, run_id)
+
+            def stage_context(module: Module):
+                # Wall time of a streaming stage includes waiting for its predecessor
+                return self._profile_stage(module.module_key, run_id)
+
+            outputs = run_streaming_chain(
+                chain,
+                self.data.get(chain[0].stream_input_key(), []),
+                queue_size=self.stream_queue_size,
+                stage_context=stage_context,
+            )
+
+        for module in chain:
+            self.data[module.module_key] = outputs[module.module_key]
+
+        empty_cuda_cache()
@@ -0,0 +1,101 @@
+import queue
+import threading
+from contextlib import nullcontext
+from typing import Callable, ContextManager
+
+from modules.module_base import Module
+
+# Marks the end of a stream
+_END = object()
+
+def feeds(previous: Module, module: Module) -> bool:
+    """
+    True if module reads nothing but the output of previous, only then it can consume the stream of previous
+    """
+    return module.streamable and module.get_preconditions() == [previous.module_key]
+
+def is_streamable_chain(modules: list[Module]) -> bool:
+    """
+    True if modules are at least two streamable modules, each fed only by its predecessor
+    """
+    return (
+        len(modules) > 1
+        and modules[0].streamable
+        and all(feeds(previous, module) for previous, module in zip(modules, modules[1:]))
+    )
+
+def run_streaming_chain(
+    chain: list[Module],
+    items: list,
+    queue_size: int = 8,
+    stage_context: Callable[[Module], ContextManager] | None = None,
+) -> dict[str, list]:
+    """
+    Runs consecutive streamable modules concurrently, one thread per module.
+    The modules are connected by bounded queues in chain order: every module processes
+    chunks of stream_batch_size items with process_batch() and passes its outputs on
+    as soon as they are ready. Outputs which are None are dropped.
+    Returns the complete output list per module key
+    """
+    queues = [queue.Queue(maxsize=queue_size) for _ in chain]
+    outputs: dict[str, list] = {module.module_key: [] for module in chain}
+    errors: list[BaseException] = []
+
+    def worker(position: int, module: Module):
+        source = queues[position]
+        target = queues[position + 1] if position + 1 < len(chain) else None
+        received = 0
+        batch: list = []
+        item = None
+
+        def flush():
+            for output in module.process_batch(batch, received - len(batch)):
+                if output is None:
+                    continue
+
+                outputs[module.module_key].append(output)
+                if target is not None:
+                    target.put(output)
+
+            batch.clear()
+
+        try:
+            with stage_context(module) if stage_context is not None else nullcontext():
+                item = source.get()
+                while item is not _END:
+                    batch.append(item)
+                    received += 1
+                    if len(batch) >= module.stream_batch_size:
+                        flush()
+
+                    item = source.get()
+
+                if batch:
+                    flush()
+        except BaseException as e: # pylint: disable=broad-exception-caught
+            errors.append(e)
+            # Keep consuming, otherwise the upstream module blocks on the full queue
+            while item is not _END:
+                item = source.get()
+        finally:
+            if target is not None:
+                target.put(_END)
+
+    threads = [
+        threading.Thread(target=worker, args=(position, module), name=f"stream-{module.module_key}", daemon=True)
+        for position, module in enumerate(chain)
+    ]
+    for thread in threads:
+        thread.start()
+
+    for item in items:
+        queues[0].put(item)
+    queues[0].put(_END)
+
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        raise errors[0]
+
+    return outputs
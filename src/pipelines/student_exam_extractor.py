@@ -8,7 +8,9 @@ from modules.line_cropper import LineCropper
 from modules.line_prepare_recognizer import LinePrepareRecognizer
 from modules.text_recognizer import TextRecognizer
 from modules.text_corrector import TextCorrector
-from libs.file_helper import save_temp_file, normalize_paths
+from libs.file_helper import save_temp_file
+from libs.stage_cache import StageCache
+from libs.profiling import PipelineProfiler
 
 from models.parser.student_text import StudentText
 
@@ -19,16 +21,19 @@ class StudentExamProcessorPipeline(CVPipeline):
     Processing Pipeline mit vordefinierten Stages für die Schulaufgabe des Schülers.
     Sollte im Streamlit Kontext verwendet werden
     """
-    def __init__(self, input_data: dict | None = None):
-        super().__init__(input_data)
+    def __init__(self, input_data: dict | None = None, workers: int = 1, stage_cache: StageCache | None = None,
+                 profiler: PipelineProfiler | None = None, scheduler: str = "streaming"):
+        super().__init__(input_data, stage_cache, profiler, scheduler)
+
+        self.workers = workers
 
         self.add_stage(RedRemover(debug=False))
         self.add_stage(HorizontalCutterLineDetect(debug=False))
         self.add_stage(StrikeThroughCleaner(debug=False))
-        self.add_stage(LineCropper(debug=False))
+        self.add_stage(LineCropper(source_key='strike-through-cleaner', debug=False))
         self.add_stage(LinePrepareRecognizer(debug=True)) # sometimes good sometimes bad :/ 
         self.add_stage(TextRecognizer(debug=False))
-        self.add_stage(TextCorrector(debug=False))
+        self.add_stage(TextCorrector(batch_scoring=True, candidate_cache=True, debug=False))
 
     def process_streamlit(self, uploaded_files, file_type):
         """
@@ -41,13 +46,13 @@ class StudentExamProcessorPipeline(CVPipeline):
             path = save_temp_file(uploaded_file, prefix=file_type)
             paths.append(path)
 
-        paths = normalize_paths(paths)
+        # Pdfs are rendered page by page in memory by run_and_save_text
         if len(paths) == 0:
             return
         
         if not st.session_state.get(attribute_processed, False):
             with st.spinner("Verarbeite Scan..."):
-                _, full_text = self.run_and_save_text(paths)
+                _, full_text = self.run_and_save_text(paths, workers=self.workers)
 
                 student_text = StudentText(
                     raw_text=full_text
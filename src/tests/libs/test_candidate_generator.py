@@ -0,0 +1,110 @@
+# pylint: skip-file
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from libs.candidate_generator import CandidateGenerator
+from libs.sqlite_cache import SqliteCache
+
+def build_sources(checker_candidates=None, hunspell_suggestions=(), symspell_terms=(), segmented=None):
+    checker = MagicMock()
+    checker.candidates.return_value = checker_candidates
+
+    hunspell = MagicMock()
+    hunspell.suggest.side_effect = lambda word: iter(hunspell_suggestions)
+
+    symspell = MagicMock()
+    symspell.lookup.return_value = [MagicMock(term=term) for term in symspell_terms]
+    symspell.word_segmentation.return_value = MagicMock(
+        corrected_string=segmented or "", distance_sum=1 if segmented else 99
+    )
+
+    return checker, hunspell, symspell
+
+class TestCandidateGenerator(unittest.TestCase):
+    def test_merges_sources_with_limits(self):
+        sources = build_sources(["hause"], ["Haus", "Hase", "Hausen", "Haube"], ["Haus", "Maus"], segmented="Ha use")
+        generator = CandidateGenerator(*sources, limits={"hunspell": 2})
+
+        result = generator.generate("Hauss")
+
+        self.assertFalse(result.known)
+        self.assertEqual(result.candidates, ["hause", "Haus", "Hase", "Maus"])
+        self.assertEqual(result.segmented, "Ha use")
+
+    def test_known_word(self):
+        checker, hunspell, symspell = build_sources({"Schule"})
+        generator = CandidateGenerator(checker, hunspell, symspell)
+
+        self.assertTrue(generator.generate("Schule").known)
+        hunspell.suggest.assert_not_called()
+
+    def test_results_are_memoized(self):
+        checker, hunspell, symspell = build_sources(["hause"], ["Haus"])
+        generator = CandidateGenerator(checker, hunspell, symspell)
+
+        first = generator.generate("Hauss")
+        second = generator.generate("Hauss")
+
+        self.assertEqual(first, second)
+        self.assertEqual(checker.candidates.call_count, 1)
+        self.assertEqual(generator.stats(), {"hits": 1, "misses": 1, "entries": 1})
+
+    def test_lru_is_bounded(self):
+        generator = CandidateGenerator(*build_sources(["x"]), lru_size=2)
+        for word in ["eins", "zwei", "drei"]:
+            generator.generate(word)
+
+        self.assertEqual(generator.stats()["entries"], 2)
+
+    def test_persistent_cache_is_shared(self):
+        cache = SqliteCache(path=":memory:", table="word_candidates")
+        checker, hunspell, symspell = build_sources(["hause"], ["Haus"])
+
+        CandidateGenerator(checker, hunspell, symspell, cache=cache).generate("Hauss")
+        # A new generator, e.g. in the next session, finds the result in the cache
+        result = CandidateGenerator(checker, hunspell, symspell, cache=cache).generate("Hauss")
+
+        self.assertEqual(result.candidates, ["hause", "Haus"])
+        self.assertEqual(checker.candidates.call_count, 1)
+
+        # Different dictionaries do not share results
+        CandidateGenerator(checker, hunspell, symspell, cache=cache, namespace="other").generate("Hauss")
+        self.assertEqual(checker.candidates.call_count, 2)
+
+    def test_deadline_stops_slow_source(self):
+        def slow_suggestions(word):
+            for suggestion in ["Haus", "Hase"]:
+                time.sleep(0.05)
+                yield suggestion
+
+        cache = SqliteCache(path=":memory:", table="word_candidates")
+        checker, hunspell, symspell = build_sources(["hause"])
+        hunspell.suggest.side_effect = slow_suggestions
+        generator = CandidateGenerator(checker, hunspell, symspell, deadlines={"hunspell": 0.01}, cache=cache)
+
+        result = generator.generate("Hauss")
+
+        self.assertEqual(result.candidates, ["hause", "Haus"])
+        self.assertFalse(result.complete)
+        # Incomplete results are not persisted
+        self.assertEqual(len(cache), 0)
+
+    def test_deadline_is_checked_between_suggestions(self):
+        def late_suggestions(word):
+            # Slow before the first suggestion, e.g. spylls on a long word
+            time.sleep(0.05)
+            yield from ["Haus", "Hase", "Hose"]
+
+        checker, hunspell, symspell = build_sources(["hause"])
+        hunspell.suggest.side_effect = late_suggestions
+        generator = CandidateGenerator(checker, hunspell, symspell, deadlines={"hunspell": 0.01})
+
+        result = generator.generate("Hauss")
+
+        # The late first suggestion is kept, the source is not asked for more
+        self.assertEqual(result.candidates, ["hause", "Haus"])
+        self.assertFalse(result.complete)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+# pylint: skip-file
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import cv2
+import numpy as np
+from PIL import Image
+
+from libs.file_helper import iter_pages
+
+def fake_convert_from_path(path, dpi, first_page, last_page, thread_count):
+    # Page number is encoded in the red channel
+    return [Image.new("RGB", (4, 3), (page, 0, 0)) for page in range(first_page, last_page + 1)]
+
+class TestIterPages(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.image_path = os.path.join(self.tmp_dir.name, "page.png")
+        cv2.imwrite(self.image_path, np.full((2, 2, 3), 7, dtype=np.uint8))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_image_is_loaded_as_bgr(self):
+        pages = list(iter_pages([self.image_path]))
+
+        self.assertEqual(len(pages), 1)
+        self.assertEqual(pages[0].shape, (2, 2, 3))
+
+    def test_unreadable_image_raises(self):
+        path = os.path.join(self.tmp_dir.name, "broken.png")
+        with open(path, "wb") as f:
+            f.write(b"no image")
+
+        with self.assertRaises(ValueError):
+            list(iter_pages([path]))
+
+    @patch("libs.file_helper.is_pdf", side_effect=lambda path: path.endswith(".pdf"))
+    @patch("libs.file_helper.pdfinfo_from_path", return_value={"Pages": 5})
+    @patch("libs.file_helper.convert_from_path", side_effect=fake_convert_from_path)
+    def test_pdf_is_rendered_lazily_in_windows(self, mock_convert, mock_info, mock_is_pdf):
+        pages = iter_pages(["scan.pdf", self.image_path], dpi=150, thread_count=2, window=2)
+
+        first = next(pages)
+        # Only the first window has been rendered
+        self.assertEqual(mock_convert.call_count, 1)
+        self.assertEqual(first.shape, (3, 4, 3))
+        # BGR order like cv2.imread
+        self.assertEqual(first[0, 0].tolist(), [0, 0, 1])
+
+        rest = list(pages)
+        self.assertEqual([page[0, 0, 2] for page in rest[:4]], [2, 3, 4, 5])
+        self.assertEqual(len(rest), 5)
+
+        windows = [(c.kwargs["first_page"], c.kwargs["last_page"]) for c in mock_convert.call_args_list]
+        self.assertEqual(windows, [(1, 2), (3, 4), (5, 5)])
+        self.assertEqual(mock_convert.call_args.kwargs["dpi"], 150)
+        self.assertEqual(mock_convert.call_args.kwargs["thread_count"], 2)
@@ -0,0 +1,60 @@
+# pylint: skip-file
+import os
+import base64
+import tempfile
+import unittest
+import cv2
+import numpy as np
+
+from libs.image_encoder import ImageEncoder
+
+def decode(data_url: str) -> tuple[str, np.ndarray]:
+    header, payload = data_url.split(",", 1)
+    image = cv2.imdecode(np.frombuffer(base64.b64decode(payload), dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+
+    return header, image
+
+class TestImageEncoder(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "page.png")
+        image = np.random.default_rng(0).integers(0, 255, (1000, 4000, 3), dtype=np.uint8)
+        cv2.imwrite(self.path, image)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_downscale_to_long_edge(self):
+        header, image = decode(ImageEncoder(max_long_edge=2000).encode(self.path))
+
+        self.assertEqual(header, "data:image/jpeg;base64")
+        self.assertEqual(image.shape, (500, 2000, 3))
+
+    def test_downscale_to_megapixels(self):
+        _, image = decode(ImageEncoder(max_long_edge=None, max_megapixels=1.0, format="png").encode(self.path))
+
+        self.assertEqual(image.shape, (500, 2000, 3))
+
+    def test_small_image_is_not_upscaled(self):
+        _, image = decode(ImageEncoder(max_long_edge=8000, format="png").encode(self.path))
+
+        self.assertEqual(image.shape, (1000, 4000, 3))
+
+    def test_grayscale(self):
+        _, image = decode(ImageEncoder(grayscale=True).encode(self.path))
+
+        self.assertEqual(image.ndim, 2)
+
+    def test_webp(self):
+        header, _ = decode(ImageEncoder(format="webp", quality=70).encode(self.path))
+
+        self.assertEqual(header, "data:image/webp;base64")
+
+    def test_original(self):
+        header, _ = decode(ImageEncoder(format="original").encode(self.path))
+
+        self.assertEqual(header, "data:image/png;base64")
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            ImageEncoder(format="gif")
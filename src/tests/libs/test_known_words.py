@@ -0,0 +1,45 @@
+# pylint: skip-file
+import os
+import tempfile
+import unittest
+
+from libs.known_words import KnownWords, normalize_word
+
+class TestKnownWords(unittest.TestCase):
+    def test_case_is_normalized(self):
+        known = KnownWords(["haus", "Schule"])
+
+        self.assertIn("Haus", known)
+        self.assertIn("HAUS", known)
+        self.assertIn("schule", known)
+        self.assertNotIn("Hauss", known)
+
+    def test_decomposed_umlauts(self):
+        known = KnownWords(["Mädchen"])
+
+        self.assertEqual(normalize_word("mädchen"), "mädchen")
+        self.assertIn("Mädchen", known)
+        # Umlauts are not stripped, a missing umlaut is a spelling error
+        self.assertNotIn("Madchen", known)
+
+    def test_short_words_are_not_known(self):
+        known = KnownWords(["bin", "hin", "Baum"], min_length=4)
+
+        self.assertNotIn("bin", known)
+        self.assertIn("Baum", known)
+        self.assertEqual(len(known), 1)
+
+    def test_from_files(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "symspell.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("abheben 175012\n12ukuorcybm 2\nschule 900\n")
+
+            known = KnownWords.from_files(path, word_forms=["Taschen"], min_frequency=5)
+
+        self.assertIn("Abheben", known)
+        self.assertIn("Taschen", known)
+        self.assertNotIn("12ukuorcybm", known)
+
+if __name__ == '__main__':
+    unittest.main()
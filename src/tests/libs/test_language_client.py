@@ -0,0 +1,104 @@
+# pylint: skip-file
+import os
+import sys
+import unittest
+from unittest.mock import patch, MagicMock
+import asyncio
+import groq
+import httpx
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
+
+from libs.language_client import LanguageClient
+from libs.sqlite_cache import SqliteCache
+from libs.rate_limiter import RateLimiter
+from models.parser.student_text import StudentText, Line
+
+class TestLanguageClientCache(unittest.TestCase):
+    @patch.dict(os.environ, {"GROQ_API_KEY": "test"})
+    def setUp(self):
+        self.client = LanguageClient(response_cache=SqliteCache(path=":memory:"))
+        self.client.client = MagicMock()
+        self.client.client.chat.completions.create.return_value = StudentText(lines=[Line(text="Hallo")])
+
+        self.messages = [{"role": "user", "content": "Transkribiere"}]
+
+    def test_cache_hit_skips_request(self):
+        first = self.client.get_response(self.messages, StudentText, temperature=0.0)
+        second = self.client.get_response(self.messages, StudentText, temperature=0.0)
+
+        self.assertEqual(self.client.client.chat.completions.create.call_count, 1)
+        self.assertIsInstance(second, StudentText)
+        self.assertEqual(first, second)
+        self.assertEqual(self.client.cache_stats()["hits"], 1)
+
+    def test_different_parameters_miss(self):
+        self.client.get_response(self.messages, StudentText, temperature=0.0)
+        self.client.get_response(self.messages, StudentText, temperature=0.2)
+        self.client.get_response(self.messages, StudentText, temperature=0.0, seed=1)
+
+        self.assertEqual(self.client.client.chat.completions.create.call_count, 3)
+
+def rate_limit_error(retry_after: str) -> groq.RateLimitError:
+    request = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after": retry_after}, request=request)
+
+    return groq.RateLimitError("Rate limit reached", response=response, body=None)
+
+class TestLanguageClientRetries(unittest.TestCase):
+    @patch.dict(os.environ, {"GROQ_API_KEY": "test"})
+    def setUp(self):
+        self.client = LanguageClient(rate_limiter=RateLimiter(6000, 1_000_000), max_retries=2)
+        self.client.client = MagicMock()
+        self.messages = [{"role": "user", "content": "Transkribiere"}]
+
+    @patch("libs.language_client.time.sleep")
+    def test_retry_after_is_honored(self, mock_sleep):
+        expected = StudentText(lines=[Line(text="Hallo")])
+        self.client.client.chat.completions.create.side_effect = [rate_limit_error("7"), expected]
+
+        result = self.client.get_response(self.messages, StudentText, temperature=0.0)
+
+        self.assertEqual(result, expected)
+        mock_sleep.assert_called_once_with(7.0)
+
+    @patch("libs.language_client.time.sleep")
+    def test_long_retry_after_is_not_retried(self, mock_sleep):
+        self.client.client.chat.completions.create.side_effect = rate_limit_error("120")
+
+        with self.assertRaises(groq.RateLimitError):
+            self.client.get_response(self.messages, StudentText, temperature=0.0)
+
+        self.assertEqual(self.client.client.chat.completions.create.call_count, 1)
+        mock_sleep.assert_not_called()
+
+    @patch("libs.language_client.time.sleep")
+    def test_gives_up_after_max_retries(self, mock_sleep):
+        self.client.client.chat.completions.create.side_effect = rate_limit_error("1")
+
+        with self.assertRaises(groq.RateLimitError):
+            self.client.get_response(self.messages, StudentText, temperature=0.0)
+
+        self.assertEqual(self.client.client.chat.completions.create.call_count, 3)
+
+    def test_validation_errors_are_not_retried(self):
+        self.client.client.chat.completions.create.side_effect = ValueError("invalid")
+
+        with self.assertRaises(ValueError):
+            self.client.get_response(self.messages, StudentText, temperature=0.0)
+
+        self.assertEqual(self.client.client.chat.completions.create.call_count, 1)
+
+    def test_async_response(self):
+        expected = StudentText(lines=[Line(text="Hallo")])
+        async_client = MagicMock()
+
+        async def create(**kwargs):
+            return expected
+
+        async_client.chat.completions.create.side_effect = create
+        self.client._async_client = MagicMock(return_value=async_client)
+
+        result = asyncio.run(self.client.aget_response(self.messages, StudentText, temperature=0.0))
+        self.assertEqual(result, expected)
+
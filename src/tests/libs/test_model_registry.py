@@ -0,0 +1,88 @@
+# pylint: skip-file
+import unittest
+import torch
+
+from modules.module_base import Module
+from libs.model_registry import ModelRegistry, estimate_size
+
+MB = 1024 * 1024
+
+def fake_model(size_mb: int) -> torch.nn.Module:
+    # float32 parameters, 4 bytes each
+    return torch.nn.Linear(size_mb * MB // 4, 1, bias=False)
+
+class OwnerModule(Module):
+    def __init__(self, registry, key, size_mb):
+        super().__init__(key)
+        self.registry = registry
+        self.size_mb = size_mb
+        self.model = None
+
+    def _warmup(self):
+        self.model = self.registry.get(self.module_key, lambda: fake_model(self.size_mb), owner=self)
+
+    def _release(self):
+        self.model = None
+
+    def get_preconditions(self) -> list[str]:
+        return ['input']
+
+class TestModelRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = ModelRegistry(budget_mb=10)
+
+    def test_estimate_size(self):
+        self.assertEqual(estimate_size(fake_model(2)), 2 * MB)
+        self.assertEqual(estimate_size((object(), fake_model(1))), MB)
+
+    def test_model_is_loaded_once(self):
+        loads = []
+        loader = lambda: loads.append(1) or fake_model(1)
+
+        first = self.registry.get("a", loader)
+        second = self.registry.get("a", loader)
+
+        self.assertIs(first, second)
+        self.assertEqual(len(loads), 1)
+
+    def test_least_recently_used_is_evicted_over_budget(self):
+        a = OwnerModule(self.registry, "a", 4)
+        b = OwnerModule(self.registry, "b", 4)
+        c = OwnerModule(self.registry, "c", 4)
+
+        a.warmup()
+        b.warmup()
+        # Touch a, b is now least recently used
+        self.registry.get("a", lambda: None)
+        c.warmup()
+
+        self.assertIn("a", self.registry)
+        self.assertNotIn("b", self.registry)
+        self.assertIn("c", self.registry)
+        self.assertLessEqual(self.registry.size_bytes(), 10 * MB)
+
+        # Owner of the evicted model is cold and loads it again on next warmup
+        self.assertFalse(b.is_warm)
+        self.assertIsNone(b.model)
+        b.warmup()
+        self.assertIn("b", self.registry)
+        self.assertEqual(self.registry.stats()["evictions"], 2)
+
+    def test_models_in_use_are_not_evicted(self):
+        a = OwnerModule(self.registry, "a", 6)
+        b = OwnerModule(self.registry, "b", 6)
+        a.warmup()
+
+        with self.registry.in_use(a):
+            b.warmup()
+
+        self.assertTrue(a.is_warm)
+        self.assertIn("a", self.registry)
+        self.assertIn("b", self.registry)
+
+    def test_no_budget_never_evicts(self):
+        registry = ModelRegistry(budget_mb=0)
+        for key in "abc":
+            registry.get(key, lambda: fake_model(8))
+
+        self.assertEqual(len(registry.stats()["models"]), 3)
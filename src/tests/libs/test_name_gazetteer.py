@@ -0,0 +1,36 @@
+# pylint: skip-file
+import unittest
+
+from libs.name_gazetteer import NameGazetteer
+
+class TestNameGazetteer(unittest.TestCase):
+    def setUp(self):
+        self.gazetteer = NameGazetteer(["Tim", "Marcia"])
+
+    def test_exact_match_ignores_case(self):
+        self.assertEqual(self.gazetteer.match("tim"), "Tim")
+        self.assertEqual(self.gazetteer.match("MARCIA"), "Marcia")
+
+    def test_misspelled_names(self):
+        self.assertEqual(self.gazetteer.match("Marzia"), "Marcia")
+        self.assertEqual(self.gazetteer.match("Timm"), "Tim")
+
+    def test_inflection_suffix_is_kept(self):
+        self.assertEqual(self.gazetteer.match("Tims"), "Tims")
+        self.assertEqual(self.gazetteer.match("Marcia's"), "Marcia's")
+        self.assertEqual(self.gazetteer.match("Marzias"), "Marcias")
+
+    def test_without_fuzzy_only_exact_names(self):
+        self.assertIsNone(self.gazetteer.match("Maria", fuzzy=False))
+        self.assertEqual(self.gazetteer.match("Maria"), "Marcia")
+        self.assertEqual(self.gazetteer.match("tims", fuzzy=False), "Tims")
+
+    def test_other_words(self):
+        for word in ["Tom", "im", "Mathe", "Team", "und"]:
+            self.assertIsNone(self.gazetteer.match(word), word)
+
+    def test_empty_gazetteer(self):
+        self.assertIsNone(NameGazetteer([]).match("Tim"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+# pylint: skip-file
+import os
+import json
+import tempfile
+import unittest
+from contextlib import contextmanager
+import numpy as np
+
+from libs.profiling import PipelineProfiler, output_size, cprofile_hook
+
+class TestPipelineProfiler(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.profiler = PipelineProfiler()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_output_size(self):
+        self.assertEqual(output_size(np.zeros((10, 10), dtype=np.uint8)), 100)
+        self.assertEqual(output_size(["abc", np.zeros(4, dtype=np.uint8)]), 7)
+        self.assertEqual(output_size(None), 0)
+
+    def test_stage_records(self):
+        with self.profiler.run() as run_id:
+            with self.profiler.stage("first", run_id) as record:
+                sum(range(100_000))
+                self.profiler.set_output(record, [1.0] * 3)
+
+        record = self.profiler.records[0]
+        self.assertEqual(record["stage"], "first")
+        self.assertEqual(record["run_id"], run_id)
+        self.assertGreater(record["wall_s"], 0)
+        self.assertGreaterEqual(record["cpu_s"], 0)
+        self.assertGreaterEqual(record["peak_rss_delta_bytes"], 0)
+        self.assertIn("output_bytes", record)
+        self.assertEqual(self.profiler.summary()["first"]["calls"], 1)
+
+    def test_failed_stage_is_recorded(self):
+        with self.assertRaises(ValueError):
+            with self.profiler.stage("broken", 0):
+                raise ValueError()
+
+        self.assertEqual(self.profiler.records[0]["stage"], "broken")
+
+    def test_hooks_wrap_selected_stage(self):
+        calls = []
+
+        @contextmanager
+        def hook(stage_key, run_id):
+            calls.append(("enter", stage_key))
+            yield
+            calls.append(("exit", stage_key))
+
+        self.profiler.add_hook("second", hook)
+        for key in ["first", "second"]:
+            with self.profiler.stage(key, 0):
+                pass
+
+        self.assertEqual(calls, [("enter", "second"), ("exit", "second")])
+
+    def test_cprofile_hook_writes_stats(self):
+        self.profiler.add_hook("*", cprofile_hook(self.tmp_dir.name))
+        with self.profiler.stage("first", 3):
+            sum(range(1000))
+
+        self.assertTrue(os.path.exists(os.path.join(self.tmp_dir.name, "first_3.prof")))
+
+    def test_report_and_chrome_trace(self):
+        with self.profiler.run("page") as run_id:
+            with self.profiler.stage("first", run_id):
+                pass
+
+        report_path = os.path.join(self.tmp_dir.name, "report.json")
+        trace_path = os.path.join(self.tmp_dir.name, "trace.json")
+        self.profiler.save_report(report_path)
+        self.profiler.save_chrome_trace(trace_path)
+
+        with open(report_path, encoding="utf-8") as f:
+            report = json.load(f)
+        self.assertEqual(report["runs"][0]["name"], "page")
+        self.assertEqual(report["stages"][0]["stage"], "first")
+
+        with open(trace_path, encoding="utf-8") as f:
+            events = json.load(f)["traceEvents"]
+        self.assertEqual({e["name"] for e in events}, {"page", "first"})
+        self.assertTrue(all(e["ph"] == "X" and "ts" in e and "dur" in e for e in events))
@@ -0,0 +1,30 @@
+# pylint: skip-file
+import asyncio
+import time
+import unittest
+
+from libs.rate_limiter import TokenBucket, RateLimiter
+
+class TestRateLimiter(unittest.TestCase):
+    def test_bucket_allows_burst_up_to_capacity(self):
+        bucket = TokenBucket(rate_per_minute=60)
+
+        delays = [bucket.reserve(1) for _ in range(60)]
+        self.assertEqual(max(delays), 0.0)
+
+        # Bucket is empty, next token refills after about a second
+        self.assertAlmostEqual(bucket.reserve(1), 1.0, delta=0.05)
+
+    def test_limiter_waits_for_slowest_bucket(self):
+        limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=600)
+
+        self.assertEqual(limiter.reserve(600), 0.0)
+        self.assertAlmostEqual(limiter.reserve(30), 3.0, delta=0.05)
+
+    def test_acquire_async(self):
+        limiter = RateLimiter(requests_per_minute=6000, tokens_per_minute=6000)
+        limiter.reserve(6000)
+
+        start = time.monotonic()
+        asyncio.run(limiter.acquire_async(5))
+        self.assertGreaterEqual(time.monotonic() - start, 0.04)
@@ -0,0 +1,135 @@
+# pylint: skip-file
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from libs.spelling_resources import SpellingResources, compile_resources, is_compiled, expand_word_forms, build_hunspell
+
+AFF = """SET UTF-8
+FLAG long
+PFX Uu Y 1
+PFX Uu 0 un .
+
+SFX Ee Y 2
+SFX Ee 0 en [^e]
+SFX Ee 0 n e
+
+NEEDAFFIX Nn
+FORBIDDENWORD Ff
+"""
+
+DIC = """5
+Haus/Ee
+klar/UuEe
+Tasche/Ee
+Gebirg/NnEe
+Blöd/Ff
+"""
+
+FRAMI_AFF = os.path.join(os.path.dirname(__file__), "..", "..", "..", "models", "hunspell", "de_DE_frami.aff")
+
+SYMSPELL = """Haus 120
+Tasche 80
+klar 60
+"""
+
+class TestSpellingResources(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.hunspell_path = os.path.join(self.tmp_dir.name, "test")
+        self.symspell_path = os.path.join(self.tmp_dir.name, "symspell.txt")
+        self.compiled_dir = os.path.join(self.tmp_dir.name, "compiled")
+
+        for path, content in [(self.hunspell_path + ".aff", AFF), (self.hunspell_path + ".dic", DIC), (self.symspell_path, SYMSPELL)]:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(content)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _resources(self):
+        return SpellingResources(self.compiled_dir, self.symspell_path, self.hunspell_path, max_edit_distance=2)
+
+    def _compile(self):
+        compile_resources(self.compiled_dir, self.symspell_path, self.hunspell_path, max_edit_distance=2)
+
+    def test_expand_word_forms(self):
+        forms = expand_word_forms(build_hunspell(self.hunspell_path))
+
+        for form in ["Haus", "Hausen", "Tasche", "Taschen", "klar", "klaren", "unklar", "unklaren", "Gebirgen"]:
+            self.assertIn(form, forms)
+
+        # NEEDAFFIX stems and forbidden words are no valid words
+        self.assertNotIn("Gebirg", forms)
+        self.assertNotIn("Blöd", forms)
+
+    def test_compound_only_affixes_are_skipped(self):
+        frami_path = os.path.join(self.tmp_dir.name, "frami")
+        shutil.copy(FRAMI_AFF, frami_path + ".aff")
+        with open(frami_path + ".dic", "w", encoding="utf-8") as f:
+            f.write("2\nLehrer/Tg\nArbeit/i\n")
+
+        dictionary = build_hunspell(frami_path)
+        forms = expand_word_forms(dictionary)
+
+        self.assertIn("Lehrer", forms)
+        self.assertIn("Arbeit", forms)
+        # SFX g and PFX i only form parts of compounds, Hunspell rejects them as words
+        for form in ["Lehrerinnen", "-Arbeit"]:
+            self.assertFalse(dictionary.lookup(form))
+            self.assertNotIn(form, forms)
+
+    def test_compiled_resources_are_loaded(self):
+        self._compile()
+        self.assertTrue(is_compiled(self.compiled_dir, self.symspell_path, self.hunspell_path, max_edit_distance=2))
+
+        resources = self._resources()
+        self.assertTrue(resources.compiled)
+
+        suggestions = resources.symspell().lookup("Hauss", 0, max_edit_distance=2)
+        self.assertEqual(suggestions[0].term, "Haus")
+        self.assertTrue(resources.hunspell().lookup("Taschen"))
+        self.assertIn("unklaren", resources.word_forms())
+
+        checker = resources.checker()
+        self.assertIn("tasche", checker)
+        # German frequency list of pyspellchecker is merged in
+        self.assertIn("und", checker)
+
+    def test_changed_source_invalidates_artifacts(self):
+        self._compile()
+
+        with open(self.symspell_path, "a", encoding="utf-8") as f:
+            f.write("Baum 10\n")
+
+        resources = self._resources()
+        self.assertFalse(resources.compiled)
+        # Falls back to the sources
+        self.assertEqual(resources.symspell().lookup("Baun", 0, max_edit_distance=2)[0].term, "Baum")
+
+    def test_fingerprint_changes_with_sources(self):
+        before = self._resources().fingerprint()
+        self.assertEqual(self._resources().fingerprint(), before)
+
+        with open(self.hunspell_path + ".dic", "a", encoding="utf-8") as f:
+            f.write("Baum/Ee\n")
+
+        self.assertNotEqual(self._resources().fingerprint(), before)
+
+    def test_missing_artifacts(self):
+        self.assertFalse(self._resources().compiled)
+        self.assertIn("Hausen", self._resources().word_forms())
+
+    def test_word_forms_reuse_loaded_dictionary(self):
+        dictionary = build_hunspell(self.hunspell_path)
+
+        with patch("libs.spelling_resources.build_hunspell") as mock_build:
+            forms = self._resources().word_forms(dictionary)
+
+        mock_build.assert_not_called()
+        self.assertIn("Hausen", forms)
+
+if __name__ == '__main__':
+    unittest.main()
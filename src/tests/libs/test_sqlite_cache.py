@@ -0,0 +1,47 @@
+# pylint: skip-file
+import time
+import unittest
+
+from libs.sqlite_cache import SqliteCache
+
+class TestSqliteCache(unittest.TestCase):
+    def test_set_and_get(self):
+        cache = SqliteCache(path=":memory:")
+        cache.set("a", "value")
+
+        self.assertEqual(cache.get("a"), "value")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 1, "entries": 1})
+
+    def test_expired_entries_are_misses(self):
+        cache = SqliteCache(path=":memory:", ttl_seconds=0.05)
+        cache.set("a", "value")
+        time.sleep(0.1)
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_evicts_least_recently_used(self):
+        cache = SqliteCache(path=":memory:", max_entries=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")
+        cache.set("c", "3")
+
+        self.assertEqual(cache.get("a"), "1")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), "3")
+
+    def test_evicts_in_batches_with_slack(self):
+        cache = SqliteCache(path=":memory:", max_entries=10, evict_slack=0.5)
+        for i in range(15):
+            cache.set(str(i), str(i))
+
+        # 15 entries are within the slack, the 16th trims back to max_entries
+        self.assertEqual(len(cache), 15)
+        cache.set("15", "15")
+
+        self.assertEqual(len(cache), 10)
+        self.assertIsNone(cache.get("0"))
+        self.assertEqual(cache.get("15"), "15")
+
@@ -0,0 +1,56 @@
+# pylint: skip-file
+import os
+import tempfile
+import time
+import unittest
+import numpy as np
+
+from libs.stage_cache import StageCache, digest
+
+class TestStageCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = StageCache(cache_dir=self.tmp_dir.name, max_size_mb=1)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_digest_depends_on_content_and_shape(self):
+        image = np.zeros((4, 6, 3), dtype=np.uint8)
+
+        self.assertEqual(digest(image), digest(image.copy()))
+        self.assertNotEqual(digest(image), digest(image.reshape((6, 4, 3))))
+
+        image[0, 0, 0] = 1
+        self.assertNotEqual(digest(image), digest(np.zeros((4, 6, 3), dtype=np.uint8)))
+
+    def test_set_and_get(self):
+        sections = [np.ones((2, 2, 3), dtype=np.uint8), np.zeros((3, 2, 3), dtype=np.uint8)]
+        self.cache.set("key", sections)
+
+        hit, value = self.cache.get("key")
+        self.assertTrue(hit)
+        self.assertTrue(np.array_equal(value[0], sections[0]))
+        self.assertEqual(self.cache.hits, 1)
+
+        hit, value = self.cache.get("missing")
+        self.assertFalse(hit)
+        self.assertIsNone(value)
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_evicts_least_recently_used(self):
+        chunk = np.zeros(400 * 1024, dtype=np.uint8)
+        self.cache.set("a", chunk)
+        self.cache.set("b", chunk)
+
+        # Make "a" the most recently used entry
+        past = time.time() - 100
+        os.utime(os.path.join(self.tmp_dir.name, "b.pkl"), (past, past))
+        self.cache.get("a")
+
+        self.cache.set("c", chunk)
+
+        self.assertTrue(self.cache.contains("a"))
+        self.assertFalse(self.cache.contains("b"))
+        self.assertTrue(self.cache.contains("c"))
+        self.assertLessEqual(self.cache.size_bytes(), self.cache.max_size_bytes)
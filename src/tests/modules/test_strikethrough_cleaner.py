@@ -1,11 +1,20 @@
 # pylint: skip-file
+import os
+import importlib.util
+import cv2
 import numpy as np
 import unittest
 from unittest.mock import patch, MagicMock
 
 from modules.strikethrough_cleaner import StrikeThroughCleaner  
+from libs.model_registry import get_model_registry
+
+MODEL_PATH = "../models/strikethrough/best.pt"
 
 class TestStrikeThroughCleaner(unittest.TestCase):
+    def setUp(self):
+        # Models are shared through the registry, every test needs its own mock
+        get_model_registry().clear()
 
     @patch("modules.strikethrough_cleaner.YOLO")
     def test_process_removes_strikethrough(self, mock_yolo_class):
@@ -19,9 +28,162 @@ class TestStrikeThroughCleaner(unittest.TestCase):
         data = {"horizontal-cutter": [test_img.copy()]}
 
         cleaner = StrikeThroughCleaner(debug=False)
+        cleaner.warmup()
         output = cleaner.process(data)
 
         self.assertEqual(len(output), 1)
         cleaned = output[0]
         self.assertTrue(np.all(cleaned[10:50, 10:50] == 255))
 
+    @patch("modules.strikethrough_cleaner.YOLO")
+    def test_batch_mode_maps_boxes_to_sections(self, mock_yolo_class):
+        mock_model = MagicMock()
+        mock_model.predict.side_effect = lambda images, **kwargs: [
+            MagicMock(boxes=MagicMock(xyxy=np.array([[i, 0, i + 5, 5]]))) for i in range(len(images))
+        ]
+        mock_yolo_class.return_value = mock_model
+
+        sections = [np.zeros((20, 30, 3), dtype=np.uint8) for _ in range(3)]
+
+        cleaner = StrikeThroughCleaner(debug=False, mode="batch", batch_size=2)
+        cleaner.warmup()
+        output = cleaner.process({"horizontal-cutter": sections})
+
+        self.assertEqual(mock_model.predict.call_count, 2)
+        self.assertEqual(len(mock_model.predict.call_args_list[0].args[0]), 2)
+        self.assertTrue(np.all(output[1][0:5, 1:6] == 255))
+        self.assertTrue(np.all(output[1][:, 0] == 0))
+        self.assertTrue(np.all(output[2][0:5, 0:5] == 255))
+
+    @patch("modules.strikethrough_cleaner.YOLO")
+    def test_page_mode_splits_boxes_by_offset(self, mock_yolo_class):
+        mock_model = MagicMock()
+        # Second section starts at y=20, third at y=50
+        mock_model.predict.return_value = [
+            MagicMock(boxes=MagicMock(xyxy=np.array([[2, 25, 10, 30], [0, 55, 4, 58]])))
+        ]
+        mock_yolo_class.return_value = mock_model
+
+        sections = [
+            np.zeros((20, 90, 3), dtype=np.uint8),
+            np.zeros((30, 100, 3), dtype=np.uint8),
+            np.zeros((10, 90, 3), dtype=np.uint8),
+        ]
+
+        cleaner = StrikeThroughCleaner(debug=False, mode="page")
+        cleaner.warmup()
+        output = cleaner.process({"horizontal-cutter": sections})
+
+        self.assertEqual(mock_model.predict.call_count, 1)
+        self.assertEqual([page.shape for page in mock_model.predict.call_args.args[0]], [(60, 100, 3)])
+        self.assertEqual(output[0].max(), 0)
+        self.assertTrue(np.all(output[1][5:10, 2:10] == 255))
+        self.assertEqual(int(output[1].sum()), 5 * 8 * 3 * 255)
+        self.assertTrue(np.all(output[2][5:8, 0:4] == 255))
+
+    @patch("modules.strikethrough_cleaner.YOLO")
+    def test_page_mode_stacks_are_not_taller_than_wide(self, mock_yolo_class):
+        mock_model = MagicMock()
+        # One box at the top of every stack
+        mock_model.predict.side_effect = lambda images, **kwargs: [
+            MagicMock(boxes=MagicMock(xyxy=np.array([[0, 0, 4, 4]]))) for _ in images
+        ]
+        mock_yolo_class.return_value = mock_model
+
+        sections = [np.zeros((20, 50, 3), dtype=np.uint8) for _ in range(5)] + [np.zeros((80, 50, 3), dtype=np.uint8)]
+
+        cleaner = StrikeThroughCleaner(debug=False, mode="page", batch_size=2)
+        cleaner.warmup()
+        output = cleaner.process({"horizontal-cutter": sections})
+
+        pages = [page for call in mock_model.predict.call_args_list for page in call.args[0]]
+        self.assertEqual([page.shape[0] for page in pages], [40, 40, 20, 80])
+        self.assertEqual(mock_model.predict.call_count, 2)
+        # First section of every stack got the box
+        self.assertEqual([int(img[0, 0, 0]) for img in output], [255, 0, 255, 0, 255, 255])
+
+    @patch("modules.strikethrough_cleaner.export_onnx", return_value="models/strikethrough/best.int8.onnx")
+    @patch("modules.strikethrough_cleaner.YOLO")
+    def test_onnx_backend_loads_exported_model(self, mock_yolo_class, mock_export):
+        StrikeThroughCleaner(debug=False, backend="onnx-int8").warmup()
+
+        mock_export.assert_called_once_with("models/strikethrough/best.pt", int8=True)
+        mock_yolo_class.assert_called_once_with("models/strikethrough/best.int8.onnx", task="detect")
+
+    @patch("modules.strikethrough_cleaner.YOLO")
+    def test_model_is_loaded_lazily_and_shared(self, mock_yolo_class):
+        first = StrikeThroughCleaner(debug=False)
+        second = StrikeThroughCleaner(debug=False)
+        mock_yolo_class.assert_not_called()
+
+        first.warmup()
+        second.warmup()
+
+        mock_yolo_class.assert_called_once()
+        self.assertIs(first.model, second.model)
+
+    def test_process_requires_warmup(self):
+        with self.assertRaises(Exception):
+            StrikeThroughCleaner(debug=False).process({"horizontal-cutter": [np.zeros((5, 5, 3), dtype=np.uint8)]})
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            StrikeThroughCleaner(debug=False, backend="tensorrt")
+
+def box_iou(a, b) -> float:
+    x_min, y_min = max(a[0], b[0]), max(a[1], b[1])
+    x_max, y_max = min(a[2], b[2]), min(a[3], b[3])
+    intersection = max(0, x_max - x_min) * max(0, y_max - y_min)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - intersection
+
+    return intersection / union if union > 0 else 1.0
+
+@unittest.skipUnless(
+    os.path.exists(MODEL_PATH) and importlib.util.find_spec("onnxruntime") is not None,
+    "Strikethrough weights or onnxruntime not available"
+)
+class TestStrikeThroughCleanerBackendParity(unittest.TestCase):
+    def setUp(self):
+        self.section = cv2.imread("tests/fixtures/horizontal_cut_section.png")
+        self.torch_boxes = self.detect("torch")
+
+    def detect(self, backend):
+        cleaner = StrikeThroughCleaner(model_path=MODEL_PATH, backend=backend)
+        cleaner.warmup()
+
+        return cleaner._detect([self.section])[0]
+
+    def assert_boxes_match(self, boxes, min_iou):
+        self.assertEqual(len(boxes), len(self.torch_boxes))
+        for box in boxes:
+            self.assertGreaterEqual(max(box_iou(box, ref) for ref in self.torch_boxes), min_iou)
+
+    def test_onnx_matches_torch(self):
+        boxes = self.detect("onnx")
+        self.assert_boxes_match(boxes, 0.95)
+
+    def test_onnx_int8_matches_torch(self):
+        boxes = self.detect("onnx-int8")
+        self.assert_boxes_match(boxes, 0.8)
+
+@unittest.skipUnless(os.path.exists(MODEL_PATH), "Strikethrough weights not available")
+class TestStrikeThroughCleanerPageParity(unittest.TestCase):
+    def test_page_mode_matches_batch_mode(self):
+        page = cv2.imread("tests/fixtures/test_image_cut.png")
+        # Sections of about the height of a horizontal cut
+        sections = [page[y:y + 150] for y in range(0, page.shape[0], 150)]
+
+        detected = {}
+        for mode in ("batch", "page"):
+            cleaner = StrikeThroughCleaner(model_path=MODEL_PATH, mode=mode)
+            cleaner.warmup()
+            detected[mode] = cleaner._detect(sections)
+
+        batch_count = sum(len(boxes) for boxes in detected["batch"])
+        page_count = sum(len(boxes) for boxes in detected["page"])
+        self.assertGreaterEqual(page_count, 0.9 * batch_count)
+        for batch_boxes, page_boxes in zip(detected["batch"], detected["page"]):
+            for box in batch_boxes:
+                if len(page_boxes):
+                    self.assertGreaterEqual(max(box_iou(box, other) for other in page_boxes), 0.5)
+
@@ -2,6 +2,9 @@
 import unittest
 import sys
 import os
+import time
+import threading
+from unittest.mock import MagicMock
 from dotenv import load_dotenv
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
@@ -10,7 +13,7 @@ from modules.structured_document_parser import StructuredDocumentParser
 from libs.language_client import LanguageClient
 from libs.file_helper import normalize_paths
 from models.parser.assignment_sheet import AssignmentSheet
-from models.parser.model_solution import ModelSolution
+from models.parser.model_solution import ModelSolution, PageExtraction, TaskSolution
 from models.parser.schulbuch_seite import SchulbuchSeite
 from models.parser.student_text import StudentText
 
@@ -82,4 +85,143 @@ class TestStructuredDocumentParser(unittest.TestCase):
         #self.assertIsInstance(result, SchulbuchSeite)
         #self.assertIsNotNone(result.raw_text)
 
+class TestStructuredDocumentParserTranscription(unittest.TestCase):
+    def setUp(self):
+        self.paths = [
+            os.path.abspath("tests/fixtures/test_image_cut.png"),
+            os.path.abspath("tests/fixtures/horizontal_cut_section.png"),
+        ]
+        self.client = MagicMock()
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def fake_response(self, fail_pages=None):
+        fail_pages = dict(fail_pages or {})
+
+        def get_response(messages, schema, temperature):
+            url = messages[1]["content"][0]["image_url"]["url"]
+            page = self.paths.index(url)
+
+            with self.lock:
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+                fail = fail_pages.get(page, 0) > 0
+                if fail:
+                    fail_pages[page] -= 1
+
+            # Earlier pages take longer, they finish out of order
+            time.sleep(0.05 * (len(self.paths) - page))
+
+            with self.lock:
+                self.active -= 1
+
+            if fail:
+                raise ValueError("invalid response")
+
+            return StudentText(lines=[{"text": f"page {page} line {j}"} for j in range(2)])
+
+        return get_response
+
+    def make_parser(self, **kwargs):
+        # Pages are identified by their path instead of the encoded image
+        return StructuredDocumentParser(schema_model=StudentText, prompt="", llm_client=self.client,
+                                        image_encoder=MagicMock(encode=lambda path: path), **kwargs)
+
+    def test_pages_keep_order(self):
+        progress = []
+        parser = self.make_parser(callback=lambda done, total: progress.append((done, total)))
+        self.client.get_response.side_effect = self.fake_response()
+
+        result = parser.process({"paths": self.paths})
+
+        self.assertEqual(
+            [line.text for line in result.lines],
+            ["page 0 line 0", "page 0 line 1", "page 1 line 0", "page 1 line 1"]
+        )
+        self.assertEqual(progress, [(1, 2), (2, 2)])
+        self.assertEqual(self.max_active, 2)
+
+    def test_concurrency_is_bounded(self):
+        parser = self.make_parser(max_concurrency=1)
+        self.client.get_response.side_effect = self.fake_response()
+
+        parser.process({"paths": self.paths})
+
+        self.assertEqual(self.max_active, 1)
+
+    def test_failed_page_is_retried(self):
+        parser = self.make_parser(page_retries=2)
+        self.client.get_response.side_effect = self.fake_response(fail_pages={0: 2})
+
+        result = parser.process({"paths": self.paths})
+
+        self.assertEqual(result.lines[0].text, "page 0 line 0")
+        self.assertEqual(self.client.get_response.call_count, 4)
+
+    def test_failed_page_raises_after_retries(self):
+        parser = self.make_parser(page_retries=1)
+        self.client.get_response.side_effect = self.fake_response(fail_pages={1: 2})
+
+        with self.assertRaises(RuntimeError):
+            parser.process({"paths": self.paths})
+
+class TestStructuredDocumentParserSpeculative(unittest.TestCase):
+    def setUp(self):
+        self.paths = [
+            os.path.abspath("tests/fixtures/test_image_cut.png"),
+            os.path.abspath("tests/fixtures/horizontal_cut_section.png"),
+            os.path.abspath("tests/fixtures/line_crop_handwriting.png"),
+        ]
+        self.client = MagicMock()
+        self.parser = StructuredDocumentParser(
+            schema_model=ModelSolution, prompt="", llm_client=self.client, speculative=True,
+            image_encoder=MagicMock(encode=lambda path: path)
+        )
+
+    def respond(self, pages: dict, pages_with_context: dict):
+        def get_response(messages, schema, temperature):
+            url = messages[1]["content"][1]["image_url"]["url"]
+            page = self.paths.index(url)
+            if "CONTEXT FROM PREVIOUS PAGE" in messages[0]["content"]:
+                return pages_with_context[page]
+            return pages[page]
+
+        return get_response
+
+    def test_consistent_pages_need_one_round_trip(self):
+        pages = {
+            0: PageExtraction(tasks=[TaskSolution(number=1, solution_text="a"), TaskSolution(number=2, solution_text="b")]),
+            1: PageExtraction(tasks=[TaskSolution(number=2, solution_text="c")], is_first_task_a_continuation=True),
+            2: PageExtraction(tasks=[TaskSolution(number=3, solution_text="d")]),
+        }
+        self.client.get_response.side_effect = self.respond(pages, {})
+
+        result = self.parser.process({"paths": self.paths})
+
+        self.assertEqual(self.client.get_response.call_count, 3)
+        self.assertEqual([task.number for task in result.solutions], [1, 2, 3])
+        self.assertEqual(result.solutions[1].solution_text, "b\nc")
+
+    def test_ambiguous_page_is_requeried_with_context(self):
+        pages = {
+            0: PageExtraction(tasks=[TaskSolution(number=1, solution_text="a")]),
+            # Unnumbered first task without continuation flag, could belong to task 1
+            1: PageExtraction(tasks=[TaskSolution(solution_text="b"), TaskSolution(number=2, solution_text="c")]),
+            2: PageExtraction(tasks=[TaskSolution(number=3, solution_text="d")]),
+        }
+        pages_with_context = {
+            1: PageExtraction(tasks=[TaskSolution(number=1, solution_text="b"), TaskSolution(number=2, solution_text="c")],
+                              is_first_task_a_continuation=True),
+        }
+        self.client.get_response.side_effect = self.respond(pages, pages_with_context)
+
+        result = self.parser.process({"paths": self.paths})
+
+        self.assertEqual(self.client.get_response.call_count, 4)
+        self.assertEqual([task.number for task in result.solutions], [1, 2, 3])
+        self.assertEqual(result.solutions[0].solution_text, "a\nb")
+
+        context_prompt = self.client.get_response.call_args_list[-1].kwargs["messages"][0]["content"]
+        self.assertIn('"solution_text": "a"', context_prompt)
 
@@ -1,8 +1,12 @@
 # pylint: skip-file
+import os
+import threading
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
-from modules.text_corrector import TextCorrector
+from modules.text_corrector import TextCorrector, split_chunks
+from libs.known_words import KnownWords
+from libs.name_gazetteer import NameGazetteer
 
 class TestTextCorrector(unittest.TestCase):
     def test_process_corrects_text(self):
@@ -28,4 +32,218 @@ class TestTextCorrector(unittest.TestCase):
         result = corrector.process(data)
 
         self.assertIsInstance(result, list)
-        self.assertIn("selbstbewusst", result)
\ No newline at end of file
+        self.assertIn("selbstbewusst", result)
+
+    def test_process_batch_scoring(self):
+        corrector = TextCorrector(batch_scoring=True, debug=False)
+
+        corrector.ner = MagicMock(return_value=[])
+        corrector.checker = MagicMock()
+        corrector.checker.candidates.return_value = {"selbstbewusst"}
+
+        corrector.hunspell = MagicMock()
+        corrector.hunspell.suggest.return_value = []
+
+        corrector.symspell = MagicMock()
+        corrector.symspell.lookup.return_value = []
+        corrector.symspell.word_segmentation.return_value = MagicMock(corrected_string="", distance_sum=99)
+
+        corrector.fill_mask = MagicMock(side_effect=lambda texts, **kwargs: [[{"token_str": "selbstbewusst"}] for _ in texts])
+        corrector.score_candidates_document = MagicMock(side_effect=lambda requests: [{"selbstbewusst": 0.9} for _ in requests])
+
+        result = corrector.process({"text-recognizer": ["ich bin so", "s3lbstbewust"]})
+
+        # All words are scored within one call
+        corrector.score_candidates_document.assert_called_once()
+        self.assertEqual(result, ["ich", "bin", "so", "\n", "selbstbewusst"])
+
+    def test_known_words_skip_candidates(self):
+        corrector = TextCorrector(batch_scoring=True, debug=False)
+
+        corrector.ner = MagicMock(return_value=[])
+        corrector.known_words = KnownWords(["schule", "heute"])
+        corrector.checker = MagicMock()
+        corrector.checker.candidates.return_value = {"selbstbewusst"}
+
+        corrector.hunspell = MagicMock()
+        corrector.hunspell.suggest.return_value = []
+
+        corrector.symspell = MagicMock()
+        corrector.symspell.lookup.return_value = []
+        corrector.symspell.word_segmentation.return_value = MagicMock(corrected_string="", distance_sum=99)
+
+        # A single masked text returns the predictions unwrapped like the transformers pipeline
+        corrector.fill_mask = MagicMock(return_value=[{"token_str": "selbstbewusst"}])
+        corrector.score_candidates_document = MagicMock(side_effect=lambda requests: [{"selbstbewusst": 0.9} for _ in requests])
+
+        result = corrector.process({"text-recognizer": ["Schule heute s3lbstbewust"]})
+
+        self.assertEqual(result, ["Schule", "heute", "selbstbewusst"])
+        # Only the unknown word needs candidates
+        corrector.checker.candidates.assert_called_once_with("s3lbstbewust")
+
+
+def build_chunk_corrector(**kwargs):
+    corrector = TextCorrector(batch_scoring=True, debug=False, **kwargs)
+
+    corrector.ner = MagicMock(return_value=[])
+    corrector.checker = MagicMock()
+    corrector.checker.candidates.side_effect = lambda word: {word + "e"}
+
+    corrector.hunspell = MagicMock()
+    corrector.hunspell.suggest.side_effect = lambda word: iter([])
+
+    corrector.symspell = MagicMock()
+    corrector.symspell.lookup.return_value = []
+    corrector.symspell.word_segmentation.return_value = MagicMock(corrected_string="", distance_sum=99)
+
+    def fill_mask(texts, **kwargs):
+        # Prediction depends on the left context
+        tops = [[{"token_str": text.split()[0] + "x"}] for text in texts]
+        return tops if len(texts) > 1 else tops[0]
+
+    corrector.fill_mask = MagicMock(side_effect=fill_mask)
+    corrector.score_candidates_document = MagicMock(side_effect=lambda requests: [{c: 0.0 for c in cands} for _, _, cands in requests])
+
+    return corrector
+
+LINES = [" ".join(f"wort{line}{i}" for i in range(7)) + " ." for line in range(12)]
+
+class TestTextCorrectorChunks(unittest.TestCase):
+    def test_split_chunks_ends_at_boundaries(self):
+        words = "eins zwei . drei vier fünf sechs . sieben".split()
+
+        chunks = split_chunks(words, chunk_words=4, overlap=1)
+
+        # Boundaries are searched in the second half of a chunk, else it is cut hard
+        self.assertEqual([(start, end) for _, start, end, _ in chunks], [(0, 3), (3, 7), (7, 9)])
+        self.assertEqual(chunks[1], (2, 3, 7, 8))
+
+    def test_line_markers_are_no_context(self):
+        words = "eins zwei drei new_line vier fünf".split()
+
+        chunks = split_chunks(words, chunk_words=4, overlap=1)
+
+        self.assertEqual(chunks, [(0, 0, 4, 5), (2, 4, 6, 6)])
+
+    def test_chunks_see_the_same_context(self):
+        corrector = build_chunk_corrector()
+        words, ner_result = corrector._preprocess(LINES)
+
+        serial = corrector._correct(words, ner_result, 0, len(words))
+        serial_requests = corrector.score_candidates_document.call_args.args[0]
+
+        stitched = []
+        requests = []
+        for window_start, start, end, window_end in split_chunks(words, 30, 40):
+            stitched += corrector._correct(words[window_start:window_end], ner_result, start - window_start, end - window_start)
+            requests += corrector.score_candidates_document.call_args.args[0]
+
+        self.assertEqual(stitched, serial)
+        self.assertEqual(requests, serial_requests)
+
+    def test_parallel_process_keeps_lines(self):
+        serial = build_chunk_corrector().process({"text-recognizer": LINES})
+        parallel = build_chunk_corrector(workers=2, chunk_words=30).process({"text-recognizer": LINES})
+
+        self.assertEqual(parallel, serial)
+        self.assertEqual(parallel.count("\n"), len(LINES) - 1)
+
+    def test_threaded_caller_uses_spawned_workers(self):
+        serial = build_chunk_corrector().process({"text-recognizer": LINES})
+        corrector = build_chunk_corrector(workers=2, chunk_words=30)
+        executors = []
+
+        class InlineExecutor:
+            # Runs the chunks in this process, the worker corrector is the corrector under test
+            def __init__(self, **kwargs):
+                self.kwargs = kwargs
+                self.shut_down = False
+                executors.append(self)
+
+            def map(self, fn, *iterables):
+                return list(map(fn, *iterables))
+
+            def shutdown(self):
+                self.shut_down = True
+
+        result = {}
+        # Called from a stream worker thread like under scheduler="streaming"
+        thread = threading.Thread(target=lambda: result.update(text=corrector.process({"text-recognizer": LINES})))
+        with patch("modules.text_corrector.ProcessPoolExecutor", InlineExecutor), \
+                patch("modules.text_corrector._worker_corrector", corrector):
+            thread.start()
+            thread.join()
+            # The pool is kept for the next page
+            corrector.process({"text-recognizer": LINES})
+
+        self.assertEqual(result["text"], serial)
+        self.assertEqual(len(executors), 1)
+        kwargs = executors[0].kwargs
+        self.assertEqual(kwargs["mp_context"].get_start_method(), "spawn")
+        config = kwargs["initargs"][0]
+        self.assertTrue(config["batch_scoring"])
+        self.assertTrue(os.path.isabs(config["compiled_dir"]))
+        self.assertNotIn("workers", config)
+
+        corrector.is_warm = True
+        corrector.close()
+        self.assertTrue(executors[0].shut_down)
+
+    @patch("modules.text_corrector.TextCorrector.warmup")
+    def test_spawned_worker_loads_its_corrector(self, mock_warmup):
+        from modules import text_corrector
+
+        corrector = build_chunk_corrector(workers=4, candidate_cache=True, names=("Ida",))
+        with patch.object(text_corrector, "_worker_corrector", None):
+            text_corrector._init_spawned_chunk_worker(corrector._worker_config(), 1)
+            worker = text_corrector._worker_corrector
+
+        mock_warmup.assert_called_once()
+        self.assertEqual(worker.workers, 1)
+        self.assertTrue(worker.candidate_cache)
+        self.assertEqual(worker.names, ("Ida",))
+        self.assertIsNone(worker.ner_model)
+
+class TestTextCorrectorNames(unittest.TestCase):
+    def test_gazetteer_maps_names_without_ner(self):
+        corrector = build_chunk_corrector(names=("Tim", "Marcia"))
+        corrector.ner = None
+        corrector.gazetteer = NameGazetteer(corrector.names)
+
+        result = corrector.process({"text-recognizer": ["Marzia und Timm"]})
+
+        self.assertEqual(result[0], "Marcia")
+        self.assertEqual(result[2], "Tim")
+
+    def test_gazetteer_keeps_known_words_and_genitive(self):
+        corrector = build_chunk_corrector(names=("Tim", "Marcia"))
+        corrector.ner = None
+        corrector.gazetteer = NameGazetteer(corrector.names)
+        corrector.known_words = KnownWords(["Maria"])
+
+        result = corrector.process({"text-recognizer": ["Maria und Tims Hund"]})
+
+        self.assertEqual(result[0], "Maria")
+        self.assertEqual(result[2], "Tims")
+
+    def test_ner_without_names_keeps_word(self):
+        corrector = build_chunk_corrector(names=())
+
+        self.assertEqual(corrector._map_ner_to_per({"word": "Marzia", "score": 0.99, "entity_group": "PER"}), "Marzia")
+
+    def test_ner_runs_in_chunks(self):
+        corrector = build_chunk_corrector(ner_max_tokens=12)
+        corrector.ner = MagicMock()
+        # Every word is two tokens
+        corrector.ner.tokenizer.tokenize.side_effect = lambda word: [word[:1], word[1:]]
+        corrector.ner.side_effect = lambda chunks: [
+            [{"word": "Marzia", "score": 0.99, "entity_group": "PER"}] if "Marzia" in chunk else [] for chunk in chunks
+        ]
+
+        corrector.process({"text-recognizer": ["eins zwei drei vier", "fünf sechs Marzia"]})
+
+        chunks = corrector.ner.call_args.args[0]
+        # 5 words of 2 tokens fit next to the special tokens
+        self.assertEqual([len(chunk.split()) for chunk in chunks], [5, 3])
+        self.assertEqual(corrector._ner_names("Marzia ging"), {"Marzia": "Marcia"})
@@ -3,7 +3,11 @@ import unittest
 import os
 import cv2
 import numpy as np
+import torch
+from unittest.mock import MagicMock, patch
+from transformers import VisionEncoderDecoderConfig, VisionEncoderDecoderModel, ViTConfig, TrOCRConfig
 from modules.text_recognizer import TextRecognizer
+from libs.model_registry import get_model_registry
 
 TEST_IMAGE_PATH = os.path.join("tests", "fixtures", "line_crop_handwriting.png")
 
@@ -39,4 +43,71 @@ class TestTextRecognizer(unittest.TestCase):
         debug_path = os.path.join(self.recognizer.debug_folder, "debug_textrecognizer.txt")
         self.assertTrue(os.path.exists(debug_path))
 
+class TestTextRecognizerBatching(unittest.TestCase):
+    def test_batches_keep_line_order(self):
+        recognizer = TextRecognizer(batch_size=2, debug=False)
+
+        # Fake model: every line is "recognized" as its width
+        recognizer.processor = MagicMock()
+        recognizer.processor.side_effect = lambda images, return_tensors: MagicMock(
+            pixel_values=torch.tensor([[img.width] for img in images])
+        )
+        recognizer.processor.batch_decode.side_effect = lambda ids, skip_special_tokens: [str(int(i)) for i in ids[:, 0]]
+        recognizer.model = MagicMock()
+        recognizer.model.generate.side_effect = lambda pixel_values: pixel_values
+
+        widths = [300, 50, 200, 100, 400]
+        images = [np.zeros((10, w, 3), dtype=np.uint8) for w in widths]
+
+        result = recognizer.process({"line-prepared": images})
+
+        self.assertEqual(result, [str(w) for w in widths])
+        self.assertEqual(recognizer.model.generate.call_count, 3)
+
+def tiny_trocr() -> VisionEncoderDecoderModel:
+    config = VisionEncoderDecoderConfig.from_encoder_decoder_configs(
+        ViTConfig(hidden_size=32, num_hidden_layers=1, num_attention_heads=2, intermediate_size=37, image_size=32, patch_size=16),
+        TrOCRConfig(vocab_size=50, d_model=32, decoder_layers=1, decoder_attention_heads=2, decoder_ffn_dim=37)
+    )
+    config.decoder_start_token_id = 2
+    config.pad_token_id = 1
+    config.eos_token_id = 2
+
+    return VisionEncoderDecoderModel(config)
+
+class TestTextRecognizerBackends(unittest.TestCase):
+    def tearDown(self):
+        get_model_registry().evict("trocr:tiny:int8")
+        get_model_registry().evict("trocr:tiny:torch")
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            TextRecognizer(backend="tensorrt")
+
+    @patch("modules.text_recognizer.TrOCRProcessor.from_pretrained")
+    @patch("modules.text_recognizer.VisionEncoderDecoderModel.from_pretrained", side_effect=lambda name: tiny_trocr())
+    def test_int8_quantizes_decoder_linear_layers(self, mock_model, mock_processor):
+        recognizer = TextRecognizer(model_name="tiny", backend="int8", debug=False)
+        recognizer.warmup()
+
+        self.assertEqual(recognizer.device, "cpu")
+        quantized = [m for m in recognizer.model.decoder.modules() if isinstance(m, torch.ao.nn.quantized.dynamic.Linear)]
+        self.assertGreater(len(quantized), 0)
+        # Encoder stays in fp32
+        self.assertFalse(any(isinstance(m, torch.ao.nn.quantized.dynamic.Linear) for m in recognizer.model.encoder.modules()))
+
+        with torch.no_grad():
+            generated = recognizer.model.generate(torch.rand(2, 3, 32, 32), max_new_tokens=4)
+        self.assertEqual(generated.shape[0], 2)
+
+    @patch("modules.text_recognizer.TrOCRProcessor.from_pretrained")
+    @patch("modules.text_recognizer.VisionEncoderDecoderModel.from_pretrained", side_effect=lambda name: tiny_trocr())
+    def test_backends_are_cached_separately(self, mock_model, mock_processor):
+        _, fp32 = TextRecognizer._get_processor_and_model("tiny", "torch")
+        _, int8 = TextRecognizer._get_processor_and_model("tiny", "int8")
+        _, int8_again = TextRecognizer._get_processor_and_model("tiny", "int8")
+
+        self.assertIsNot(fp32, int8)
+        self.assertIs(int8, int8_again)
+        self.assertEqual(mock_model.call_count, 2)
 
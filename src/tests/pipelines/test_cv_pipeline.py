@@ -0,0 +1,85 @@
+# pylint: skip-file
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import cv2
+import numpy as np
+from PIL import Image
+
+from modules.module_base import Module
+from pipelines.cv_pipeline import CVPipeline
+
+class HeightModule(Module):
+    def __init__(self):
+        super().__init__("height")
+        self.model = None
+
+    def _warmup(self):
+        self.model = str
+
+    def _release(self):
+        self.model = None
+
+    def get_preconditions(self) -> list[str]:
+        return ['input']
+
+    def process(self, data: dict) -> list:
+        return [self.model(data['input'].shape[0])]
+
+class TestCVPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.paths = []
+        for height in [10, 20, 30, 40]:
+            path = os.path.join(self.tmp_dir.name, f"page_{height}.png")
+            cv2.imwrite(path, np.zeros((height, 5, 3), dtype=np.uint8))
+            self.paths.append(path)
+
+        self.pipeline = CVPipeline()
+        self.pipeline.add_stage(HeightModule())
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_run_and_save_text_sequential(self):
+        ret, full_text = self.pipeline.run_and_save_text(self.paths)
+
+        self.assertEqual(ret, [["10"], ["20"], ["30"], ["40"]])
+        self.assertEqual(full_text.split(), ["10", "20", "30", "40"])
+
+    def test_run_and_save_text_workers_keeps_page_order(self):
+        # Warm parent modules are pickled cold for the workers
+        self.pipeline.open()
+        ret, _ = self.pipeline.run_and_save_text(self.paths, workers=2)
+
+        self.assertEqual(ret, [["10"], ["20"], ["30"], ["40"]])
+
+    def test_single_page_runs_in_process(self):
+        with patch.object(CVPipeline, "_run_pages_parallel") as mock_parallel:
+            ret, _ = self.pipeline.run_and_save_text(self.paths[:1], workers=2)
+
+        mock_parallel.assert_not_called()
+        self.assertEqual(ret, ["10"])
+
+    @patch("libs.file_helper.is_pdf", return_value=True)
+    @patch("libs.file_helper.pdfinfo_from_path", return_value={"Pages": 5})
+    @patch("libs.file_helper.convert_from_path")
+    def test_pdf_window_follows_thread_count(self, mock_convert, mock_info, mock_is_pdf):
+        mock_convert.side_effect = lambda path, dpi, first_page, last_page, thread_count: [
+            Image.new("RGB", (5, 10 * page)) for page in range(first_page, last_page + 1)
+        ]
+
+        ret, _ = self.pipeline.run_and_save_text(["scan.pdf"], dpi=150, thread_count=2)
+
+        self.assertEqual(ret, [["10"], ["20"], ["30"], ["40"], ["50"]])
+        windows = [
+            (c.kwargs["first_page"], c.kwargs["last_page"], c.kwargs["thread_count"], c.kwargs["dpi"])
+            for c in mock_convert.call_args_list
+        ]
+        self.assertEqual(windows, [(1, 2, 2, 150), (3, 4, 2, 150), (5, 5, 2, 150)])
+
+        mock_convert.reset_mock()
+        self.pipeline.run_and_save_text(["scan.pdf"], thread_count=2, window=4)
+        self.assertEqual([(c.kwargs["first_page"], c.kwargs["last_page"]) for c in mock_convert.call_args_list], [(1, 4), (5, 5)])
+
@@ -0,0 +1,53 @@
+# pylint: skip-file
+import os
+import sys
+import time
+import asyncio
+import threading
+import unittest
+from unittest.mock import patch, MagicMock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
+
+from modules.llm_module_base import LLMModule
+from pipelines.llm_extractor import LLMTextExtractorPipeline
+
+class SlowEchoModule(LLMModule):
+    def __init__(self):
+        super().__init__("echo")
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+
+    def get_preconditions(self) -> list[str]:
+        return []
+
+    def process(self, data: dict, llm = None):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+
+        # Later tasks finish first
+        time.sleep(0.05 * (5 - int(data["solution_text"])))
+
+        with self.lock:
+            self.running -= 1
+
+        return data["solution_text"]
+
+class TestLLMTextExtractorPipeline(unittest.TestCase):
+    @patch.dict(os.environ, {"GROQ_API_KEY": "test"})
+    def setUp(self):
+        self.pipeline = LLMTextExtractorPipeline(MagicMock(), max_concurrency=2)
+        self.module = SlowEchoModule()
+        self.pipeline.stages = [self.module]
+
+    def test_extract_tasks_concurrently_in_task_order(self):
+        task_inputs = {str(i): {"student_text": "", "solution_text": str(i)} for i in range(1, 5)}
+        finished = []
+
+        results = asyncio.run(self.pipeline._extract_tasks(task_inputs, lambda task_id, count: finished.append(count)))
+
+        self.assertEqual(list(results.items()), [("1", "1"), ("2", "2"), ("3", "3"), ("4", "4")])
+        self.assertEqual(finished, [1, 2, 3, 4])
+        self.assertEqual(self.module.max_running, 2)
@@ -0,0 +1,205 @@
+# pylint: skip-file
+import tempfile
+import threading
+import unittest
+
+from modules.module_base import Module
+from pipelines.pipeline import Pipeline
+from libs.stage_cache import StageCache
+from libs.profiling import PipelineProfiler
+
+class CountingModule(Module):
+    cache_ignore = Module.cache_ignore + ('warmups', 'releases', 'calls')
+
+    def __init__(self, module_key, precondition, step=1, cacheable=False):
+        super().__init__(module_key)
+        self.precondition = precondition
+        self.step = step
+        self.cacheable = cacheable
+        self.warmups = 0
+        self.releases = 0
+        self.calls = 0
+        self.model = None
+
+    def _warmup(self):
+        self.warmups += 1
+        self.model = lambda x: x + self.step
+
+    def _release(self):
+        self.releases += 1
+        self.model = None
+
+    def get_preconditions(self) -> list[str]:
+        return [self.precondition]
+
+    def process(self, data: dict) -> int:
+        self.calls += 1
+        return self.model(data[self.precondition])
+
+class BranchModule(Module):
+    def __init__(self, module_key, preconditions, fn, barrier=None):
+        super().__init__(module_key)
+        self.preconditions = preconditions
+        self.fn = fn
+        self.barrier = barrier
+
+    def get_preconditions(self) -> list[str]:
+        return self.preconditions
+
+    def process(self, data: dict):
+        if self.barrier is not None:
+            # Only passes if the other branch runs at the same time
+            self.barrier.wait()
+
+        return self.fn(*[data[key] for key in self.preconditions])
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.first = CountingModule("first", "input")
+        self.second = CountingModule("second", "first")
+
+        self.pipeline = Pipeline()
+        self.pipeline.add_stage(self.first)
+        self.pipeline.add_stage(self.second)
+
+    def test_run_returns_last_stage(self):
+        self.assertEqual(self.pipeline.run(1), 3)
+
+    def test_warmup_only_once(self):
+        self.pipeline.open()
+        for i in range(5):
+            self.assertEqual(self.pipeline.run(i), i + 2)
+
+        self.assertEqual(self.first.warmups, 1)
+        self.assertEqual(self.second.warmups, 1)
+
+    def test_run_warms_lazily(self):
+        self.pipeline.run(0)
+        self.pipeline.run(0)
+
+        self.assertTrue(self.first.is_warm)
+        self.assertEqual(self.first.warmups, 1)
+
+    def test_close_releases_models(self):
+        with self.pipeline as pipeline:
+            pipeline.run(0)
+
+        self.assertFalse(self.first.is_warm)
+        self.assertEqual(self.first.releases, 1)
+        self.assertIsNone(self.second.model)
+
+        # Reopening loads the models again
+        self.pipeline.run(0)
+        self.assertEqual(self.first.warmups, 2)
+
+class TestPipelineStageCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = StageCache(cache_dir=self.tmp_dir.name)
+
+        self.first = CountingModule("first", "input", cacheable=True)
+        self.second = CountingModule("second", "first", cacheable=True)
+        self.third = CountingModule("third", "second")
+
+        self.pipeline = Pipeline(stage_cache=self.cache)
+        for stage in [self.first, self.second, self.third]:
+            self.pipeline.add_stage(stage)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_rerun_only_computes_uncached_stages(self):
+        self.assertEqual(self.pipeline.run(1), 4)
+        self.assertEqual(self.pipeline.run(1), 4)
+
+        self.assertEqual(self.first.calls, 1)
+        self.assertEqual(self.second.calls, 1)
+        self.assertEqual(self.third.calls, 2)
+        # Skipped stages do not load their models
+        self.assertEqual(self.first.warmups, 1)
+
+    def test_changed_input_is_recomputed(self):
+        self.pipeline.run(1)
+        self.assertEqual(self.pipeline.run(2), 5)
+
+        self.assertEqual(self.first.calls, 2)
+
+    def test_changed_parameter_invalidates_following_stages(self):
+        self.pipeline.run(1)
+
+        self.second.step = 10
+        self.assertEqual(self.pipeline.run(1), 13)
+
+        self.assertEqual(self.first.calls, 1)
+        self.assertEqual(self.second.calls, 2)
+
+class TestPipelineDagScheduler(unittest.TestCase):
+    def setUp(self):
+        self.barrier = threading.Barrier(2, timeout=5)
+
+        self.pipeline = Pipeline(scheduler="dag")
+        self.pipeline.add_stage(CountingModule("cutter", "input"))
+        self.pipeline.add_stage(BranchModule("strike", ["cutter"], lambda x: x * 2, self.barrier))
+        self.pipeline.add_stage(BranchModule("denoise", ["cutter"], lambda x: x * 3, self.barrier))
+        self.pipeline.add_stage(BranchModule("merge", ["strike", "denoise"], lambda a, b: a + b))
+
+    def test_branches_run_in_parallel(self):
+        self.assertEqual(self.pipeline.run(1), 10)
+
+    def test_same_result_as_sequential(self):
+        sequential = Pipeline()
+        sequential.add_stage(CountingModule("first", "input"))
+        sequential.add_stage(CountingModule("second", "first"))
+
+        dag = Pipeline(scheduler="dag")
+        dag.add_stage(CountingModule("first", "input"))
+        dag.add_stage(CountingModule("second", "first"))
+
+        self.assertEqual(dag.run(5), sequential.run(5))
+
+    def test_intermediates_are_freed(self):
+        self.pipeline.run(1)
+
+        for key in ("cutter", "strike", "denoise"):
+            self.assertNotIn(key, self.pipeline.data)
+        self.assertEqual(self.pipeline.data["merge"], 10)
+        self.assertEqual(self.pipeline.data["input"], 1)
+
+    def test_stage_cache(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cutter = CountingModule("cutter", "input", cacheable=True)
+            pipeline = Pipeline(stage_cache=StageCache(cache_dir=tmp_dir), scheduler="dag")
+            pipeline.add_stage(cutter)
+            pipeline.add_stage(CountingModule("line", "cutter"))
+
+            self.assertEqual(pipeline.run(1), 3)
+            self.assertEqual(pipeline.run(1), 3)
+            self.assertEqual(cutter.calls, 1)
+
+    def test_cycle_is_detected(self):
+        pipeline = Pipeline(scheduler="dag")
+        pipeline.add_stage(CountingModule("a", "b"))
+        pipeline.add_stage(CountingModule("b", "a"))
+
+        with self.assertRaises(Exception):
+            pipeline.run(1)
+
+class TestPipelineProfiling(unittest.TestCase):
+    def test_stages_are_profiled_per_run(self):
+        profiler = PipelineProfiler()
+        pipeline = Pipeline(profiler=profiler)
+        pipeline.add_stage(CountingModule("first", "input"))
+        pipeline.add_stage(CountingModule("second", "first"))
+
+        pipeline.run(1)
+        pipeline.run(2)
+
+        stages = [(r["run_id"], r["stage"]) for r in profiler.records]
+        # Loading is recorded separately and only in the first run
+        self.assertEqual(stages, [
+            (0, "first.warmup"), (0, "first"), (0, "second.warmup"), (0, "second"),
+            (1, "first"), (1, "second"),
+        ])
+        self.assertEqual(len(profiler.runs), 2)
+        self.assertEqual(profiler.summary()["second"]["calls"], 2)
+
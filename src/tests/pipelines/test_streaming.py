@@ -0,0 +1,152 @@
+# pylint: skip-file
+import time
+import unittest
+
+from modules.module_base import Module
+from pipelines.pipeline import Pipeline
+from pipelines.streaming import is_streamable_chain, run_streaming_chain
+
+class SplitModule(Module):
+    def __init__(self):
+        super().__init__("split")
+
+    def get_preconditions(self) -> list[str]:
+        return ["input"]
+
+    def process(self, data: dict) -> list:
+        return list(range(data["input"]))
+
+class LineModule(Module):
+    streamable = True
+
+    def __init__(self, module_key, precondition, fn, stream_batch_size=1, delay=0.0):
+        super().__init__(module_key)
+        self.precondition = precondition
+        self.fn = fn
+        self.stream_batch_size = stream_batch_size
+        self.delay = delay
+        self.batches = []
+        self.active = 0
+        self.started = []
+
+    def get_preconditions(self) -> list[str]:
+        return [self.precondition]
+
+    def process(self, data: dict) -> list:
+        return [item for item in self.process_batch(data[self.precondition], 0) if item is not None]
+
+    def process_batch(self, items: list, start_idx: int) -> list:
+        self.batches.append((start_idx, list(items)))
+        self.started.append(time.perf_counter())
+        time.sleep(self.delay)
+
+        return [self.fn(item) for item in items]
+
+def build(scheduler, **kwargs):
+    pipeline = Pipeline(scheduler=scheduler)
+    pipeline.add_stage(SplitModule())
+    pipeline.add_stage(LineModule("clean", "split", lambda x: None if x == 3 else x * 10, **kwargs))
+    pipeline.add_stage(LineModule("crop", "clean", lambda x: x + 1, stream_batch_size=2))
+    pipeline.add_stage(LineModule("recognize", "crop", str, stream_batch_size=3))
+
+    return pipeline
+
+class TestStreamingPipeline(unittest.TestCase):
+    def test_same_result_as_sequential(self):
+        sequential = build("sequential")
+        streaming = build("streaming")
+
+        self.assertEqual(streaming.run(7), sequential.run(7))
+        for key in ("clean", "crop", "recognize"):
+            self.assertEqual(streaming.data[key], sequential.data[key])
+
+    def test_none_outputs_are_dropped(self):
+        pipeline = build("streaming")
+
+        self.assertEqual(pipeline.run(5), ["1", "11", "21", "41"])
+
+    def test_chunks_keep_item_index(self):
+        pipeline = build("streaming")
+        pipeline.run(7)
+        recognizer = pipeline.stages[-1]
+
+        self.assertEqual([start for start, _ in recognizer.batches], [0, 3])
+        self.assertEqual(sum(len(items) for _, items in recognizer.batches), 6)
+
+    def test_stages_overlap(self):
+        pipeline = build("streaming", delay=0.02)
+        pipeline.run(6)
+        clean, crop = pipeline.stages[1], pipeline.stages[2]
+
+        # The first line is cropped before the last line is cleaned
+        self.assertLess(crop.started[0], clean.started[-1])
+
+    def test_stages_reading_the_same_key(self):
+        def build_shared(scheduler):
+            pipeline = Pipeline(scheduler=scheduler)
+            pipeline.add_stage(SplitModule())
+            pipeline.add_stage(LineModule("clean", "split", lambda x: x + 100))
+            # Reads the uncleaned items like LineCropper(source_key='horizontal-cutter')
+            pipeline.add_stage(LineModule("crop", "split", lambda x: x + 1))
+            pipeline.add_stage(LineModule("recognize", "crop", str))
+
+            return pipeline
+
+        sequential = build_shared("sequential")
+        streaming = build_shared("streaming")
+
+        self.assertEqual(streaming.run(3), sequential.run(3))
+        self.assertEqual(streaming.data["crop"], [1, 2, 3])
+        self.assertEqual(streaming.data["clean"], [100, 101, 102])
+
+    def test_unknown_scheduler(self):
+        with self.assertRaises(ValueError):
+            Pipeline(scheduler="unknown")
+
+class TestIsStreamableChain(unittest.TestCase):
+    def test_chain_needs_predecessor_output(self):
+        first = LineModule("first", "input", str)
+        second = LineModule("second", "first", str)
+        sibling = LineModule("sibling", "input", str)
+
+        self.assertTrue(is_streamable_chain([first, second]))
+        self.assertFalse(is_streamable_chain([first, sibling]))
+        self.assertFalse(is_streamable_chain([first]))
+
+class TestRunStreamingChain(unittest.TestCase):
+    def test_queues_are_bounded(self):
+        counts = {"produced": 0, "consumed": 0, "max_ahead": 0}
+
+        def produce(x):
+            counts["produced"] += 1
+            return x
+
+        def consume(x):
+            counts["consumed"] += 1
+            counts["max_ahead"] = max(counts["max_ahead"], counts["produced"] - counts["consumed"])
+            return x
+
+        first = LineModule("first", "input", produce)
+        second = LineModule("second", "first", consume, delay=0.005)
+
+        outputs = run_streaming_chain([first, second], list(range(20)), queue_size=2)
+
+        self.assertEqual(outputs["second"], list(range(20)))
+        # Queue content plus the item being put by the producer
+        self.assertLessEqual(counts["max_ahead"], 3)
+
+    def test_error_is_raised(self):
+        def fail(x):
+            if x == 4:
+                raise RuntimeError("kaputt")
+            return x
+
+        first = LineModule("first", "input", lambda x: x)
+        second = LineModule("second", "first", fail)
+        third = LineModule("third", "second", lambda x: x)
+
+        with self.assertRaises(RuntimeError):
+            run_streaming_chain([first, second, third], list(range(50)), queue_size=1)
+
+if __name__ == '__main__':
+    unittest.main()
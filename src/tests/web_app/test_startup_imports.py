@@ -0,0 +1,32 @@
+# pylint: skip-file
+import os
+import sys
+import json
+import subprocess
+import unittest
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+# Only needed by the CV pipeline, the LLM path must start without them
+HEAVY_MODULES = ["torch", "transformers", "ultralytics", "spylls", "symspellpy", "tensorflow"]
+
+def loaded_after_import(module: str) -> list[str]:
+    code = (
+        "import sys, json\n"
+        f"import {module}\n"
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))\n"
+    )
+    # Fresh interpreter, the test process itself has torch loaded already
+    env = {k: v for k, v in os.environ.items() if k != "GROQ_API_KEY"}
+    env["PYTHONPATH"] = os.pathsep.join([SRC_DIR, os.path.dirname(SRC_DIR)])
+    result = subprocess.run([sys.executable, "-c", code], cwd=SRC_DIR, env=env, capture_output=True, text=True, check=True)
+
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+class TestStartupImports(unittest.TestCase):
+    def test_app_does_not_load_models(self):
+        # Runs without GROQ_API_KEY, the LanguageClient must not be built at import time
+        self.assertEqual(loaded_after_import("web_app.app_v2"), [])
+
+    def test_llm_pipelines_do_not_import_torch(self):
+        self.assertEqual(loaded_after_import("pipelines.pdf_processor, pipelines.llm_extractor"), [])
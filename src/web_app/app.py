@@ -3,16 +3,13 @@ import streamlit as st
 from pdf2image import convert_from_bytes
 from langchain_core.messages import AIMessage, HumanMessage
 
-from libs.language_client import LanguageClient
+from libs.language_client import get_language_client
 
-from pipelines.pdf_processor import PdfProcessorPipeline
 from pipelines.llm_extractor import LLMTextExtractorPipeline
-from pipelines.student_exam_extractor import StudentExamProcessorPipeline
+from web_app.resources import get_pdf_processor_pipeline, get_student_exam_pipeline
 
 CV_PIPELINE=False
-llmClient = LanguageClient()
-_studenExamProcessorPipeline = StudentExamProcessorPipeline()
-_pdfProcessorPipeline = PdfProcessorPipeline()
+# Pipelines and client are built on first use, see web_app/resources.py
 
 def app_session_init():
     """
@@ -96,17 +93,17 @@ def run():
     ###
     if uploaded_student_file is not None:
         if CV_PIPELINE :
-            _studenExamProcessorPipeline.process_streamlit(uploaded_student_file, "student")
+            get_student_exam_pipeline().process_streamlit(uploaded_student_file, "student")
         else:
-            _pdfProcessorPipeline.process_streamlit(uploaded_student_file, "student")
+            get_pdf_processor_pipeline().process_streamlit(uploaded_student_file, "student")
 
     # --- Process Task File (only if changed and not processed) ---
     if uploaded_task_file is not None:
-        _pdfProcessorPipeline.process_streamlit(uploaded_task_file, "task")
+        get_pdf_processor_pipeline().process_streamlit(uploaded_task_file, "task")
     
     # --- Process Solution File (only if changed and not processed) ---
     if uploaded_solution_file is not None:
-        _pdfProcessorPipeline.process_streamlit(uploaded_solution_file, "solution")
+        get_pdf_processor_pipeline().process_streamlit(uploaded_solution_file, "solution")
 
     # --- Display Processed Text and Images ---
     st.subheader("Verarbeitete Dokumente")
@@ -233,7 +230,7 @@ def run():
     with st.container():
         if st.button(label="Magic", icon=":material/wand_stars:", use_container_width=True) and (st.session_state["student_file_processed"] and st.session_state["solution_file_processed"]):
 
-            responses = LLMTextExtractorPipeline(llmClient)
+            responses = LLMTextExtractorPipeline(get_language_client())
 
             with st.chat_message("ai"):
 
@@ -4,15 +4,12 @@ import streamlit as st
 from dotenv import load_dotenv
 
 load_dotenv()
-from libs.language_client import LanguageClient
-from pipelines.pdf_processor import PdfProcessorPipeline
+from libs.language_client import get_language_client
 from pipelines.llm_extractor import LLMTextExtractorPipeline
-from pipelines.student_exam_extractor import StudentExamProcessorPipeline
+from web_app.resources import get_pdf_processor_pipeline
 from models.parser.student_text import StudentText
 
-llmClient = LanguageClient()
-_studenExamProcessorPipeline = StudentExamProcessorPipeline()
-_pdfProcessorPipeline = PdfProcessorPipeline()
+# Pipelines and client are built on first use, see web_app/resources.py
 
 PROGRESS_STEPS = {1: "🟢—⚪—⚪", 2: "⚪—🟢—⚪", 3: "⚪—⚪—🟢"}
 
@@ -82,7 +79,7 @@ def run():
             
             uploaded_solution_files = st.session_state.solution_files
             try:
-                _pdfProcessorPipeline.process_streamlit(uploaded_solution_files, "solution")
+                get_pdf_processor_pipeline().process_streamlit(uploaded_solution_files, "solution")
                 st.session_state.step = 2
 
                 st.rerun()
@@ -110,8 +107,8 @@ def run():
         else:
             uploaded_student_files = st.session_state.student_files
             try:
-                _pdfProcessorPipeline.process_streamlit(uploaded_student_files, "student")
-                # _studenExamProcessorPipeline.process_streamlit(uploaded_student_files, "student")
+                get_pdf_processor_pipeline().process_streamlit(uploaded_student_files, "student")
+                # get_student_exam_pipeline().process_streamlit(uploaded_student_files, "student")
                 st.session_state.step = 3
                 st.rerun()
             except Exception as e:
@@ -176,7 +173,7 @@ def run():
                 st.warning("Kein Schülertext zur Anzeige vorhanden.")
 
         if st.button("Extrahieren", type="primary"):
-            responses = LLMTextExtractorPipeline(llmClient).process_solutions(st.session_state.solution_results)
+            responses = LLMTextExtractorPipeline(get_language_client()).process_solutions(st.session_state.solution_results)
             st.session_state.extraction_started = True
             st.session_state.extraction_text = responses
             st.session_state.step = 4
@@ -0,0 +1,22 @@
+import streamlit as st
+
+@st.cache_resource
+def get_student_exam_pipeline():
+    """
+    Builds the CV pipeline on first use and shares it between sessions.
+    Imported lazily, the module pulls in torch, transformers and ultralytics
+    """
+    # pylint: disable=import-outside-toplevel
+    from pipelines.student_exam_extractor import StudentExamProcessorPipeline
+
+    return StudentExamProcessorPipeline()
+
+@st.cache_resource
+def get_pdf_processor_pipeline():
+    """
+    Builds the LLM parsing pipeline on first use and shares it between sessions
+    """
+    # pylint: disable=import-outside-toplevel
+    from pipelines.pdf_processor import PdfProcessorPipeline
+
+    return PdfProcessorPipeline()